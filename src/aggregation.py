@@ -0,0 +1,83 @@
+# Standard library imports
+import heapq
+from itertools import count
+from typing import Any, Dict, List, Tuple
+
+# Local application imports
+from racing import RaceMetric
+
+DeckInfo = Dict[str, Any]
+
+
+def metric_value(deck_info: DeckInfo, metric: RaceMetric) -> float:
+    """
+    Reads a metric from a deck's summarized results.
+
+    Args:
+        deck_info: A deck's results, as built by `find_best_decks`.
+        metric: ('star', index), ('wish_points', None) or ('score', None).
+
+    Returns:
+        float: The star chance percentage, expected wish points or mean score.
+            A pruned deck's unknown score counts as 0, the lowest possible.
+    """
+    kind, index = metric
+    if kind == 'star':
+        return deck_info.get('star_chances', {}).get(f"{index + 1}_star", 0)
+    if kind == 'wish_points':
+        return deck_info.get('expected_wish_points', 0)
+    score = deck_info.get('score')
+    return 0 if score is None else score
+
+
+class TopKAggregator:
+    """
+    Keeps the best `k` decks per metric while results stream in.
+
+    Each metric has a bounded min-heap whose root is the weakest deck kept,
+    so a new result costs at most one O(log k) replacement per metric and
+    memory stays at `k` entries per metric however many decks are
+    evaluated. Ties keep the deck that arrived first, matching a stable sort
+    of the full list.
+    """
+    def __init__(self, metrics: List[RaceMetric], k: int) -> None:
+        """
+        Initializes the aggregator.
+
+        Args:
+            metrics: The metrics to rank decks by.
+            k: How many decks to keep per metric.
+        """
+        self.k = k
+        self._heaps: Dict[RaceMetric, List[Tuple[float, int, DeckInfo]]] = {
+            metric: [] for metric in metrics
+        }
+        self._arrival = count()
+        self.seen = 0
+
+    def add(self, deck_info: DeckInfo) -> None:
+        """Offers a deck's results to every metric's heap."""
+        self.seen += 1
+        # A negated arrival number makes earlier decks win ties.
+        order = -next(self._arrival)
+        for metric, heap in self._heaps.items():
+            entry = (metric_value(deck_info, metric), order, deck_info)
+            if len(heap) < self.k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+
+    def top(self, metric: RaceMetric) -> List[DeckInfo]:
+        """
+        Returns the kept decks of a metric, best first.
+
+        Args:
+            metric: One of the metrics given at construction.
+
+        Returns:
+            List[DeckInfo]: At most `k` deck results.
+        """
+        ranked = sorted(
+            self._heaps[metric], key=lambda entry: entry[:2], reverse=True
+        )
+        return [deck_info for _, _, deck_info in ranked]
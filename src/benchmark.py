@@ -0,0 +1,392 @@
+# Standard library imports
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Local application imports
+from crafting.base_crafting import BaseCrafting
+from main import CARDS_PATH, CRAFTING_TYPE_CLASSES, ITEMS_PATH
+from simulator import ENGINE_VERSION, CardSimulator, SimulationSettings
+
+# Buffs with no item in items.json that still have card logic worth timing.
+EXTRA_BUFF_CASES: List[Tuple[str, str, int]] = [
+    ("forging", "copper_stewpot_buff", 8),
+]
+
+# A case whose throughput drops by more than this fraction is a regression.
+DEFAULT_TOLERANCE = 0.2
+
+
+def representative_deck(crafting: BaseCrafting, size: int) -> Tuple[str, ...]:
+    """
+    Picks a stable, mid-pack deck of a given size.
+
+    The first decks enumerated are dominated by the first card definition;
+    the middle of the enumeration mixes card types the way real decks do.
+    """
+    decks = list(crafting.iter_unique_decks(size))
+    return decks[len(decks) // 2]
+
+
+def throughput_cases(
+    items_data: Dict[str, Any]
+) -> List[Tuple[str, Optional[str], int]]:
+    """
+    Returns one (crafting_type, buff_id, deck_size) case per distinct buff
+    in items.json.
+    """
+    cases: List[Tuple[str, Optional[str], int]] = []
+    for item_data in items_data.values():
+        case = (
+            item_data['crafting_type'],
+            item_data.get('buff_id'),
+            item_data['deck_size']
+        )
+        if case[:2] not in [existing[:2] for existing in cases]:
+            cases.append(case)
+    return cases + EXTRA_BUFF_CASES
+
+
+def measure_evaluate_deck(
+    cards_data: Dict[str, Any],
+    cases: List[Tuple[str, Optional[str], int]],
+    engines: List[str],
+    simulations: int,
+    repeat: int
+) -> List[Dict[str, Any]]:
+    """
+    Measures simulations per second of `evaluate_deck` for every case and
+    engine.
+
+    Each case is seeded, so the same deck and random stream is timed on
+    every run of the benchmark. The fastest of `repeat` timings is kept,
+    which filters out interference from other processes.
+    """
+    results = []
+    for crafting_type, buff_id, size in cases:
+        crafting = CRAFTING_TYPE_CLASSES[crafting_type](
+            cards_data[crafting_type]
+        )
+        deck = representative_deck(crafting, size)
+        for engine in engines:
+            with contextlib.redirect_stdout(io.StringIO()):
+                simulator = CardSimulator(
+                    crafting,
+                    active_buff_id=buff_id,
+                    crafting_type=crafting_type,
+                    settings=SimulationSettings(engine=engine, seed=0)
+                )
+            if engine != "python" and simulator.engine == "python":
+                continue
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                simulator.evaluate_deck(deck, simulations)
+                timings.append(time.perf_counter() - start)
+            elapsed = min(timings)
+            results.append(
+                {
+                    'name': (
+                        f"evaluate_deck/{crafting_type}/{buff_id or 'none'}"
+                        f"/{engine}"
+                    ),
+                    'crafting_type': crafting_type,
+                    'buff_id': buff_id,
+                    'engine': engine,
+                    'deck': list(deck),
+                    'simulations': simulations,
+                    'seconds': elapsed,
+                    'sims_per_second': (
+                        simulations / elapsed if elapsed > 0 else float('inf')
+                    )
+                }
+            )
+            print(
+                f"{results[-1]['name']:<60} "
+                f"{results[-1]['sims_per_second']:>12,.0f} sims/s"
+            )
+    return results
+
+
+def measure_find_best_decks(
+    cards_data: Dict[str, Any],
+    items_data: Dict[str, Any],
+    engines: List[str],
+    simulations: int,
+    smallest_size_only: bool
+) -> List[Dict[str, Any]]:
+    """
+    Measures `find_best_decks` wall time, decks per second and peak memory.
+
+    Every crafting type is run at each deck size its items use. Peak memory
+    is reported for the main process (traced Python allocations) and for
+    the pool workers (their largest resident set size so far).
+    """
+    sizes: Dict[str, List[int]] = {}
+    for item_data in items_data.values():
+        sizes.setdefault(item_data['crafting_type'], [])
+        if item_data['deck_size'] not in sizes[item_data['crafting_type']]:
+            sizes[item_data['crafting_type']].append(item_data['deck_size'])
+
+    results = []
+    for crafting_type, deck_sizes in sizes.items():
+        crafting = CRAFTING_TYPE_CLASSES[crafting_type](
+            cards_data[crafting_type]
+        )
+        deck_sizes = sorted(deck_sizes)
+        if smallest_size_only:
+            deck_sizes = deck_sizes[:1]
+        for size in deck_sizes:
+            for engine in engines:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    simulator = CardSimulator(
+                        crafting,
+                        crafting_type=crafting_type,
+                        settings=SimulationSettings(
+                            engine=engine, seed=0, simulations=simulations
+                        )
+                    )
+                if engine != "python" and simulator.engine == "python":
+                    continue
+                num_decks = crafting.count_unique_decks(size)
+                tracemalloc.start()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    simulator.find_best_decks([size])
+                elapsed = time.perf_counter() - start
+                _, peak_bytes = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                results.append(
+                    {
+                        'name': (
+                            f"find_best_decks/{crafting_type}/{size}/{engine}"
+                        ),
+                        'crafting_type': crafting_type,
+                        'deck_size': size,
+                        'engine': engine,
+                        'decks': num_decks,
+                        'simulations': simulations,
+                        'seconds': elapsed,
+                        'decks_per_second': (
+                            num_decks / elapsed if elapsed > 0
+                            else float('inf')
+                        ),
+                        'peak_main_memory_mb': peak_bytes / 2 ** 20,
+                        'peak_worker_rss_mb': _max_child_rss_mb()
+                    }
+                )
+                print(
+                    f"{results[-1]['name']:<60} "
+                    f"{results[-1]['decks_per_second']:>12,.1f} decks/s  "
+                    f"{elapsed:8.2f}s"
+                )
+    return results
+
+
+def _max_child_rss_mb() -> float:
+    """Returns the largest resident set size of any finished child process."""
+    max_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return max_rss / 2 ** 20 if sys.platform == "darwin" else max_rss / 2 ** 10
+
+
+def _git_commit() -> Optional[str]:
+    """Returns the current git commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(
+    current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """
+    Compares two benchmark runs case by case.
+
+    Args:
+        current: This run's results.
+        baseline: A previous run's results, loaded from its JSON file.
+        tolerance: The fraction a rate may drop before it is a regression.
+
+    Returns:
+        List[str]: The names of the cases that regressed.
+    """
+    baseline_rates = {
+        case['name']: case.get('sims_per_second', case.get('decks_per_second'))
+        for case in (
+            baseline.get('evaluate_deck', [])
+            + baseline.get('find_best_decks', [])
+        )
+    }
+    regressions = []
+    print("\n--- Comparison with baseline ---")
+    for case in current['evaluate_deck'] + current['find_best_decks']:
+        rate = case.get('sims_per_second', case.get('decks_per_second'))
+        baseline_rate = baseline_rates.get(case['name'])
+        if not baseline_rate:
+            continue
+        ratio = rate / baseline_rate
+        flag = ""
+        if ratio < 1 - tolerance:
+            flag = "  <-- REGRESSION"
+            regressions.append(case['name'])
+        print(f"{case['name']:<60} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main() -> None:
+    """Runs the benchmarks and writes the results as JSON."""
+    parser = argparse.ArgumentParser(
+        description=(
+            "Benchmark simulator throughput and find_best_decks wall time."
+        )
+    )
+    parser.add_argument(
+        "--engines",
+        nargs="+",
+        default=["python", "numpy"],
+        choices=["python", "numpy", "exact"],
+        help="The simulation engines to benchmark."
+    )
+    parser.add_argument(
+        "--deck-simulations",
+        type=int,
+        default=20000,
+        help="Simulations per evaluate_deck measurement."
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help=(
+            "How many times each evaluate_deck measurement is repeated; the "
+            "fastest is kept."
+        )
+    )
+    parser.add_argument(
+        "--search-simulations",
+        type=int,
+        default=1000,
+        help="Simulations per deck in the find_best_decks measurements."
+    )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help=(
+            "Only time find_best_decks at the smallest deck size of each "
+            "crafting type."
+        )
+    )
+    parser.add_argument(
+        "--skip-search",
+        action="store_true",
+        help="Skip the find_best_decks measurements."
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help=(
+            "Where to write the JSON results (default: "
+            "output/benchmark_<timestamp>.json)."
+        )
+    )
+    parser.add_argument(
+        "--compare",
+        type=str,
+        default=None,
+        help=(
+            "A previous benchmark JSON file to compare against; exits with "
+            "status 1 on a regression."
+        )
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=(
+            "The fraction a rate may drop against the baseline before it "
+            "counts as a regression."
+        )
+    )
+    args = parser.parse_args()
+
+    try:
+        with open(CARDS_PATH, 'r') as f:
+            cards_data = json.load(f)
+        with open(ITEMS_PATH, 'r') as f:
+            items_data = json.load(f)
+        baseline = None
+        if args.compare:
+            with open(args.compare, 'r') as f:
+                baseline = json.load(f)
+    except FileNotFoundError as e:
+        print(f"Error: File not found - {e.filename}")
+        sys.exit(2)
+    except json.JSONDecodeError as e:
+        print(f"Error: A file is not valid JSON - {e}")
+        sys.exit(2)
+
+    print("--- evaluate_deck throughput ---")
+    results: Dict[str, Any] = {
+        'timestamp': datetime.now().isoformat(timespec="seconds"),
+        'git_commit': _git_commit(),
+        'engine_version': ENGINE_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'evaluate_deck': measure_evaluate_deck(
+            cards_data,
+            throughput_cases(items_data),
+            args.engines,
+            args.deck_simulations,
+            args.repeat
+        ),
+        'find_best_decks': [],
+    }
+    if not args.skip_search:
+        print("\n--- find_best_decks wall time ---")
+        results['find_best_decks'] = measure_find_best_decks(
+            cards_data,
+            items_data,
+            args.engines,
+            args.search_simulations,
+            smallest_size_only=args.quick
+        )
+
+    output_path = args.output
+    if output_path is None:
+        output_dir = "output"
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(
+            output_dir,
+            f"benchmark_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+        )
+    with open(output_path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nBenchmark results saved to: {output_path}")
+
+    if baseline is not None:
+        if compare_results(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
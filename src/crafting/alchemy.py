@@ -1,54 +1,78 @@
-import random
-from typing import Dict, Callable, Tuple
+from collections import Counter
+from typing import Any, Dict, Callable, Optional, Tuple
 from .base_crafting import BaseCrafting, State
 
+
+class AlchemyState(State):
+    """The state of a single alchemy run."""
+    __slots__ = ('enchant_debuff', 'overload_debuff')
+
+    def reset(self) -> None:
+        super().reset()
+        self.enchant_debuff = 0
+        self.overload_debuff = 0
+
+
 class AlchemyCrafting(BaseCrafting):
     """
     Implements the logic for the 'Alchemy' crafting type.
     """
+    state_class = AlchemyState
+
+    def set_active_buff(self, buff_id: Optional[str]) -> None:
+        """Resolves the alchemy item buffs into flags once."""
+        super().set_active_buff(buff_id)
+        self.has_warmdust_deck_buff = buff_id == "warmdust_deck_buff"
+        self.has_calming_warmdust_deck_buff = (
+            buff_id == "calming_warmdust_deck_buff"
+        )
+        self.has_soothing_buff = buff_id == "soothing_buff"
+        self.has_illusion_buff = buff_id == "illusion_buff"
+        self.has_fireward_ring_buff = buff_id == "fireward_ring_buff"
+        self.has_warming_incense_buff = buff_id == "warming_incense_buff"
+        self.has_calmwind_incense_buff = buff_id == "calmwind_incense_buff"
+
     def _get_highest_color(self, state: State) -> str:
         """Returns the name of the color with the highest score."""
-        return 'yellow' if state['yellow'] >= state['blue'] else 'blue'
+        return 'yellow' if state.yellow >= state.blue else 'blue'
 
     def _get_lowest_color(self, state: State) -> str:
         """Returns the name of the color with the lowest score."""
-        return 'yellow' if state['yellow'] <= state['blue'] else 'blue'
+        return 'yellow' if state.yellow <= state.blue else 'blue'
 
     def _apply_enchant_debuff(self, state: State):
         """Applies the debuff from previously played Enchant cards."""
-        debuff_stacks = state.get('enchant_debuff', 0)
-        for _ in range(debuff_stacks):
+        for _ in range(state.enchant_debuff):
             color = self._get_random_color()
             state[color] = max(1, state[color] - 1) # Ensure score doesn't go below 1
 
     def _apply_overload_debuff(self, state: State):
         """Applies the debuff from previously played Overload cards."""
-        debuff_stacks = state.get('overload_debuff', 0)
-        for _ in range(debuff_stacks):
+        for _ in range(state.overload_debuff):
             color = self._get_random_color()
             state[color] = max(1, state[color] - 3) # Ensure score doesn't go below 1
 
     def _apply_warmdust_deck_buff(self, state: State):
         """Applies the buff for the Warmdust-Deck item."""
-        if state.get("warmdust_deck_buff", False):
+        if self.has_warmdust_deck_buff:
             lowest_color = self._get_lowest_color(state)
             state[lowest_color] += 1
 
     def _apply_calming_warmdust_deck_buff(self, state: State):
         """Applies the buff for the Calming Warmdust-deck item."""
-        if state.get("calming_warmdust_deck_buff", False):
+        if self.has_calming_warmdust_deck_buff:
             highest_color = self._get_highest_color(state)
             state[highest_color] += 3
 
     def _apply_soothing_buff(self, state: State):
         """Applies the buff for the Soothing item."""
-        if state.get("soothing_buff", False):
+        if self.has_soothing_buff:
             highest_color = self._get_highest_color(state)
             state[highest_color] += 3
 
     def _apply_illusion_buff(self, state: State):
         """Applies the buff for the Illusion item."""
-        if state.get("illusion_buff", False):
+        if self.has_illusion_buff:
             lowest_color = self._get_lowest_color(state)
             state[lowest_color] += 1
 
@@ -62,6 +86,13 @@ class AlchemyCrafting(BaseCrafting):
         self._apply_illusion_buff(state)
         return state
 
+    def get_batch_engine(
+        self, active_buff_id: Optional[str] = None
+    ) -> Optional[Any]:
+        """Returns the vectorized NumPy engine for alchemy."""
+        from .alchemy_batch import AlchemyBatchEngine
+        return AlchemyBatchEngine(self, active_buff_id)
+
     def get_card_functions(self) -> Dict[str, Callable[[State], State]]:
         """Maps alchemy card names to their specific functions."""
         return {
@@ -77,7 +108,7 @@ class AlchemyCrafting(BaseCrafting):
         """Highest color +40; increments future card debuff."""
         highest_color = self._get_highest_color(state)
         state[highest_color] += 40
-        state['overload_debuff'] = state.get('overload_debuff', 0) + 1
+        state.overload_debuff += 1
         return state
 
     def ingredient(self, state: State) -> State:
@@ -101,7 +132,7 @@ class AlchemyCrafting(BaseCrafting):
         """Lowest color +8; increments future card debuff."""
         lowest_color = self._get_lowest_color(state)
         state[lowest_color] += 20
-        state['enchant_debuff'] = state.get('enchant_debuff', 0) + 1
+        state.enchant_debuff += 1
         return state
 
     def distill(self, state: State) -> State:
@@ -114,24 +145,52 @@ class AlchemyCrafting(BaseCrafting):
         """Applies the logic for the Fuse card if it's in the deck."""
         if "Fuse" in deck:
             # Check the condition: color point gap is less than 10.
-            if abs(state['yellow'] - state['blue']) < 20:
-                state['yellow'] += 10
-                state['blue'] += 10
+            if abs(state.yellow - state.blue) < 20:
+                state.yellow += 10
+                state.blue += 10
         return state
     
     def apply_start_of_cycle_effects(self, state: State, deck: Tuple[str, ...]) -> State:
-        if state.get("fireward_ring_buff", False):
+        if self.has_fireward_ring_buff:
             # Apply +15 to a random color at the start of production
             color = self._get_random_color()
             state[color] += 15
 
         return state
 
+    def optimistic_upper_bound(self, deck: Tuple[str, ...]) -> Optional[float]:
+        """
+        Bounds the score from every point the cards and buffs can add,
+        ignoring the subtractions (which never take a color below 1).
+        Distill is the only card that doubles a color.
+        """
+        counts = Counter(deck)
+        ingredient_triggers = 2 if self.has_warming_incense_buff else 1
+        grind_triggers = 2 if self.has_calmwind_incense_buff else 1
+        points = 2 + 40 * counts['Overload'] + 20 * counts['Enchant']
+        points += (
+            20 * ingredient_triggers * counts['Ingredient']
+            + 10 * grind_triggers * counts['Grind']
+        )
+        # Pre-card buffs add to one color before every card played.
+        pre_card_points = (
+            (1 if self.has_warmdust_deck_buff else 0)
+            + (3 if self.has_calming_warmdust_deck_buff else 0)
+            + (3 if self.has_soothing_buff else 0)
+            + (1 if self.has_illusion_buff else 0)
+        )
+        points += pre_card_points * len(deck)
+        if self.has_fireward_ring_buff:
+            points += 15
+        if 'Fuse' in counts:
+            points += 20
+        return self._score_bound(points, counts['Distill'])
+
     def play_card(self, card_name: str, state: State) -> State:
         """
         Overrides the base play_card to handle special buffs for alchemy cards.
         """
-        func = self.get_card_functions().get(card_name)
+        func = self._card_functions.get(card_name)
         if not func:
             return state
 
@@ -139,11 +198,13 @@ class AlchemyCrafting(BaseCrafting):
         state = func(state)
 
         # Handle Warming Incense buff for Ingredient card
-        if card_name == "Ingredient" and state.get("warming_incense_buff"):
-            state = func(state)  # Trigger again
+        if card_name == "Ingredient" and self.has_warming_incense_buff:
+            # Trigger again
+            state = self._retrigger_functions[card_name](state)
 
         # Handle Calmwind Incense buff for Grind card
-        if card_name == "Grind" and state.get("calmwind_incense_buff"):
-            state = func(state)  # Trigger again
+        if card_name == "Grind" and self.has_calmwind_incense_buff:
+            # Trigger again
+            state = self._retrigger_functions[card_name](state)
 
         return state
@@ -0,0 +1,157 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .batch_engine import BatchEngine
+
+
+class AlchemyBatchEngine(BatchEngine):
+    """
+    Vectorized version of `AlchemyCrafting`.
+
+    Yellow, blue and the debuff stacks are arrays over all simulations. Each
+    deck position applies the pre-card effects and then every card type under
+    a mask of the simulations that drew it at that position.
+    """
+    def simulate(
+        self,
+        deck: Tuple[str, ...],
+        simulations: int,
+        rng: Optional[np.random.Generator] = None
+    ) -> np.ndarray:
+        """Simulates an alchemy deck; see `BatchEngine.simulate`."""
+        rng = rng if rng is not None else np.random.default_rng()
+        card_names, orders = self.shuffled_orders(deck, simulations, rng)
+        batch = _AlchemyBatch(simulations, rng)
+        everyone = np.ones(simulations, dtype=bool)
+
+        # Start-of-cycle effects
+        if self.has_buff("fireward_ring_buff"):
+            batch.add(everyone, self.random_is_yellow(rng, simulations), 15)
+
+        card_actions = {
+            "Ingredient": batch.ingredient,
+            "Grind": batch.grind,
+            "Enchant": batch.enchant,
+            "Distill": batch.distill,
+            "Overload": batch.overload,
+        }
+        repeats = {
+            "Ingredient": 2 if self.has_buff("warming_incense_buff") else 1,
+            "Grind": 2 if self.has_buff("calmwind_incense_buff") else 1,
+        }
+
+        for position in range(len(deck)):
+            self._apply_pre_card_effects(batch, everyone)
+            played = orders[:, position]
+            for code, card_name in enumerate(card_names):
+                action = card_actions.get(card_name)
+                if action is None:
+                    continue
+                mask = played == code
+                if not mask.any():
+                    continue
+                for _ in range(repeats.get(card_name, 1)):
+                    action(mask)
+
+        # End-of-cycle effects
+        if "Fuse" in deck:
+            close_gap = np.abs(batch.yellow - batch.blue) < 20
+            batch.yellow += 10 * close_gap
+            batch.blue += 10 * close_gap
+
+        return batch.yellow * batch.blue
+
+    def _apply_pre_card_effects(
+        self, batch: "_AlchemyBatch", everyone: np.ndarray
+    ) -> None:
+        """
+        Applies the debuffs and item buffs that trigger before every
+        card.
+        """
+        batch.apply_debuff(batch.enchant_debuff, 1)
+        batch.apply_debuff(batch.overload_debuff, 3)
+        if self.has_buff("warmdust_deck_buff"):
+            batch.add(everyone, batch.yellow_is_lowest(), 1)
+        if self.has_buff("calming_warmdust_deck_buff"):
+            batch.add(everyone, batch.yellow_is_highest(), 3)
+        if self.has_buff("soothing_buff"):
+            batch.add(everyone, batch.yellow_is_highest(), 3)
+        if self.has_buff("illusion_buff"):
+            batch.add(everyone, batch.yellow_is_lowest(), 1)
+
+
+class _AlchemyBatch:
+    """The alchemy state of every simulation in one batch, held as arrays."""
+    def __init__(self, simulations: int, rng: np.random.Generator) -> None:
+        self.rng = rng
+        self.yellow = np.ones(simulations, dtype=np.int64)
+        self.blue = np.ones(simulations, dtype=np.int64)
+        self.enchant_debuff = np.zeros(simulations, dtype=np.int64)
+        self.overload_debuff = np.zeros(simulations, dtype=np.int64)
+
+    # --- Array Helpers ---
+
+    def yellow_is_highest(self) -> np.ndarray:
+        return self.yellow >= self.blue
+
+    def yellow_is_lowest(self) -> np.ndarray:
+        return self.yellow <= self.blue
+
+    def add(
+        self, mask: np.ndarray, to_yellow: np.ndarray, amount: int
+    ) -> None:
+        """Adds `amount` to the chosen color of every masked simulation."""
+        self.yellow += amount * (mask & to_yellow)
+        self.blue += amount * (mask & ~to_yellow)
+
+    def subtract(
+        self, mask: np.ndarray, to_yellow: np.ndarray, amount: int
+    ) -> None:
+        """Subtracts `amount` from the chosen color, never going below 1."""
+        self.yellow = np.where(
+            mask & to_yellow, np.maximum(1, self.yellow - amount), self.yellow
+        )
+        self.blue = np.where(
+            mask & ~to_yellow, np.maximum(1, self.blue - amount), self.blue
+        )
+
+    def apply_debuff(self, stacks: np.ndarray, amount: int) -> None:
+        """Each stack hits a random color, one stack after another."""
+        for stack in range(int(stacks.max(initial=0))):
+            self.subtract(
+                stacks > stack,
+                BatchEngine.random_is_yellow(self.rng, len(stacks)),
+                amount
+            )
+
+    # --- Card Implementations ---
+
+    def overload(self, mask: np.ndarray) -> None:
+        self.add(mask, self.yellow_is_highest(), 40)
+        self.overload_debuff += mask
+
+    def ingredient(self, mask: np.ndarray) -> None:
+        highest_is_yellow = self.yellow_is_highest()
+        lowest_is_yellow = self.yellow_is_lowest()
+        self.add(mask, highest_is_yellow, 20)
+        self.subtract(mask, lowest_is_yellow, 4)
+
+    def grind(self, mask: np.ndarray) -> None:
+        highest_is_yellow = self.yellow_is_highest()
+        lowest_is_yellow = self.yellow_is_lowest()
+        self.add(mask, lowest_is_yellow, 10)
+        self.subtract(mask, highest_is_yellow, 5)
+
+    def enchant(self, mask: np.ndarray) -> None:
+        self.add(mask, self.yellow_is_lowest(), 20)
+        self.enchant_debuff += mask
+
+    def distill(self, mask: np.ndarray) -> None:
+        highest_is_yellow = self.yellow_is_highest()
+        self.yellow = np.where(
+            mask & highest_is_yellow, self.yellow * 2, self.yellow
+        )
+        self.blue = np.where(
+            mask & ~highest_is_yellow, self.blue * 2, self.blue
+        )
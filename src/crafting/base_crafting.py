@@ -1,11 +1,75 @@
+import bisect
+import functools
+import math
 import random
+import time
 from abc import ABC, abstractmethod
 from collections import Counter
-from typing import List, Dict, Callable, Any, Tuple
+from typing import List, Dict, Callable, Any, Iterator, Optional, Tuple, Type
+
+
+@functools.lru_cache(maxsize=None)
+def _binomial_cdf(n: int, chance: float) -> Tuple[float, ...]:
+    """Returns P(X <= k) for k = 0..n - 1 of X ~ Binomial(n, chance)."""
+    cumulative, total = [], 0.0
+    for k in range(n):
+        total += math.comb(n, k) * chance ** k * (1 - chance) ** (n - k)
+        cumulative.append(total)
+    return tuple(cumulative)
+
+
+class State:
+    """
+    The mutable state of a single simulation run.
+
+    States use `__slots__` so that a run is a fixed set of attribute reads
+    and writes rather than string-keyed dictionary lookups. Each crafting
+    type subclasses it with its own slots and extends `reset`, so one
+    object can be reused in place across all simulations of a deck.
+
+    The two colors can also be accessed by name (`state['yellow']`), which
+    lets card functions update a randomly chosen color.
+    """
+    __slots__ = ('yellow', 'blue')
+
+    def __init__(self) -> None:
+        """Initializes a fresh state."""
+        self.reset()
+
+    def reset(self) -> None:
+        """Restores the start-of-run values."""
+        self.yellow = 1
+        self.blue = 1
+
+    def __getitem__(self, color: str) -> Any:
+        return getattr(self, color)
+
+    def __setitem__(self, color: str, value: Any) -> None:
+        setattr(self, color, value)
+
+    @classmethod
+    def outcome_slots(cls) -> Tuple[str, ...]:
+        """Returns every slot that can influence a run's outcome."""
+        slots = cls.__dict__.get('_outcome_slots')
+        if slots is None:
+            slots = tuple(
+                slot for klass in reversed(cls.__mro__)
+                for slot in klass.__dict__.get('__slots__', ())
+            )
+            setattr(cls, '_outcome_slots', slots)
+        return slots
+
+    def copy(self) -> 'State':
+        """Returns an independent copy."""
+        new_state = object.__new__(type(self))
+        for slot in self.outcome_slots():
+            setattr(new_state, slot, getattr(self, slot))
+        return new_state
+
+    def key(self) -> Tuple[Any, ...]:
+        """Returns a hashable snapshot of every outcome-relevant slot."""
+        return tuple(getattr(self, slot) for slot in self.outcome_slots())
 
-# A type alias for the state dictionary used throughout the simulation.
-# This makes it clear what kind of data the card functions operate on.
-State = Dict[str, Any]
 
 class BaseCrafting(ABC):
     """
@@ -25,6 +89,128 @@ class BaseCrafting(ABC):
         """
         self._card_definitions = card_definitions
         self._all_cards: List[str] = self._flatten_card_list()
+        # A `profiling.SimulationProfiler` timing every card function call,
+        # or None (see `enable_profiling`).
+        self.profiler: Optional[Any] = None
+        self.set_active_buff(None)
+        self.seed(None)
+
+    # The State subclass used by this crafting type.
+    state_class: Type[State] = State
+
+    # The attributes `_build_card_functions` rebuilds; they hold bound
+    # methods and timing wrappers, so they are never pickled.
+    _dispatch_attributes: Tuple[str, ...] = (
+        '_card_functions',
+        '_retrigger_functions'
+    )
+
+    def __copy__(self) -> 'BaseCrafting':
+        """
+        Copies the instance, rebinding the card dispatch table to the
+        copy.
+        """
+        new_instance = object.__new__(type(self))
+        new_instance.__dict__.update(self.__dict__)
+        new_instance._build_card_functions()
+        return new_instance
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Leaves the dispatch table and the global `random` module out
+        when pickled.
+        """
+        state = self.__dict__.copy()
+        for attribute in self._dispatch_attributes:
+            del state[attribute]
+        if state['rng'] is random:
+            state['rng'] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restores a pickled instance, rebinding the card dispatch table."""
+        self.__dict__.update(state)
+        if self.rng is None:
+            self.rng = random
+        self._build_card_functions()
+
+    def set_active_buff(self, buff_id: Optional[str]) -> None:
+        """
+        Sets the special item buff used by every following simulation.
+
+        Subclasses extend this to resolve their buff checks into plain
+        attributes once, instead of looking them up on every card play. The
+        card dispatch table is (re)built here as well.
+
+        Args:
+            buff_id (Optional[str]): The unique identifier of the buff, or
+                None.
+        """
+        self.active_buff_id = buff_id
+        self._build_card_functions()
+
+    def enable_profiling(self, profiler: Optional[Any]) -> None:
+        """
+        Times every card function call into a profiler, or stops timing.
+
+        While profiling, the dispatch tables `play_card` draws from hold
+        timing wrappers, so each call is recorded under ('card', name).
+        Extra triggers of a played card (see `_retrigger_functions`) are
+        recorded separately under ('card', '<name> (re-trigger)').
+        Without a profiler the tables hold the plain card functions, so
+        the regular simulation pays nothing.
+
+        Args:
+            profiler (Optional[Any]): A `profiling.SimulationProfiler`, or
+                None to stop profiling.
+        """
+        self.profiler = profiler
+        self._build_card_functions()
+
+    def _timed(
+        self, key: Tuple[str, str], func: Callable[[State], State]
+    ) -> Callable[[State], State]:
+        """Wraps a card function so that each call is recorded under `key`."""
+        record = self.profiler.record
+        clock = time.perf_counter
+
+        def timed(state: State) -> State:
+            started = clock()
+            state = func(state)
+            record(key, clock() - started)
+            return state
+        return timed
+
+    def _build_card_functions(self) -> None:
+        """
+        (Re)builds the card dispatch tables for the active buff.
+
+        `_card_functions` plays a card; `_retrigger_functions` holds the
+        same functions for the extra triggers of a card already played,
+        such as Multi Forge's, so that profiles tell them apart.
+        """
+        functions = self.get_card_functions()
+        if self.profiler is None:
+            self._card_functions = functions
+            self._retrigger_functions = functions
+            return
+        self._card_functions = {
+            name: self._timed(('card', name), func)
+            for name, func in functions.items()
+        }
+        self._retrigger_functions = {
+            name: self._timed(('card', f"{name} (re-trigger)"), func)
+            for name, func in functions.items()
+        }
+
+    def new_state(self) -> State:
+        """
+        Creates a fresh state for this crafting type.
+
+        Returns:
+            State: A state ready for the first run; call `reset` between runs.
+        """
+        return self.state_class()
 
     def _flatten_card_list(self) -> List[str]:
         """
@@ -57,6 +243,117 @@ class BaseCrafting(ABC):
         """
         return Counter(self._all_cards)
 
+    def iter_unique_decks(self, size: int) -> Iterator[Tuple[str, ...]]:
+        """
+        Lazily yields every distinct deck (multiset of cards) of a given size.
+
+        Decks are built directly from the card definitions and their
+        `card_quantity`, so each multiset is produced exactly once instead of
+        deduplicating positional combinations of the flattened card list.
+        Cards inside a deck keep the order of the card definitions.
+
+        Args:
+            size (int): The number of cards in each deck.
+
+        Yields:
+            Tuple[str, ...]: A deck as a tuple of card names.
+        """
+        names = [card['card_name'] for card in self._card_definitions]
+        quantities = [card['card_quantity'] for card in self._card_definitions]
+
+        # remaining_capacity[i] is how many cards the definitions from i
+        # onwards can still contribute; used to skip branches that cannot
+        # fill the deck.
+        remaining_capacity = [0] * (len(quantities) + 1)
+        for i in range(len(quantities) - 1, -1, -1):
+            remaining_capacity[i] = remaining_capacity[i + 1] + quantities[i]
+
+        def _build(
+            index: int, cards_left: int, prefix: Tuple[str, ...]
+        ) -> Iterator[Tuple[str, ...]]:
+            if cards_left == 0:
+                yield prefix
+                return
+            if index == len(names) or remaining_capacity[index] < cards_left:
+                return
+            for count in range(min(quantities[index], cards_left), -1, -1):
+                yield from _build(
+                    index + 1,
+                    cards_left - count,
+                    prefix + (names[index],) * count
+                )
+
+        if size < 0:
+            return
+        yield from _build(0, size, ())
+
+    def count_unique_decks(self, size: int) -> int:
+        """
+        Counts the distinct decks of a given size without generating them.
+
+        Args:
+            size (int): The number of cards in each deck.
+
+        Returns:
+            int: The exact number of decks `iter_unique_decks(size)` yields.
+        """
+        if size < 0:
+            return 0
+        # ways[k] holds the number of multisets of size k over the cards
+        # seen so far.
+        ways = [1] + [0] * size
+        for card in self._card_definitions:
+            quantity = card['card_quantity']
+            new_ways = [0] * (size + 1)
+            for total in range(size + 1):
+                for count in range(min(quantity, total) + 1):
+                    new_ways[total] += ways[total - count]
+            ways = new_ways
+        return ways[size]
+
+    def get_card_names(self) -> List[str]:
+        """
+        Returns the name of every defined card, in the order
+        `encode_deck` counts them.
+        """
+        return [card['card_name'] for card in self._card_definitions]
+
+    def encode_deck(self, deck: Tuple[str, ...]) -> Tuple[int, ...]:
+        """
+        Encodes a deck as its card counts, in the order of the card
+        definitions.
+
+        The count vector is a compact, order-independent ID for a deck that
+        is cheap to send to worker processes.
+
+        Args:
+            deck (Tuple[str, ...]): The deck as a tuple of card names.
+
+        Returns:
+            Tuple[int, ...]: How many copies of each defined card the deck
+                holds.
+        """
+        counts = Counter(deck)
+        return tuple(
+            counts[card['card_name']] for card in self._card_definitions
+        )
+
+    def decode_deck(self, counts: Tuple[int, ...]) -> Tuple[str, ...]:
+        """
+        Decodes a count vector from `encode_deck` back into a deck.
+
+        Args:
+            counts (Tuple[int, ...]): The card counts.
+
+        Returns:
+            Tuple[str, ...]: The deck, with cards in the order of the card
+                definitions (the same order `iter_unique_decks` yields).
+        """
+        deck: Tuple[str, ...] = ()
+        for card, count in zip(self._card_definitions, counts):
+            deck += (card['card_name'],) * count
+        return deck
+
     @abstractmethod
     def get_card_functions(self) -> Dict[str, Callable[[State], State]]:
         """
@@ -71,6 +368,68 @@ class BaseCrafting(ABC):
         """
         pass
 
+    def get_batch_engine(
+        self, active_buff_id: Optional[str] = None
+    ) -> Optional[Any]:
+        """
+        Returns a NumPy batch engine simulating this crafting type, if any.
+
+        Base implementation returns None; subclasses with a vectorized engine
+        override it. The engine is imported lazily so the plain Python
+        simulation keeps working without NumPy installed.
+
+        Args:
+            active_buff_id (Optional[str]): The special item buff, if any.
+
+        Returns:
+            Optional[BatchEngine]: The engine, or None if not available.
+        """
+        return None
+
+    def optimistic_upper_bound(self, deck: Tuple[str, ...]) -> Optional[float]:
+        """
+        Returns a score no run of the deck can exceed, if one is known.
+
+        The bound assumes every random color, chance and value goes the best
+        way, so a deck whose bound is below a star threshold can never reach
+        it. Base implementation returns None (no bound); subclasses override
+        it for their cards and buffs.
+
+        Args:
+            deck (Tuple[str, ...]): The deck as a tuple of card names.
+
+        Returns:
+            Optional[float]: An upper bound on the final `yellow * blue`.
+        """
+        return None
+
+    @staticmethod
+    def _score_bound(
+        points: float, doublings: int, redistributes: bool = False
+    ) -> float:
+        """
+        Bounds the final `yellow * blue` of a run.
+
+        Colors start at 1 and subtractions never take them below 1, so each
+        color ends at most at its added points times 2 for each doubling of
+        it. The product of two colors is largest when they are equal, which
+        gives `2 ** doublings * (points / 2) ** 2`. An end-of-cycle effect
+        that moves points between colors breaks the per-color argument, so
+        then only the total is bounded: each doubling at most doubles it.
+
+        Args:
+            points: The most points added to both colors together, including
+                the 2 they start with.
+            doublings: How many effects can double a color.
+            redistributes: Whether points can be moved between colors.
+
+        Returns:
+            float: The upper bound.
+        """
+        if redistributes:
+            return (points * 2 ** doublings / 2) ** 2
+        return 2 ** doublings * (points / 2) ** 2
+
     def apply_end_of_cycle_effects(self, state: State, deck: Tuple[str, ...]) -> State:
         """
         Applies effects for cards that trigger at the end of the crafting process.
@@ -96,19 +455,134 @@ class BaseCrafting(ABC):
         """
         Plays a card, handling any state-based interactions.
         The default implementation simply executes the card's function.
-        Subclasses can override this for more complex interactions.
+        Subclasses can override this for more complex interactions, and
+        run extra triggers through `_retrigger_functions`.
         """
-        func = self.get_card_functions().get(card_name)
+        func = self._card_functions.get(card_name)
         if func:
             func(state)
         return state
 
-    @staticmethod
-    def _get_random_color() -> str:
+    def seed(self, seed: Optional[int]) -> None:
+        """
+        Sets the random stream used by every card function.
+
+        Args:
+            seed (Optional[int]): The seed of a private `random.Random`
+                stream, or None to draw from the global `random` module.
+        """
+        # The `random` module exposes the same methods as `random.Random`,
+        # and unlike a private instance it is reseeded in forked workers.
+        self.rng = random if seed is None else random.Random(seed)
+
+    def _get_random_color(self) -> str:
         """
         Helper function to pick 'yellow' or 'blue' randomly.
 
         Returns:
             str: Either "yellow" or "blue".
         """
-        return random.choice(['yellow', 'blue'])
+        return 'yellow' if self.rng.random() < 0.5 else 'blue'
+
+    def _random_chance(self, chance: float) -> bool:
+        """
+        Helper function for a random event that happens with a given chance.
+
+        Card functions draw through these helpers rather than calling
+        `random` directly, so evaluators can substitute other outcomes.
+
+        Args:
+            chance (float): The probability of the event, from 0 to 1.
+
+        Returns:
+            bool: True if the event happened.
+        """
+        return self.rng.random() < chance
+
+    def _random_int(self, low: int, high: int) -> int:
+        """
+        Helper function to pick a random integer from an inclusive range.
+
+        Args:
+            low (int): The smallest possible value.
+            high (int): The largest possible value.
+
+        Returns:
+            int: A value between `low` and `high`, inclusive.
+        """
+        return low + self._random_index(high - low + 1)
+
+    def _random_index(self, n: int) -> int:
+        """
+        Helper function to pick a uniform index below `n`.
+
+        Every random helper, the shuffle included, is built on single
+        `rng.random()` draws, so an antithetic stream that mirrors those draws
+        mirrors every random decision of a run.
+
+        Args:
+            n (int): The number of possible indices.
+
+        Returns:
+            int: A value from 0 to `n - 1`.
+        """
+        return min(int(self.rng.random() * n), n - 1)
+
+    def _random_streak(self, chance: float, max_length: int) -> int:
+        """
+        Helper function for events that repeat until the first miss.
+
+        Counts the successes of independent trials with the given chance
+        before the first failure, capped at `max_length` (a truncated
+        geometric variable), from a single draw by inverting its
+        distribution: the streak reaches k exactly when `u < chance ** k`.
+
+        Args:
+            chance (float): The probability of each success, from 0 to 1.
+            max_length (int): The most successes counted.
+
+        Returns:
+            int: A value from 0 to `max_length`.
+        """
+        if chance <= 0 or max_length <= 0:
+            return 0
+        u = self.rng.random()
+        if chance >= 1 or u <= 0:
+            return max_length
+        if u >= chance:
+            return 0
+        return min(int(math.log(u) / math.log(chance)), max_length)
+
+    def _random_count(self, n: int, chance: float) -> int:
+        """
+        Helper function for how many of `n` independent events happen.
+
+        Draws a binomial count from a single draw by inverting its
+        cumulative distribution, instead of one draw per event.
+
+        Args:
+            n (int): The number of events.
+            chance (float): The probability of each event, from 0 to 1.
+
+        Returns:
+            int: A value from 0 to `n`.
+        """
+        if n <= 0:
+            return 0
+        return bisect.bisect_right(_binomial_cdf(n, chance), self.rng.random())
+
+    def shuffle_deck(self, cards: List[str]) -> List[str]:
+        """
+        Returns the cards in a uniformly random order (Fisher-Yates).
+
+        Args:
+            cards (List[str]): The cards to shuffle; the list is not modified.
+
+        Returns:
+            List[str]: A shuffled copy of the cards.
+        """
+        shuffled = list(cards)
+        for i in range(len(shuffled) - 1, 0, -1):
+            j = self._random_index(i + 1)
+            shuffled[i], shuffled[j] = shuffled[j], shuffled[i]
+        return shuffled
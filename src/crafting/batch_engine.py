@@ -0,0 +1,103 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .base_crafting import BaseCrafting
+
+
+class BatchEngine(ABC):
+    """
+    Abstract base class for a NumPy simulation engine.
+
+    Instead of playing one simulation at a time through the card functions,
+    a batch engine holds every piece of state as an array over all
+    simulations and applies each deck position as vectorized operations.
+    """
+    def __init__(
+        self, crafting: BaseCrafting, active_buff_id: Optional[str] = None
+    ) -> None:
+        """
+        Initializes the engine.
+
+        Args:
+            crafting (BaseCrafting): The crafting instance whose card
+                definitions the engine simulates.
+            active_buff_id (Optional[str]): The special item buff, if any.
+        """
+        self.crafting = crafting
+        self.active_buff_id = active_buff_id
+
+    def has_buff(self, buff_id: str) -> bool:
+        """Returns True if the given special item buff is active."""
+        return self.active_buff_id == buff_id
+
+    def card_definition(self, card_name: str) -> Dict[str, Any]:
+        """Returns the cards.json definition of a card, or an empty dict."""
+        return next(
+            (
+                card
+                for card in self.crafting._card_definitions
+                if card['card_name'] == card_name
+            ),
+            {}
+        )
+
+    @staticmethod
+    def generator(seed: Optional[int] = None) -> np.random.Generator:
+        """
+        Creates the random generator for one deck; unseeded when seed is
+        None.
+        """
+        return np.random.default_rng(seed)
+
+    @staticmethod
+    def shuffled_orders(
+        deck: Tuple[str, ...], simulations: int, rng: np.random.Generator
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        Draws an independent uniform shuffle of the deck for every simulation.
+
+        Args:
+            deck: The deck as a tuple of card names.
+            simulations: The number of simulations.
+            rng: The random generator to draw from.
+
+        Returns:
+            Tuple[List[str], np.ndarray]: The distinct card names, and an
+                array of shape (simulations, len(deck)) holding the index into
+                those names of the card played at each position.
+        """
+        card_names = sorted(set(deck))
+        codes = np.array(
+            [card_names.index(card) for card in deck], dtype=np.int64
+        )
+        orders = rng.permuted(np.tile(codes, (simulations, 1)), axis=1)
+        return card_names, orders
+
+    @staticmethod
+    def random_is_yellow(
+        rng: np.random.Generator, simulations: int
+    ) -> np.ndarray:
+        """Draws one random color per simulation; True means yellow."""
+        return rng.random(simulations) < 0.5
+
+    @abstractmethod
+    def simulate(
+        self,
+        deck: Tuple[str, ...],
+        simulations: int,
+        rng: Optional[np.random.Generator] = None
+    ) -> np.ndarray:
+        """
+        Simulates a deck many times at once.
+
+        Args:
+            deck: The deck as a tuple of card names.
+            simulations: The number of simulations to run.
+            rng: The random generator to use; a fresh one when omitted.
+
+        Returns:
+            np.ndarray: The final `yellow * blue` score of every simulation.
+        """
+        pass
@@ -1,11 +1,74 @@
-import random
-from typing import Dict, Callable
+from collections import Counter
+from functools import partial
+from typing import Any, Dict, Callable, List, Optional, Tuple
 from .base_crafting import BaseCrafting, State
 
+
+class ForgingState(State):
+    """The state of a single forging run."""
+    __slots__ = (
+        'artisan_bonus', 'forge_expert_bonus', 'charge_count',
+        'first_forge_played', 'fe_played_count', 'reforge_bonus',
+        'multi_forge_triggers', 'artisan_cards_played_count',
+        'fireproof_helm_forge_count', 'temp_fireproof_helm_active',
+    )
+
+    def reset(self) -> None:
+        super().reset()
+        self.artisan_bonus = 0
+        self.forge_expert_bonus = 0
+        self.charge_count = False
+        self.first_forge_played = False
+        self.fe_played_count = 0
+        self.reforge_bonus = 0
+        self.multi_forge_triggers = 0
+        self.artisan_cards_played_count = 0
+        self.fireproof_helm_forge_count = 0
+        self.temp_fireproof_helm_active = False
+
+
 class ForgingCrafting(BaseCrafting):
     """
     Implements the logic for the 'forging' crafting type.
     """
+    state_class = ForgingState
+    _dispatch_attributes = BaseCrafting._dispatch_attributes + (
+        '_item_forge_expert_trigger',
+    )
+
+    def __init__(self, card_definitions: List[Dict[str, Any]]) -> None:
+        super().__init__(card_definitions)
+        self._artisan_cards = {
+            card['card_name'] for card in card_definitions
+            if card.get('attribute') == 'Artisan'
+        }
+
+    def set_active_buff(self, buff_id: Optional[str]) -> None:
+        """Resolves the forging item buffs into flags once."""
+        super().set_active_buff(buff_id)
+        self.has_extra_forge_expert_trigger = buff_id in (
+            "copper_stewpot_buff",
+            "firefang_sword_buff"
+        )
+        self.has_carve_box_buff = buff_id == "carve_box_buff"
+        self.has_fireproof_helm_buff = buff_id == "fireproof_helm_buff"
+        self.has_warm_stone_armor_buff = buff_id == "warm_stone_armor_buff"
+
+    def get_batch_engine(
+        self, active_buff_id: Optional[str] = None
+    ) -> Optional[Any]:
+        """Returns the vectorized NumPy engine for forging."""
+        from .forging_batch import ForgingBatchEngine
+        return ForgingBatchEngine(self, active_buff_id)
+
+    def _build_card_functions(self) -> None:
+        """Also builds the Copper Stewpot's extra Forge Expert trigger."""
+        super()._build_card_functions()
+        trigger = partial(self._forge_expert_trigger, is_base_trigger=False)
+        if self.profiler is not None:
+            trigger = self._timed(('card', 'Forge Expert (item trigger)'),
+                                  trigger)
+        self._item_forge_expert_trigger = trigger
 
     def get_card_functions(self) -> Dict[str, Callable[[State], State]]:
         """
@@ -25,24 +88,54 @@ class ForgingCrafting(BaseCrafting):
     # --- Wrapped Artisan Methods ---
 
     def _wrapped_forge_expert(self, state: State) -> State:
-        state['artisan_cards_played_count'] = state.get('artisan_cards_played_count', 0) + 1
+        state.artisan_cards_played_count += 1
         return self.forge_expert(state)
 
     def _wrapped_forge(self, state: State) -> State:
-        state['artisan_cards_played_count'] = state.get('artisan_cards_played_count', 0) + 1
+        state.artisan_cards_played_count += 1
         
-        if state.get('fireproof_helm_buff', False):
-            state['fireproof_helm_forge_count'] = state.get('fireproof_helm_forge_count', 0)
-            if state['fireproof_helm_forge_count'] < 3:
-                state['temp_fireproof_helm_active'] = True
-                state['fireproof_helm_forge_count'] += 1
+        if (
+            self.has_fireproof_helm_buff
+            and state.fireproof_helm_forge_count < 3
+        ):
+            state.temp_fireproof_helm_active = True
+            state.fireproof_helm_forge_count += 1
 
         state = self.forge(state)
-        state.pop('temp_fireproof_helm_active', None)
+        state.temp_fireproof_helm_active = False
         return state
 
     # --- Card Function Implementations ---
 
+    def _forge_expert_trigger(
+        self, state: State, is_base_trigger: bool
+    ) -> None:
+        """
+        Core logic for a single Forge Expert trigger.
+        - is_base_trigger: Determines if this trigger is from the card
+                           itself or from an item like Copper Stewpot.
+        """
+        # Read the most current bonus values from the state.
+        bonus = 5 + state.artisan_bonus + state.forge_expert_bonus
+
+        # Apply the bonus score.
+        if state.charge_count:
+            state.yellow += bonus
+            state.blue += bonus
+        else:
+            color = self._get_random_color()
+            state[color] += bonus
+        
+        # Apply the Reforge bonus if active
+        reforge_bonus = state.reforge_bonus
+        if reforge_bonus:
+            state.yellow += reforge_bonus
+            state.blue += reforge_bonus
+
+        # CRUCIAL: The bonus pool is only updated by a card's base trigger.
+        if is_base_trigger:
+            state.forge_expert_bonus = 5 * state.fe_played_count
+
     def forge_expert(self, state: State) -> State:
         """
         Applies a bonus and updates the bonus pool using a complex compounding
@@ -50,47 +143,17 @@ class ForgingCrafting(BaseCrafting):
         - The bonus pool is only updated by base triggers, not item triggers.
         """
         # This card is being played, so increment the count for this run.
-        state['fe_played_count'] += 1
-        fe_played_count = state['fe_played_count']
-
-        def _trigger_effect(is_base_trigger: bool):
-            """
-            Core logic for a single trigger.
-            - is_base_trigger: Determines if this trigger is from the card
-                               itself or from an item like Copper Stewpot.
-            """
-            # Read the most current bonus values from the state.
-            artisan_bonus = state.get('artisan_bonus', 0)
-            forge_expert_bonus = state.get('forge_expert_bonus', 0)
-            bonus = 5 + artisan_bonus + forge_expert_bonus
-
-            # Apply the bonus score.
-            if state.get('charge_count', False):
-                state['yellow'] += bonus
-                state['blue'] += bonus
-            else:
-                color = self._get_random_color()
-                state[color] += bonus
-            
-            # Apply the Reforge bonus if active
-            reforge_bonus = state.get('reforge_bonus', False)
-            if reforge_bonus:
-                state['yellow'] += reforge_bonus
-                state['blue'] += reforge_bonus
-
-            # CRUCIAL: The bonus pool is only updated by a card's base trigger.
-            if is_base_trigger:
-                state['forge_expert_bonus'] = (5 * fe_played_count)
+        state.fe_played_count += 1
 
         # --- Main Execution ---
         # The first trigger is always a base trigger.
-        _trigger_effect(is_base_trigger=True)
+        self._forge_expert_trigger(state, is_base_trigger=True)
 
         # Check for the Copper Stewpot buff for a chance to trigger again.
         # This trigger is NOT a base trigger and will not update the bonus pool.
-        if state.get('copper_stewpot_buff', False) or state.get('firefang_sword_buff', False):
-            if random.random() < 0.30:
-                _trigger_effect(is_base_trigger=False)
+        if self.has_extra_forge_expert_trigger:
+            if self._random_chance(0.30):
+                self._item_forge_expert_trigger(state)
         
         return state
 
@@ -102,38 +165,35 @@ class ForgingCrafting(BaseCrafting):
         - The first 3 Forge cards are affected by the 'Fireproof Helm' buff.
         """
         # If Fireproof Helm buff is active for this specific Forge card
-        if state.get('temp_fireproof_helm_active', False):
-            artisan_bonus = state.get('artisan_bonus', 0)
-            bonus = 10 + artisan_bonus
-            state['yellow'] += bonus
-            state['blue'] += bonus
+        if state.temp_fireproof_helm_active:
+            bonus = 10 + state.artisan_bonus
+            state.yellow += bonus
+            state.blue += bonus
             # Apply the Reforge bonus if active
-            reforge_bonus = state.get('reforge_bonus', False)
+            reforge_bonus = state.reforge_bonus
             if reforge_bonus:
-                state['yellow'] += reforge_bonus
-                state['blue'] += reforge_bonus
-            state['first_forge_played'] = True # Mark as played for other buffs that check this
+                state.yellow += reforge_bonus
+                state.blue += reforge_bonus
+            # Mark as played for other buffs that check this
+            state.first_forge_played = True
             return state
 
         # Apply the Reforge bonus if active
-        reforge_bonus = state.get('reforge_bonus', False)
+        reforge_bonus = state.reforge_bonus
         if reforge_bonus:
-            state['yellow'] += reforge_bonus
-            state['blue'] += reforge_bonus
+            state.yellow += reforge_bonus
+            state.blue += reforge_bonus
             
-        artisan_bonus = state.get('artisan_bonus', 0)
-        bonus = 10 + artisan_bonus
+        bonus = 10 + state.artisan_bonus
 
         # Check for the Carve Box buff, which affects the first Forge card
-        is_first_forge = not state.get('first_forge_played', False)
-        if state.get('carve_box_buff', False) and is_first_forge:
-            state['yellow'] += bonus
-            state['blue'] += bonus
-            state['first_forge_played'] = True
+        if self.has_carve_box_buff and not state.first_forge_played:
+            state.yellow += bonus
+            state.blue += bonus
         # Check for a standard charge
-        elif state.get('charge_count', False):
-            state['yellow'] += bonus
-            state['blue'] += bonus
+        elif state.charge_count:
+            state.yellow += bonus
+            state.blue += bonus
             
         # Default action
         else:
@@ -141,7 +201,7 @@ class ForgingCrafting(BaseCrafting):
             state[color] += bonus
         
         # Mark that a forge card has now been played
-        state['first_forge_played'] = True
+        state.first_forge_played = True
         return state
 
     def ignite(self, state: State) -> State:
@@ -156,27 +216,26 @@ class ForgingCrafting(BaseCrafting):
         """
         All future cards with attribute Artisan gain +10.
         """
-        state['artisan_bonus'] = state.get('artisan_bonus', 0) + 10
+        state.artisan_bonus += 10
         return state
 
     def charge(self, state: State) -> State:
         """
         Increments the charge counter for future Artisan cards.
         """
-        state['charge_count'] = True
+        state.charge_count = True
         return state
 
     def multi_forge(self, state: State) -> State:
         """Next card x1 with Artisan attribute with trigger extra 2 times"""
-        state['multi_forge_triggers'] = state.get(
-            'multi_forge_triggers', 0) + 2
+        state.multi_forge_triggers += 2
         return state
 
     def reforge(self, state: State) -> State:
         """
         All future Artisan cards grant +3 to both colors. This effect stacks.
         """
-        state['reforge_bonus'] = state.get('reforge_bonus', 0) + 3
+        state.reforge_bonus += 3
         return state
 
     def play_card(self, card_name: str, state: State) -> State:
@@ -184,22 +243,19 @@ class ForgingCrafting(BaseCrafting):
         Overrides the base play_card to handle the Multi Forge interaction
         with Artisan cards.
         """
-        func = self.get_card_functions().get(card_name)
+        func = self._card_functions.get(card_name)
         if not func:
             return state
 
-        card_def = next((c for c in self._card_definitions if c['card_name'] == card_name), None)
-        
-        if state.get('multi_forge_triggers', 0) > 0 and card_def and card_def.get('attribute') == 'Artisan':
+        if state.multi_forge_triggers > 0 and card_name in self._artisan_cards:
             # Trigger the card the initial time
             func(state)
-            state['mf_triggering'] = True 
             # Trigger it the extra times
-            for _ in range(state['multi_forge_triggers']):
-                func(state)
+            retrigger = self._retrigger_functions[card_name]
+            for _ in range(state.multi_forge_triggers):
+                retrigger(state)
             # Deactivate the buff
-            state['multi_forge_triggers'] = 0
-            state['mf_triggering'] = False
+            state.multi_forge_triggers = 0
 
         else:
             func(state)
@@ -210,7 +266,64 @@ class ForgingCrafting(BaseCrafting):
         """
         Applies end-of-cycle effects for the Forging crafting type.
         """
-        if state.get('warm_stone_armor_buff') and state.get('artisan_cards_played_count', 0) >= 6:
-            state['yellow'] += 3
-            state['blue'] += 3
+        if (
+            self.has_warm_stone_armor_buff
+            and state.artisan_cards_played_count >= 6
+        ):
+            state.yellow += 3
+            state.blue += 3
         return state
+
+    def optimistic_upper_bound(self, deck: Tuple[str, ...]) -> Optional[float]:
+        """
+        Bounds the score as if every Heat Up and Reforge came before every
+        Artisan card and every Artisan trigger hit both colors whenever the
+        deck can make it do so (Charge, Carve Box, Fireproof Helm). Copper
+        Stewpot's extra trigger always fires, and the Multi Forge re-triggers
+        go to whichever Artisan card they are worth the most on.
+        """
+        counts = Counter(deck)
+        artisan_bonus = 10 * counts['Heat Up']
+        reforge_points = 2 * 3 * counts['Reforge']
+        expert_colors = 2 if counts['Charge'] else 1
+        forges_both_colors = (
+            counts['Charge']
+            or self.has_carve_box_buff
+            or self.has_fireproof_helm_buff
+        )
+        forge_colors = 2 if forges_both_colors else 1
+        forge_points = forge_colors * (10 + artisan_bonus) + reforge_points
+
+        def forge_expert_points(plays: int) -> float:
+            """The most points of the first `plays` Forge Expert triggers."""
+            points = 0.0
+            for play in range(1, plays + 1):
+                # Each play's bonus pool holds 5 per earlier play; the
+                # Stewpot trigger comes after the pool grew.
+                points += (
+                    expert_colors * (5 + artisan_bonus + 5 * (play - 1))
+                    + reforge_points
+                )
+                if self.has_extra_forge_expert_trigger:
+                    points += (
+                        expert_colors * (5 + artisan_bonus + 5 * play)
+                        + reforge_points
+                    )
+            return points
+
+        extra_triggers = (
+            2 * counts['Multi Forge']
+            if counts['Forge Expert'] or counts['Forge']
+            else 0
+        )
+        best_artisan_points = max(
+            forge_expert_points(counts['Forge Expert'] + to_experts)
+            + (counts['Forge'] + extra_triggers - to_experts) * forge_points
+            for to_experts in range(extra_triggers + 1)
+            if (to_experts == 0 or counts['Forge Expert'])
+            and (to_experts == extra_triggers or counts['Forge'])
+        )
+        points = 2 + best_artisan_points
+        if self.has_warm_stone_armor_buff:
+            points += 6
+        return self._score_bound(points, counts['Ignite'])
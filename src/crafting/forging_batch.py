@@ -0,0 +1,183 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .batch_engine import BatchEngine
+
+# Chance for Copper Stewpot / Firefang Sword to trigger Forge Expert again.
+FORGE_EXPERT_EXTRA_TRIGGER_CHANCE = 0.30
+
+
+class ForgingBatchEngine(BatchEngine):
+    """
+    Vectorized version of `ForgingCrafting`.
+
+    Every piece of forging state is an array over all simulations. Multi Forge
+    re-triggers are replayed as masked repeat steps: on the k-th repeat only
+    the simulations with at least k pending re-triggers are active.
+    """
+    def simulate(
+        self,
+        deck: Tuple[str, ...],
+        simulations: int,
+        rng: Optional[np.random.Generator] = None
+    ) -> np.ndarray:
+        """Simulates a forging deck; see `BatchEngine.simulate`."""
+        rng = rng if rng is not None else np.random.default_rng()
+        card_names, orders = self.shuffled_orders(deck, simulations, rng)
+        batch = _ForgingBatch(simulations, rng, self.active_buff_id)
+
+        artisan_cards = {
+            card['card_name'] for card in self.crafting._card_definitions
+            if card.get('attribute') == 'Artisan'
+        }
+        card_actions = {
+            "Forge Expert": batch.forge_expert,
+            "Forge": batch.forge,
+            "Ignite": batch.ignite,
+            "Heat Up": batch.heat_up,
+            "Charge": batch.charge,
+            "Multi Forge": batch.multi_forge,
+            "Reforge": batch.reforge,
+        }
+
+        for position in range(len(deck)):
+            played = orders[:, position]
+            for code, card_name in enumerate(card_names):
+                action = card_actions.get(card_name)
+                if action is None:
+                    continue
+                mask = played == code
+                if not mask.any():
+                    continue
+
+                if card_name in artisan_cards:
+                    # The initial trigger plus one masked step per
+                    # pending Multi Forge re-trigger.
+                    repeats = np.where(mask, batch.multi_forge_triggers, 0)
+                    for step in range(int(repeats.max()) + 1):
+                        action(mask & (repeats >= step))
+                    batch.multi_forge_triggers[mask] = 0
+                else:
+                    action(mask)
+
+        # End-of-cycle effects
+        if self.has_buff("warm_stone_armor_buff"):
+            enough_artisans = batch.artisan_cards_played_count >= 6
+            batch.yellow += 3 * enough_artisans
+            batch.blue += 3 * enough_artisans
+
+        return batch.yellow * batch.blue
+
+
+class _ForgingBatch:
+    """The forging state of every simulation in one batch, held as arrays."""
+    def __init__(
+        self,
+        simulations: int,
+        rng: np.random.Generator,
+        active_buff_id: Optional[str]
+    ) -> None:
+        self.rng = rng
+        self.simulations = simulations
+        self.active_buff_id = active_buff_id
+        self.yellow = np.ones(simulations, dtype=np.int64)
+        self.blue = np.ones(simulations, dtype=np.int64)
+        self.artisan_bonus = np.zeros(simulations, dtype=np.int64)
+        self.forge_expert_bonus = np.zeros(simulations, dtype=np.int64)
+        self.reforge_bonus = np.zeros(simulations, dtype=np.int64)
+        self.fe_played_count = np.zeros(simulations, dtype=np.int64)
+        self.multi_forge_triggers = np.zeros(simulations, dtype=np.int64)
+        self.artisan_cards_played_count = np.zeros(simulations, dtype=np.int64)
+        self.fireproof_helm_forge_count = np.zeros(simulations, dtype=np.int64)
+        self.charged = np.zeros(simulations, dtype=bool)
+        self.first_forge_played = np.zeros(simulations, dtype=bool)
+
+    # --- Array Helpers ---
+
+    def _add_bonus(
+        self, active: np.ndarray, bonus: np.ndarray, both_colors: np.ndarray
+    ) -> None:
+        """
+        Adds the bonus to both colors where requested, else to a random
+        one.
+        """
+        to_yellow = BatchEngine.random_is_yellow(self.rng, self.simulations)
+        single = active & ~both_colors
+        both = active & both_colors
+        self.yellow += bonus * (both | (single & to_yellow))
+        self.blue += bonus * (both | (single & ~to_yellow))
+
+    def _add_reforge_bonus(self, active: np.ndarray) -> None:
+        self.yellow += self.reforge_bonus * active
+        self.blue += self.reforge_bonus * active
+
+    # --- Card Implementations ---
+
+    def forge_expert(self, active: np.ndarray) -> None:
+        self.artisan_cards_played_count += active
+        self.fe_played_count += active
+
+        # Base trigger; it is the only one that updates the bonus pool.
+        self._add_bonus(
+            active,
+            5 + self.artisan_bonus + self.forge_expert_bonus,
+            self.charged
+        )
+        self._add_reforge_bonus(active)
+        self.forge_expert_bonus = np.where(
+            active, 5 * self.fe_played_count, self.forge_expert_bonus
+        )
+
+        if self.active_buff_id in (
+            "copper_stewpot_buff",
+            "firefang_sword_buff"
+        ):
+            extra = active & (
+                self.rng.random(self.simulations)
+                < FORGE_EXPERT_EXTRA_TRIGGER_CHANCE
+            )
+            self._add_bonus(
+                extra,
+                5 + self.artisan_bonus + self.forge_expert_bonus,
+                self.charged
+            )
+            self._add_reforge_bonus(extra)
+
+    def forge(self, active: np.ndarray) -> None:
+        self.artisan_cards_played_count += active
+        bonus = 10 + self.artisan_bonus
+
+        # The first three Forge triggers under Fireproof Helm hit both colors.
+        helm = np.zeros(self.simulations, dtype=bool)
+        if self.active_buff_id == "fireproof_helm_buff":
+            helm = active & (self.fireproof_helm_forge_count < 3)
+            self.fireproof_helm_forge_count += helm
+
+        # Carve Box makes the first Forge hit both colors.
+        carve_box = np.zeros(self.simulations, dtype=bool)
+        if self.active_buff_id == "carve_box_buff":
+            carve_box = ~self.first_forge_played
+
+        self._add_reforge_bonus(active)
+        self._add_bonus(active, bonus, helm | carve_box | self.charged)
+        self.first_forge_played |= active
+
+    def ignite(self, active: np.ndarray) -> None:
+        to_yellow = BatchEngine.random_is_yellow(self.rng, self.simulations)
+        self.yellow = np.where(
+            active & to_yellow, self.yellow * 2, self.yellow
+        )
+        self.blue = np.where(active & ~to_yellow, self.blue * 2, self.blue)
+
+    def heat_up(self, active: np.ndarray) -> None:
+        self.artisan_bonus += 10 * active
+
+    def charge(self, active: np.ndarray) -> None:
+        self.charged |= active
+
+    def multi_forge(self, active: np.ndarray) -> None:
+        self.multi_forge_triggers += 2 * active
+
+    def reforge(self, active: np.ndarray) -> None:
+        self.reforge_bonus += 3 * active
@@ -1,11 +1,62 @@
-import random
-from typing import Dict, Callable
+from collections import Counter
+from typing import Any, Dict, Callable, List, Optional, Tuple
 from .base_crafting import BaseCrafting, State
 
+# The chance of each Heat Control re-trigger; cards.json only sets its
+# `max_attempts` cap. A fixed chance keeps runs independent, which the
+# exact and numpy engines rely on.
+HEAT_CONTROL_RETRIGGER_CHANCE = 0.45
+
+
+class KitchenState(State):
+    """The state of a single kitchen run."""
+    __slots__ = (
+        'slow_cook_all_color_bonus',
+        'ferment_buff_active',
+        'heat_control_trigger_count'
+    )
+
+    def reset(self) -> None:
+        super().reset()
+        self.slow_cook_all_color_bonus = 0
+        self.ferment_buff_active = False
+        self.heat_control_trigger_count = 0
+
+
 class KitchenCrafting(BaseCrafting):
     """
     Implements the logic for the 'Kitchen' crafting type.
     """
+    state_class = KitchenState
+
+    def __init__(self, card_definitions: List[Dict[str, Any]]) -> None:
+        super().__init__(card_definitions)
+        # Card parameters read once from cards.json instead of on every play.
+        heat_control_def = next(
+            (c for c in card_definitions if c['card_name'] == 'Heat Control'),
+            {}
+        )
+        prd_config = heat_control_def.get('prd_config', {})
+        self._max_retriggers = prd_config.get('max_attempts', 10)
+        cut_def = next(
+            (c for c in card_definitions if c['card_name'] == 'Cut'), {}
+        )
+        self._cut_range = tuple(cut_def.get('value_range', (4, 8)))
+
+    def set_active_buff(self, buff_id: Optional[str]) -> None:
+        """Resolves the kitchen item buffs into flags once."""
+        super().set_active_buff(buff_id)
+        self.has_salted_raisin_buff = buff_id == "salted_raisin_buff"
+        self.has_dried_mushroom_buff = buff_id == "dried_mushroom_buff"
+        self.has_odd_sweet_buff = buff_id == "odd_sweet_buff"
+
+    def get_batch_engine(
+        self, active_buff_id: Optional[str] = None
+    ) -> Optional[Any]:
+        """Returns the vectorized NumPy engine for the kitchen."""
+        from .kitchen_batch import KitchenBatchEngine
+        return KitchenBatchEngine(self, active_buff_id)
+
     def get_card_functions(self) -> Dict[str, Callable[[State], State]]:
         """
         Maps Kitchen card names to their specific functions.
@@ -28,7 +79,7 @@ class KitchenCrafting(BaseCrafting):
         Activates the permanent Ferment buff, which guarantees an additional
         flip for all future Heat Control cards. Does not stack.
         """
-        state['ferment_buff_active'] = True
+        state.ferment_buff_active = True
         return state
 
     def heat_control(self, state: State) -> State:
@@ -37,66 +88,30 @@ class KitchenCrafting(BaseCrafting):
         set by Ferment cards. Each flip adds +3 to a random color and gets a
         bonus from Slow Cook.
         
-        After guaranteed flips, it may re-trigger additional random flips based
-        on a self-correcting PRD system.
+        After guaranteed flips, it re-triggers additional random flips with
+        `HEAT_CONTROL_RETRIGGER_CHANCE` each, up to `max_attempts` times.
         """
-        # --- 1. Get PRD Parameters and Persistent History ---
-        card_def = next((c for c in self._card_definitions if c['card_name'] == 'Heat Control'), {})
-        prd_config = card_def.get('prd_config', {})
-        
-        base_chance = prd_config.get('base_chance', 0.5)
-        target_average = prd_config.get('target_average', 1.0)
-        correction_factor = prd_config.get('correction_factor', 1.0)
-        max_attempts = prd_config.get('max_attempts', 10)
-
-        prd_history = state.get('prd_history', {'hc_plays': 0, 'hc_successes': 0})
-        
-        # --- 2. Calculate the Adjusted Chance for this Card Play ---
-        current_plays = prd_history.get('hc_plays', 0)
-        current_successes = prd_history.get('hc_successes', 0)
-
-        if current_plays > 0:
-            current_average = current_successes / current_plays
-            deviation = current_average - target_average
-            adjusted_chance = base_chance - (deviation * correction_factor)
-        else:
-            adjusted_chance = base_chance
-            
-        adjusted_chance = max(0.05, min(0.95, adjusted_chance))
-
-        # --- 3. Execute the Card's Core Logic ---
-        all_color_bonus = state.get('slow_cook_all_color_bonus', 0)
-        successes_this_card = 0
-
-        def _trigger_flip():
-            """Applies the bonus to both colors and the base effect to one."""
-            state['yellow'] += all_color_bonus
-            state['blue'] += all_color_bonus
-            color = self._get_random_color()
-            state[color] += 12  # Base effect of +12 to a random color
-
-        # --- 4. Perform Base and Guaranteed Flips ---
-        # Heat Control always gets one base flip.
-        _trigger_flip()
-        successes_this_card += 1
-
-        # It gets a second, guaranteed 2 flip if the Ferment buff is active.
-        if state.get('ferment_buff_active', False):
-            _trigger_flip()
-            _trigger_flip()
-
-        # --- 5. Perform Additional Random Flips via PRD ---
-        for _ in range(max_attempts):
-            if random.random() < 0.45:
-                successes_this_card += 1
-                _trigger_flip()
-            else:
-                break
-        
-        # --- 6. Update the Persistent History ---
-        prd_history['hc_plays'] = current_plays + 1
-        prd_history['hc_successes'] = current_successes + successes_this_card
-        state['heat_control_trigger_count'] += successes_this_card
+        all_color_bonus = state.slow_cook_all_color_bonus
+
+        # --- 1. Count the Base, Guaranteed and Random Flips ---
+        # Heat Control always gets one base flip, two guaranteed flips if the
+        # Ferment buff is active, then re-triggers until the first miss,
+        # capped at max_attempts. The re-trigger count and the colors the
+        # flips land on are drawn from their distributions directly instead
+        # of flip by flip.
+        retriggers = self._random_streak(
+            HEAT_CONTROL_RETRIGGER_CHANCE, self._max_retriggers
+        )
+        successes_this_card = 1 + retriggers
+        flips = successes_this_card + (2 if state.ferment_buff_active else 0)
+
+        # --- 2. Apply the Flips ---
+        # Each flip adds the Slow Cook bonus to both colors and +12 to a
+        # random one.
+        yellow_flips = self._random_count(flips, 0.5)
+        state.yellow += flips * all_color_bonus + 12 * yellow_flips
+        state.blue += flips * all_color_bonus + 12 * (flips - yellow_flips)
+        state.heat_control_trigger_count += successes_this_card
         
         return state
 
@@ -105,21 +120,14 @@ class KitchenCrafting(BaseCrafting):
         Adds a bonus to a random color based on the 'Cut' card's defined
         value_range in cards.json.
         """
-        card_def = next(
-            (card for card in self._card_definitions if card['card_name'] == 'Cut'),
-            None
-        )
-        
-        min_val, max_val = (4, 8)
-        if card_def and 'value_range' in card_def:
-            min_val, max_val = card_def['value_range']
+        min_val, max_val = self._cut_range
 
         color = self._get_random_color()
         
-        if state.get('salted_raisin_buff', False):
+        if self.has_salted_raisin_buff:
             bonus = max_val
         else:
-            bonus = random.randint(min_val, max_val)
+            bonus = self._random_int(min_val, max_val)
             
         state[color] += bonus
         return state
@@ -137,7 +145,7 @@ class KitchenCrafting(BaseCrafting):
         Adds +2 to the bonus that all future Heat Control flips will receive
         for both colors. This effect stacks.
         """
-        state['slow_cook_all_color_bonus'] = state.get('slow_cook_all_color_bonus', 0) + 4
+        state.slow_cook_all_color_bonus += 4
         return state
 
     def apply_end_of_cycle_effects(self, state: State, deck: tuple[str, ...]) -> State:
@@ -145,24 +153,52 @@ class KitchenCrafting(BaseCrafting):
         Applies end-of-cycle effects for the Kitchen crafting type.
         """
         if "Bake" in deck:
-            yellow_score = state['yellow']
-            blue_score = state['blue']
+            yellow_score = state.yellow
+            blue_score = state.blue
             
             difference = abs(yellow_score - blue_score)
             adjustment = difference / 2
             
             if yellow_score > blue_score:
-                state['yellow'] -= adjustment
-                state['blue'] += adjustment
+                state.yellow -= adjustment
+                state.blue += adjustment
             else:
-                state['yellow'] += adjustment
-                state['blue'] -= adjustment
-
-        if state.get('dried_mushroom_buff') and state.get('heat_control_trigger_count', 0) >= 7:
-            state['yellow'] += 3
-            state['blue'] += 3
+                state.yellow += adjustment
+                state.blue -= adjustment
+
+        if (
+            self.has_dried_mushroom_buff
+            and state.heat_control_trigger_count >= 7
+        ):
+            state.yellow += 3
+            state.blue += 3
+
+        if self.has_odd_sweet_buff and abs(state.yellow - state.blue) < 5:
+            state.yellow += 5
+            state.blue += 5
+        return state
 
-        if state.get('odd_sweet_buff') and abs(state['yellow'] - state['blue']) < 5:
-            state['yellow'] += 5
-            state['blue'] += 5
-        return state
\ No newline at end of file
+    def optimistic_upper_bound(self, deck: Tuple[str, ...]) -> Optional[float]:
+        """
+        Bounds the score as if every Slow Cook and Ferment came before every
+        Heat Control, every Heat Control re-triggered the most times allowed
+        and every Cut rolled its highest value. Bake moves points between
+        colors at the end, so with Bake only the total is bounded.
+        """
+        counts = Counter(deck)
+        flips_per_heat_control = (
+            1 + (2 if counts['Ferment'] else 0) + self._max_retriggers
+        )
+        points_per_flip = 2 * 4 * counts['Slow Cook'] + 12
+        points = (
+            2
+            + counts['Heat Control'] * flips_per_heat_control * points_per_flip
+        )
+        points += counts['Cut'] * self._cut_range[1]
+        if self.has_dried_mushroom_buff:
+            points += 6
+        if self.has_odd_sweet_buff:
+            points += 10
+        return self._score_bound(
+            points, counts['Season'], redistributes='Bake' in counts
+        )
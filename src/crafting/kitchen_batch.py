@@ -0,0 +1,99 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .base_crafting import BaseCrafting
+from .batch_engine import BatchEngine
+from .kitchen import HEAT_CONTROL_RETRIGGER_CHANCE
+
+
+class KitchenBatchEngine(BatchEngine):
+    """
+    Vectorized version of `KitchenCrafting`.
+
+    Heat Control re-triggers are drawn for every simulation at once as
+    truncated geometric counts, and the random color of each flip collapses
+    into a single binomial draw, so a play costs a handful of array
+    operations however many times it flips.
+    """
+    def __init__(
+        self, crafting: BaseCrafting, active_buff_id: Optional[str] = None
+    ) -> None:
+        super().__init__(crafting, active_buff_id)
+        prd_config = self.card_definition("Heat Control").get('prd_config', {})
+        self.max_attempts = prd_config.get('max_attempts', 10)
+        self.cut_range = tuple(
+            self.card_definition("Cut").get('value_range', (4, 8))
+        )
+
+    def simulate(
+        self,
+        deck: Tuple[str, ...],
+        simulations: int,
+        rng: Optional[np.random.Generator] = None
+    ) -> np.ndarray:
+        """Simulates a kitchen deck; see `BatchEngine.simulate`."""
+        rng = rng if rng is not None else np.random.default_rng()
+        card_names, orders = self.shuffled_orders(deck, simulations, rng)
+
+        yellow = np.ones(simulations, dtype=np.int64)
+        blue = np.ones(simulations, dtype=np.int64)
+        slow_cook_bonus = np.zeros(simulations, dtype=np.int64)
+        ferment_active = np.zeros(simulations, dtype=bool)
+        heat_control_triggers = np.zeros(simulations, dtype=np.int64)
+
+        for position in range(len(deck)):
+            played = orders[:, position]
+            for code, card_name in enumerate(card_names):
+                mask = played == code
+                if not mask.any():
+                    continue
+
+                if card_name == "Heat Control":
+                    # Re-triggers until the first miss, capped at max_attempts.
+                    miss_chance = 1 - HEAT_CONTROL_RETRIGGER_CHANCE
+                    streaks = rng.geometric(miss_chance, simulations) - 1
+                    retriggers = np.minimum(streaks, self.max_attempts)
+                    # One base flip, two guaranteed Ferment flips, then
+                    # the re-triggers.
+                    flips = (1 + 2 * ferment_active + retriggers) * mask
+                    yellow_flips = rng.binomial(flips, 0.5)
+                    yellow += flips * slow_cook_bonus + 12 * yellow_flips
+                    blue += (
+                        flips * slow_cook_bonus + 12 * (flips - yellow_flips)
+                    )
+                    heat_control_triggers += (1 + retriggers) * mask
+                elif card_name == "Cut":
+                    min_val, max_val = self.cut_range
+                    if self.has_buff("salted_raisin_buff"):
+                        bonus = np.full(simulations, max_val, dtype=np.int64)
+                    else:
+                        bonus = rng.integers(min_val, max_val + 1, simulations)
+                    to_yellow = self.random_is_yellow(rng, simulations)
+                    yellow += bonus * (mask & to_yellow)
+                    blue += bonus * (mask & ~to_yellow)
+                elif card_name == "Season":
+                    to_yellow = self.random_is_yellow(rng, simulations)
+                    yellow = np.where(mask & to_yellow, yellow * 2, yellow)
+                    blue = np.where(mask & ~to_yellow, blue * 2, blue)
+                elif card_name == "Slow Cook":
+                    slow_cook_bonus += 4 * mask
+                elif card_name == "Ferment":
+                    ferment_active |= mask
+
+        # End-of-cycle effects
+        if "Bake" in deck:
+            # Bake redistributes the gap, leaving both colors at their mean.
+            yellow = blue = (yellow + blue) / 2
+
+        if self.has_buff("dried_mushroom_buff"):
+            enough_triggers = heat_control_triggers >= 7
+            yellow = yellow + 3 * enough_triggers
+            blue = blue + 3 * enough_triggers
+
+        if self.has_buff("odd_sweet_buff"):
+            close_gap = np.abs(yellow - blue) < 5
+            yellow = yellow + 5 * close_gap
+            blue = blue + 5 * close_gap
+
+        return yellow * blue
@@ -0,0 +1,566 @@
+# Standard library imports
+import argparse
+import itertools
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from multiprocessing.managers import BaseManager, Server
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# How long a worker may go without a heartbeat before its tasks are re-queued.
+DEFAULT_LEASE_TIMEOUT = 30.0
+# How long a result may be waited for without a heartbeat from any worker.
+DEFAULT_WORKER_TIMEOUT = 120.0
+# The environment variable holding the shared secret, if --authkey is
+# not given.
+AUTHKEY_ENV_VAR = "AFK_DISTRIBUTED_AUTHKEY"
+
+# A task is (job id, task id, function, arguments).
+Task = Tuple[str, int, Callable[..., Any], Tuple[Any, ...]]
+
+
+class NoLiveWorkers(Exception):
+    """Raised when a result is awaited but no worker has been seen."""
+
+
+class WorkQueue:
+    """
+    The coordinator's queue of pool tasks, served to workers over TCP.
+
+    Workers lease a task, run it and report the result. A lease lasts
+    `lease_timeout` seconds and every heartbeat of its worker renews it; a
+    worker that dies (or loses its connection) stops sending heartbeats, so
+    its leases expire and the tasks go back to the front of the queue for
+    another worker. If the first worker was only slow, whichever result
+    arrives first is kept. Waiting for a result gives up after
+    `worker_timeout` seconds without a heartbeat from any worker, so a
+    run whose workers all died fails instead of hanging.
+
+    Tasks are grouped into jobs, one per `DistributedPool`: a job holds the
+    simulator its tasks run with, which each worker fetches once per job.
+    Every method is thread-safe, as the manager serves each connection on
+    its own thread. Once closed, the queue hands out no more tasks and
+    workers asking for one are told to stop.
+    """
+    def __init__(
+        self,
+        lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+        worker_timeout: float = DEFAULT_WORKER_TIMEOUT
+    ) -> None:
+        self.lease_timeout = lease_timeout
+        self.worker_timeout = worker_timeout
+        self._lock = threading.Condition()
+        self._closed = False
+        self._jobs: Dict[str, Any] = {}
+        self._pending: Deque[Task] = deque()
+        # task id -> (worker id, task, lease deadline)
+        self._leases: Dict[int, Tuple[str, Task, float]] = {}
+        # task id -> (succeeded, result or error text)
+        self._results: Dict[int, Tuple[bool, Any]] = {}
+        # worker id -> (processes, last heartbeat)
+        self._workers: Dict[str, Tuple[int, float]] = {}
+        self._task_ids = itertools.count()
+        self.requeued = 0
+
+    # --- Coordinator side ---
+
+    def add_job(self, job_id: str, simulator: Any) -> None:
+        with self._lock:
+            self._jobs[job_id] = simulator
+
+    def remove_job(self, job_id: str) -> None:
+        """Forgets a finished job, its queued tasks and any late results."""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._pending = deque(
+                task for task in self._pending if task[0] != job_id
+            )
+            for task_id, (_, task, _) in list(self._leases.items()):
+                if task[0] == job_id:
+                    del self._leases[task_id]
+
+    def submit(
+        self, job_id: str, func: Callable[..., Any], args: Tuple[Any, ...]
+    ) -> int:
+        """Queues a call of `func(*args)` and returns its task id."""
+        with self._lock:
+            task_id = next(self._task_ids)
+            self._pending.append((job_id, task_id, func, args))
+            self._lock.notify_all()
+            return task_id
+
+    def wait_result(self, task_id: int) -> Tuple[bool, Any]:
+        """
+        Blocks until a task has a result, re-queuing expired leases
+        meanwhile.
+
+        Raises:
+            NoLiveWorkers: If no worker sent a heartbeat during the last
+                `worker_timeout` seconds of the wait.
+        """
+        with self._lock:
+            waiting_since = time.monotonic()
+            while task_id not in self._results:
+                self._requeue_expired()
+                last_seen = max(
+                    [waiting_since]
+                    + [seen for _, seen in self._workers.values()]
+                )
+                if time.monotonic() - last_seen >= self.worker_timeout:
+                    raise NoLiveWorkers(
+                        "No worker has been seen for "
+                        f"{self.worker_timeout:.0f} seconds while tasks "
+                        "were pending; start workers with `python "
+                        "distributed.py worker`."
+                    )
+                self._lock.wait(timeout=1.0)
+            return self._results.pop(task_id)
+
+    def capacity(self) -> int:
+        """Returns how many worker processes are alive (at least 1)."""
+        with self._lock:
+            now = time.monotonic()
+            return max(1, sum(
+                processes for processes, last_seen in self._workers.values()
+                if now - last_seen < self.lease_timeout
+            ))
+
+    def close(self) -> None:
+        """Stops handing out tasks, so that every worker exits."""
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+
+    def _requeue_expired(self) -> None:
+        now = time.monotonic()
+        for task_id, (worker_id, task, deadline) in list(self._leases.items()):
+            if deadline < now:
+                del self._leases[task_id]
+                self._pending.appendleft(task)
+                self.requeued += 1
+                print(
+                    f"\nWorker {worker_id} stopped responding; re-queued its "
+                    "task."
+                )
+                self._lock.notify_all()
+
+    # --- Worker side (called through proxies) ---
+
+    def register_worker(self, worker_id: str, processes: int) -> float:
+        """Registers a worker process group and returns the lease timeout."""
+        with self._lock:
+            self._workers[worker_id] = (processes, time.monotonic())
+            return self.lease_timeout
+
+    def heartbeat(self, worker_id: str) -> None:
+        """Renews every lease held by a worker."""
+        with self._lock:
+            now = time.monotonic()
+            processes, _ = self._workers.get(worker_id, (1, now))
+            self._workers[worker_id] = (processes, now)
+            for task_id, (holder, task, _) in list(self._leases.items()):
+                if holder == worker_id:
+                    deadline = now + self.lease_timeout
+                    self._leases[task_id] = (holder, task, deadline)
+
+    def get_job(self, job_id: str) -> Any:
+        """Returns the simulator of a job, or None once the job is finished."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def lease(self, worker_id: str, wait: float = 1.0) -> Optional[Task]:
+        """
+        Hands out the next task, waiting up to `wait` seconds for one.
+
+        Raises:
+            EOFError: If the queue is closed; the worker should exit.
+        """
+        with self._lock:
+            deadline = time.monotonic() + wait
+            while True:
+                if self._closed:
+                    raise EOFError("The coordinator has shut down.")
+                self._requeue_expired()
+                if self._pending:
+                    task = self._pending.popleft()
+                    deadline = time.monotonic() + self.lease_timeout
+                    self._leases[task[1]] = (worker_id, task, deadline)
+                    return task
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._lock.wait(timeout=remaining)
+
+    def complete(
+        self, worker_id: str, task_id: int, succeeded: bool, result: Any
+    ) -> None:
+        """
+        Records a task's result; results of re-queued or finished tasks
+        are dropped.
+        """
+        with self._lock:
+            lease = self._leases.pop(task_id, None)
+            if lease is None:
+                # Re-queued after a missed heartbeat: keep the first result.
+                still_queued = [
+                    task for task in self._pending if task[1] == task_id
+                ]
+                if not still_queued:
+                    return
+                self._pending = deque(
+                    task for task in self._pending if task[1] != task_id
+                )
+            self._results[task_id] = (succeeded, result)
+            self._lock.notify_all()
+
+
+class _QueueServer(Server):
+    """
+    A manager server that can be stopped from its own process.
+
+    `Server.serve_forever` only stops on a remote shutdown request, and
+    on its way out it resets `sys.stdout` and raises `SystemExit`. This
+    server simply accepts connections until `stop_event` is set.
+    """
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stop_event = threading.Event()
+
+    def serve_forever(self) -> None:
+        while True:
+            try:
+                connection = self.listener.accept()
+            except OSError:
+                if self.stop_event.is_set():
+                    return
+                continue
+            if self.stop_event.is_set():
+                connection.close()
+                return
+            threading.Thread(
+                target=self.handle_request, args=(connection,), daemon=True
+            ).start()
+
+
+class _QueueManager(BaseManager):
+    """The manager exposing a coordinator's `WorkQueue` over TCP."""
+
+
+class _AsyncResult:
+    """
+    The `multiprocessing.pool.AsyncResult` counterpart of a distributed
+    task.
+    """
+    def __init__(self, work_queue: WorkQueue, task_id: int) -> None:
+        self._work_queue = work_queue
+        self._task_id = task_id
+
+    def get(self) -> Any:
+        succeeded, result = self._work_queue.wait_result(self._task_id)
+        if not succeeded:
+            raise RuntimeError(
+                f"A distributed task failed on its worker:\n{result}"
+            )
+        return result
+
+
+class DistributedPool:
+    """
+    A stand-in for `multiprocessing.Pool` that runs tasks on remote workers.
+
+    Only `apply_async` is supported, which is all `CardSimulator` uses.
+    Functions must be importable module-level functions (they are sent by
+    name) and run in a worker whose pool initializer received the
+    simulator, exactly like a local pool.
+    """
+    def __init__(
+        self,
+        coordinator: "Coordinator",
+        simulator: Any,
+        initializer: Callable[[Any], None]
+    ) -> None:
+        self._work_queue = coordinator.work_queue
+        self._job_id = uuid.uuid4().hex
+        self._work_queue.add_job(self._job_id, (initializer, simulator))
+
+    def apply_async(
+        self, func: Callable[..., Any], args: Tuple[Any, ...] = ()
+    ) -> _AsyncResult:
+        return _AsyncResult(
+            self._work_queue, self._work_queue.submit(self._job_id, func, args)
+        )
+
+    def __enter__(self) -> "DistributedPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._work_queue.remove_job(self._job_id)
+
+
+class Coordinator:
+    """
+    Serves pool tasks to workers on other machines (or local processes).
+
+    Pass it to `CardSimulator(coordinator=...)` and every process pool the
+    simulator would create becomes a `DistributedPool` instead. Workers are
+    started with `python distributed.py worker --connect HOST:PORT`.
+    """
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        authkey: bytes,
+        lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+        worker_timeout: float = DEFAULT_WORKER_TIMEOUT
+    ) -> None:
+        """
+        Starts serving on a background thread.
+
+        Args:
+            host: The interface to listen on, e.g. "0.0.0.0" for every one.
+            port: The TCP port; 0 picks a free one (see `address`).
+            authkey: The shared secret workers must present.
+            lease_timeout: Seconds without a heartbeat before a worker's
+                tasks are re-queued.
+            worker_timeout: Seconds without a heartbeat from any worker
+                before waiting for a result raises `NoLiveWorkers`.
+        """
+        self.work_queue = WorkQueue(lease_timeout, worker_timeout)
+        work_queue = self.work_queue
+        # `register` copies the registry into the class it is called on,
+        # so a manager class per coordinator keeps each one serving its
+        # own queue.
+        manager_class = type('_CoordinatorManager', (_QueueManager,), {})
+        manager_class.register('get_work_queue', callable=lambda: work_queue)
+        # What `manager_class.get_server` builds, but stoppable.
+        self._server = _QueueServer(
+            manager_class._registry, (host, port), authkey, 'pickle'
+        )
+        self.address: Tuple[str, int] = self._server.address
+        self._serving = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._serving.start()
+        self._local_workers: List[multiprocessing.Process] = []
+        self._closed = False
+
+    def make_pool(
+        self, simulator: Any, initializer: Callable[[Any], None]
+    ) -> DistributedPool:
+        """Creates a pool whose tasks run with `simulator` on the workers."""
+        return DistributedPool(self, simulator, initializer)
+
+    def capacity(self) -> int:
+        """Returns how many worker processes are connected."""
+        return self.work_queue.capacity()
+
+    def start_local_workers(self, count: int, authkey: bytes) -> None:
+        """
+        Starts `count` worker processes on this machine, e.g. for
+        testing.
+        """
+        host, port = self.address
+        connect_host = "127.0.0.1" if host in ("0.0.0.0", "") else host
+        for _ in range(count):
+            process = multiprocessing.Process(
+                target=run_worker,
+                args=(connect_host, port, authkey),
+                daemon=True
+            )
+            process.start()
+            self._local_workers.append(process)
+
+    def wait_for_workers(self, timeout: float = 10.0) -> int:
+        """
+        Waits up to `timeout` seconds for a first worker; returns the
+        capacity seen.
+        """
+        deadline = time.monotonic() + timeout
+        while not self.work_queue._workers and time.monotonic() < deadline:
+            time.sleep(0.1)
+        return self.capacity()
+
+    def close(self) -> None:
+        """
+        Shuts the coordinator down; calling it again does nothing.
+
+        Connected workers are told to exit on their next lease, the local
+        workers are stopped and the port is released.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self.work_queue.close()
+        for process in self._local_workers:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._server.stop_event.set()
+        # A blocked accept() does not notice its listener closing, so wake
+        # it with a connection that it will drop.
+        host, port = self.address
+        try:
+            socket.create_connection(
+                ("127.0.0.1" if host in ("0.0.0.0", "") else host, port),
+                timeout=1.0
+            ).close()
+        except OSError:
+            pass
+        self._server.listener.close()
+        self._serving.join(timeout=2.0)
+
+
+def _heartbeat_loop(
+    work_queue: Any, worker_id: str, interval: float, stop: threading.Event
+) -> None:
+    while not stop.wait(interval):
+        try:
+            work_queue.heartbeat(worker_id)
+        except (OSError, EOFError):
+            return
+
+
+def run_worker(host: str, port: int, authkey: bytes) -> None:
+    """
+    Runs one worker process until the coordinator goes away.
+
+    The worker leases tasks, builds each job's simulator once through the
+    job's pool initializer, runs the task and reports the result, while a
+    background thread keeps its leases alive.
+    """
+    _QueueManager.register('get_work_queue')
+    manager = _QueueManager(address=(host, port), authkey=authkey)
+    try:
+        manager.connect()
+    except (OSError, EOFError) as e:
+        print(
+            f"Error: Could not connect to the coordinator at {host}:{port} - "
+            f"{e}"
+        )
+        return
+    work_queue = manager.get_work_queue()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    lease_timeout = work_queue.register_worker(worker_id, 1)
+    stop = threading.Event()
+    threading.Thread(
+        target=_heartbeat_loop,
+        args=(work_queue, worker_id, lease_timeout / 3, stop),
+        daemon=True
+    ).start()
+
+    current_job: Optional[str] = None
+    try:
+        while True:
+            task = work_queue.lease(worker_id)
+            if task is None:
+                continue
+            job_id, task_id, func, args = task
+            if job_id != current_job:
+                job = work_queue.get_job(job_id)
+                if job is None:
+                    continue
+                initializer, simulator = job
+                initializer(simulator)
+                current_job = job_id
+            try:
+                work_queue.complete(worker_id, task_id, True, func(*args))
+            except (OSError, EOFError):
+                raise
+            except Exception:
+                work_queue.complete(
+                    worker_id, task_id, False, traceback.format_exc()
+                )
+    except (OSError, EOFError):
+        # The coordinator finished or went away.
+        pass
+    finally:
+        stop.set()
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """
+    Parses a HOST:PORT address.
+
+    Raises:
+        ValueError: If the address is not HOST:PORT with a numeric port.
+    """
+    host, separator, port = address.rpartition(":")
+    if not separator or not port.isdigit():
+        raise ValueError(f"Expected HOST:PORT, got '{address}'.")
+    return host or "127.0.0.1", int(port)
+
+
+def resolve_authkey(authkey: Optional[str]) -> Optional[bytes]:
+    """
+    Returns the shared secret from the argument or the environment, if
+    any.
+    """
+    authkey = authkey or os.environ.get(AUTHKEY_ENV_VAR)
+    return authkey.encode("utf-8") if authkey else None
+
+
+def main() -> None:
+    """Starts worker processes that evaluate decks for a coordinator."""
+    parser = argparse.ArgumentParser(
+        description=(
+            "Run deck evaluation workers for a main.py --coordinator run."
+        )
+    )
+    parser.add_argument("command", choices=["worker"], help="What to run.")
+    parser.add_argument(
+        "--connect",
+        type=str,
+        required=True,
+        help="The coordinator's HOST:PORT."
+    )
+    parser.add_argument(
+        "--authkey",
+        type=str,
+        default=None,
+        help=f"The coordinator's shared secret (default: ${AUTHKEY_ENV_VAR})."
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=multiprocessing.cpu_count(),
+        help="Worker processes to run on this machine."
+    )
+    args = parser.parse_args()
+
+    try:
+        host, port = parse_address(args.connect)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    authkey = resolve_authkey(args.authkey)
+    if authkey is None:
+        print(
+            f"Error: Pass --authkey or set {AUTHKEY_ENV_VAR} to the "
+            "coordinator's secret."
+        )
+        sys.exit(2)
+
+    print(f"Starting {args.processes} worker processes for {host}:{port}...")
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(host, port, authkey))
+        for _ in range(max(1, args.processes))
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("\nStopping workers.")
+    print("Coordinator finished; workers stopped.")
+
+
+if __name__ == "__main__":
+    main()
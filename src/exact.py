@@ -0,0 +1,241 @@
+# Standard library imports
+import copy
+import math
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+# Local application imports
+from crafting.base_crafting import BaseCrafting, State
+
+# How many card plays (random branches included) a single deck position may
+# expand, as a multiple of the state bound, before the deck is abandoned.
+EXPANSION_FACTOR = 5
+
+
+class StateSpaceExceeded(Exception):
+    """Raised when an exact evaluation grows beyond its configured bound."""
+
+
+class _ScriptedRandom:
+    """
+    Replays a fixed sequence of random outcomes and records new draw points.
+
+    Installed on a copy of a crafting instance in place of its random
+    helpers, so that a card function can be re-run once per combination of
+    outcomes (depth-first enumeration of its random branches).
+    """
+    def __init__(self) -> None:
+        self.script: List[int] = []
+        self.arities: List[int] = []
+        self.position = 0
+        self.probability = 1.0
+
+    def start_path(self) -> None:
+        self.position = 0
+        self.probability = 1.0
+
+    def next_path(self) -> bool:
+        """Advances the script to the next unexplored path; False when done."""
+        while self.script:
+            self.script[-1] += 1
+            if self.script[-1] < self.arities[-1]:
+                return True
+            self.script.pop()
+            self.arities.pop()
+        return False
+
+    def _draw(self, outcomes: List[Tuple[Any, float]]) -> Any:
+        if self.position == len(self.script):
+            self.script.append(0)
+            self.arities.append(len(outcomes))
+        value, probability = outcomes[self.script[self.position]]
+        self.position += 1
+        self.probability *= probability
+        return value
+
+    def random_color(self) -> str:
+        return self._draw([('yellow', 0.5), ('blue', 0.5)])
+
+    def random_chance(self, chance: float) -> bool:
+        if chance <= 0:
+            return False
+        if chance >= 1:
+            return True
+        return self._draw([(True, chance), (False, 1 - chance)])
+
+    def random_int(self, low: int, high: int) -> int:
+        width = high - low + 1
+        return self._draw(
+            [(value, 1 / width) for value in range(low, high + 1)]
+        )
+
+    def random_streak(self, chance: float, max_length: int) -> int:
+        if chance <= 0 or max_length <= 0:
+            return 0
+        if chance >= 1:
+            return max_length
+        # Truncated geometric: the capped streak takes the whole tail.
+        outcomes = [(k, chance ** k * (1 - chance)) for k in range(max_length)]
+        return self._draw(outcomes + [(max_length, chance ** max_length)])
+
+    def random_count(self, n: int, chance: float) -> int:
+        if n <= 0:
+            return 0
+        return self._draw(
+            [
+                (k, math.comb(n, k) * chance ** k * (1 - chance) ** (n - k))
+                for k in range(n + 1)
+            ]
+        )
+
+
+class ExactEvaluator:
+    """
+    Computes a deck's exact final score distribution.
+
+    The shuffle is a uniform permutation of the deck multiset, so the next
+    card is drawn with probability proportional to how many copies remain.
+    The evaluator walks the deck position by position with dynamic
+    programming over (remaining cards, state), expanding every random branch
+    of each card play and merging identical states by summing their
+    probabilities.
+    """
+    def __init__(
+        self, crafting: BaseCrafting, max_states: int = 20000
+    ) -> None:
+        """
+        Initializes the evaluator.
+
+        Args:
+            crafting: The crafting instance whose card functions to evaluate.
+            max_states: The most distinct states allowed at any deck position
+                before giving up with `StateSpaceExceeded`. Expanding a
+                position may run at most `EXPANSION_FACTOR` times as many
+                card plays.
+        """
+        self.max_states = max_states
+        self.expansions_left = 0
+        self.random = _ScriptedRandom()
+        # Work on a copy so the shared instance keeps its real random helpers.
+        self.crafting = copy.copy(crafting)
+        self.crafting._get_random_color = self.random.random_color
+        self.crafting._random_chance = self.random.random_chance
+        self.crafting._random_int = self.random.random_int
+        self.crafting._random_streak = self.random.random_streak
+        self.crafting._random_count = self.random.random_count
+
+    def _outcomes(
+        self, action: Callable[[State], State], state: State
+    ) -> List[Tuple[float, State]]:
+        """Runs an action on a copy of the state once per random branch."""
+        outcomes = []
+        self.random.script, self.random.arities = [], []
+        while True:
+            self.random.start_path()
+            new_state = action(state.copy())
+            outcomes.append((self.random.probability, new_state))
+            self.expansions_left -= 1
+            if self.expansions_left < 0:
+                raise StateSpaceExceeded(
+                    f"More than {self.max_states * EXPANSION_FACTOR} card "
+                    "plays at one position."
+                )
+            if not self.random.next_path():
+                return outcomes
+
+    def _expand(
+        self,
+        layer: Dict[Hashable, Tuple[float, Tuple[int, ...], State]],
+        remaining: Tuple[int, ...],
+        probability: float,
+        action: Callable[[State], State],
+        state: State
+    ) -> None:
+        """
+        Adds every outcome of an action to the next layer, merging
+        duplicates.
+        """
+        for branch_probability, new_state in self._outcomes(action, state):
+            key = (remaining, new_state.key())
+            previous = layer.get(key)
+            weight = probability * branch_probability
+            layer[key] = (
+                weight + (previous[0] if previous else 0.0),
+                remaining,
+                new_state
+            )
+        if len(layer) > self.max_states:
+            raise StateSpaceExceeded(
+                f"More than {self.max_states} distinct states."
+            )
+
+    def score_distribution(
+        self, deck: Tuple[str, ...], initial_state: State
+    ) -> Counter:
+        """
+        Computes the exact distribution of the final `yellow * blue` score.
+
+        Args:
+            deck: The deck as a tuple of card names.
+            initial_state: The state every run starts from.
+
+        Returns:
+            Counter: A mapping of each possible final score to its
+                probability; the values sum to 1.
+
+        Raises:
+            StateSpaceExceeded: If the state space grows beyond `max_states`.
+        """
+        card_names = sorted(set(deck))
+        counts = tuple(deck.count(name) for name in card_names)
+        crafting = self.crafting
+
+        layer: Dict[Hashable, Tuple[float, Tuple[int, ...], State]] = {}
+        self.expansions_left = self.max_states * EXPANSION_FACTOR
+        self._expand(
+            layer,
+            counts,
+            1.0,
+            lambda s: crafting.apply_start_of_cycle_effects(s, deck),
+            initial_state
+        )
+
+        for _ in range(len(deck)):
+            next_layer: Dict[
+                Hashable, Tuple[float, Tuple[int, ...], State]
+            ] = {}
+            self.expansions_left = self.max_states * EXPANSION_FACTOR
+            for probability, remaining, state in layer.values():
+                cards_left = sum(remaining)
+                for index, card_name in enumerate(card_names):
+                    if remaining[index] == 0:
+                        continue
+                    next_remaining = (
+                        remaining[:index]
+                        + (remaining[index] - 1,)
+                        + remaining[index + 1:]
+                    )
+
+                    def play(s: State, card_name: str = card_name) -> State:
+                        s = crafting.apply_pre_card_effects(s)
+                        return crafting.play_card(card_name, s)
+
+                    self._expand(
+                        next_layer,
+                        next_remaining,
+                        probability * remaining[index] / cards_left,
+                        play,
+                        state
+                    )
+            layer = next_layer
+
+        score_distribution: Counter = Counter()
+        self.expansions_left = self.max_states * EXPANSION_FACTOR
+        for probability, _, state in layer.values():
+            for branch_probability, final_state in self._outcomes(
+                lambda s: crafting.apply_end_of_cycle_effects(s, deck), state
+            ):
+                score_distribution[final_state.yellow * final_state.blue] += (
+                    probability * branch_probability
+                )
+        return score_distribution
@@ -2,23 +2,53 @@
 import argparse
 import json
 import os
+import sqlite3
 import sys
-from collections import defaultdict
+from collections import Counter, defaultdict
 from datetime import datetime
-from typing import Dict, Type
+from typing import Any, Dict, List, Optional, Tuple, Type
 
 # Local application imports
 from crafting.base_crafting import BaseCrafting
 from crafting.forging import ForgingCrafting
 from crafting.kitchen import KitchenCrafting
 from crafting.alchemy import AlchemyCrafting
-from simulator import CardSimulator
+from distributed import (
+    AUTHKEY_ENV_VAR,
+    Coordinator,
+    NoLiveWorkers,
+    parse_address,
+    resolve_authkey
+)
+from search import DEFAULT_MAX_EVALUATIONS
+from simulator import CardSimulator, SimulationSettings
+from sketch import DEFAULT_RELATIVE_ACCURACY
+from planner import (
+    CraftOption,
+    FocusItem,
+    expected_successes,
+    parse_focus,
+    plan_crafts
+)
+from profiling import SimulationProfiler
+from recommendation_index import (
+    RecommendationIndex,
+    index_fingerprint,
+    make_index_entry,
+    write_index
+)
+from score_cache import ScoreDistributionCache
+from result_store import ResultStore, fingerprint
+from scheduler import BatchScheduler
 
 # --- Path Setup ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(SCRIPT_DIR, '..', 'data')
 CARDS_PATH = os.path.join(DATA_DIR, 'cards.json')
 ITEMS_PATH = os.path.join(DATA_DIR, 'items.json')
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, '..', 'output')
+DEFAULT_RESULT_STORE_PATH = os.path.join(OUTPUT_DIR, 'result_store.sqlite3')
+DEFAULT_INDEX_PATH = os.path.join(OUTPUT_DIR, 'recommendation_index.bin')
 
 # This dictionary maps the string name of a crafting type to its class.
 CRAFTING_TYPE_CLASSES: Dict[str, Type[BaseCrafting]] = {
@@ -58,8 +88,35 @@ def print_usage_guide():
     print("Example (General): python main.py forging")
 
 
-def run_simulation_for_item(item_name: str, item_data: dict, cards_data: dict, report_type: str = "stars") -> dict:
-    """Runs a full simulation for a single item and returns a structured result."""
+def run_simulation_for_item(
+    item_name: str,
+    item_data: dict,
+    cards_data: dict,
+    settings: Optional[SimulationSettings] = None,
+    report_type: str = "stars",
+    score_cache: Optional[ScoreDistributionCache] = None,
+    profiler: Optional[SimulationProfiler] = None,
+    distributions: Optional[Dict[str, list]] = None,
+    coordinator: Optional[Any] = None,
+    crafting_instance: Optional[BaseCrafting] = None,
+    index_entries: Optional[Dict[str, Dict[str, Any]]] = None
+) -> dict:
+    """
+    Runs a full simulation for a single item and returns a structured result.
+
+    The run's `settings` (see `settings_from_args`) choose the engine, seed
+    and evaluation mode. When a `score_cache` is given, decks already
+    simulated for another item with the same crafting type and buff are
+    re-scored instead of re-simulated. When the settings profile, the
+    item's profile is added to `profiler`. When `distributions` is given,
+    the score sketch of every deck the settings keep sketches of is added
+    to it under the item's name. When a
+    `coordinator` (or a `server.WarmPool`) is given, its workers evaluate
+    the decks. A long-lived caller can pass a ready `crafting_instance` of
+    the item's crafting type instead of having one built from `cards_data`.
+    When `index_entries` is given, the item's recommendation index entry
+    (both report types and its deck metric table) is added to it.
+    """
     chosen_type_name = item_data.get('crafting_type')
     if not chosen_type_name:
         print(f"Warning: Item '{item_name}' is missing 'crafting_type'. Skipping.")
@@ -74,27 +131,608 @@ def run_simulation_for_item(item_name: str, item_data: dict, cards_data: dict, r
         print(f"Warning: No data or implementation for '{chosen_type_name}'. Skipping.")
         return {}
 
-    crafting_instance = CraftingClass(crafting_data)
+    if crafting_instance is None:
+        crafting_instance = CraftingClass(crafting_data)
     
     simulator = CardSimulator(
         crafting_instance,
         active_buff_id=item_data.get('buff_id'),
         star_thresholds=item_data.get('star_thresholds'),
         wish_points=item_data.get('wish_points'),
-        stamina_cost=item_data.get('stamina_cost')
+        stamina_cost=item_data.get('stamina_cost'),
+        crafting_type=chosen_type_name,
+        settings=settings,
+        score_cache=score_cache,
+        coordinator=coordinator,
+        keep_deck_table=index_entries is not None
     )
     
     deck_sizes_to_check = [item_data['deck_size']]
     simulation_results = simulator.find_best_decks(deck_sizes_to_check, report_type=report_type)
+    if profiler is not None and simulator.profiler is not None:
+        profiler.merge(simulator.profiler)
+    if distributions is not None:
+        distributions[item_name] = export_sketches(simulator)
     
     # Create a new dictionary to hold metadata and results separately
-    return {
+    result = {
         'item_name': item_name,
         'star_thresholds': item_data.get('star_thresholds'),
         'stamina_cost': item_data.get('stamina_cost'),
         'results': simulation_results,
         'deck_size': item_data['deck_size']
     }
+    if index_entries is not None:
+        index_entries[item_name] = make_index_entry(
+            simulator, result, item_data['deck_size']
+        )
+    return result
+
+
+def settings_from_args(args: argparse.Namespace) -> SimulationSettings:
+    """Builds the run's simulation settings from the command line."""
+    return SimulationSettings(
+        engine=args.engine,
+        exact_state_limit=args.exact_state_limit,
+        seed=args.seed,
+        variance_reduction=args.variance_reduction,
+        profile=args.profile,
+        prune=not args.no_prune,
+        sketch_accuracy=(
+            args.sketch_accuracy if args.distribution_output else None
+        ),
+        adaptive=args.adaptive,
+        search=args.search,
+        search_evaluations=args.search_evaluations,
+        search_time_limit=args.search_time
+    )
+
+
+def run_fingerprints(
+    cards_data: dict, settings: SimulationSettings
+) -> Dict[str, str]:
+    """
+    Fingerprints everything that shapes a batch run's score distributions.
+
+    Each crafting type gets its own fingerprint of its card definitions plus
+    the engine, engine version, simulation count, seed and sampling options,
+    so editing one crafting type's cards only invalidates its own results.
+    """
+    distribution_fields = settings.distribution_fields()
+    return {
+        crafting_type: fingerprint(card_definitions, distribution_fields)
+        for crafting_type, card_definitions in cards_data.items()
+    }
+
+
+def item_fingerprint(
+    item_data: dict,
+    run_fingerprint: Optional[str],
+    settings: SimulationSettings,
+    report_type: str
+) -> str:
+    """
+    Fingerprints an item's simulation-relevant fields and report options.
+
+    Combined with the run fingerprint of the item's crafting type, it
+    changes whenever the item's report could change. Its deck
+    distributions are keyed separately (by buff only), so an item whose
+    thresholds or wish points changed is re-scored without simulating.
+    """
+    relevant_fields = {
+        field: item_data.get(field)
+        for field in (
+            'crafting_type',
+            'buff_id',
+            'deck_size',
+            'star_thresholds',
+            'wish_points',
+            'stamina_cost'
+        )
+    }
+    search_settings = (
+        (settings.search_evaluations, settings.search_time_limit)
+        if settings.search
+        else None
+    )
+    return fingerprint(
+        run_fingerprint,
+        relevant_fields,
+        report_type,
+        settings.adaptive,
+        search_settings
+    )
+
+
+def export_sketches(simulator: CardSimulator) -> list:
+    """
+    Returns the score sketch of every deck a simulator evaluated, as
+    JSON-friendly entries.
+    """
+    return [
+        {
+            'deck_size': size,
+            'deck': dict(Counter(deck)),
+            'sketch': sketch.to_dict()
+        }
+        for size, sketches in simulator.deck_sketches.items()
+        for deck, sketch in sketches.items()
+    ]
+
+
+def save_distributions(
+    distributions: Dict[str, list], output_path: str
+) -> None:
+    """
+    Writes the score sketches of a run to a JSON file for `sketch.py` to query.
+
+    Args:
+        distributions: The sketch entries of every item, by item name.
+        output_path: The JSON file to write.
+    """
+    try:
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(output_path, "w") as f:
+            json.dump(distributions, f)
+    except OSError as e:
+        print(
+            "Error: Could not write the score distributions to "
+            f"'{output_path}' - {e}"
+        )
+        return
+    print(
+        "\nScore distributions of "
+        f"{sum(len(entries) for entries in distributions.values())} decks "
+        f"saved to: {output_path}"
+    )
+    print(
+        f"Query them with: python sketch.py {output_path} --threshold "
+        "<score> --quantile 0.5"
+    )
+
+
+def start_coordinator(args: argparse.Namespace) -> Optional[Coordinator]:
+    """
+    Starts serving deck evaluations to distributed workers, if requested.
+
+    Returns:
+        Optional[Coordinator]: The coordinator, or None when --coordinator
+            was not given or it could not start.
+    """
+    host, port = parse_address(args.coordinator)
+    authkey = resolve_authkey(args.authkey)
+    if authkey is None:
+        # Only useful to local workers; remote ones need a shared secret.
+        authkey = os.urandom(16).hex().encode("utf-8")
+        if not args.local_workers:
+            print(
+                f"Note: No --authkey or ${AUTHKEY_ENV_VAR} given; workers "
+                f"must use --authkey {authkey.decode('utf-8')}"
+            )
+    try:
+        coordinator = Coordinator(host, port, authkey)
+    except OSError as e:
+        print(f"Error: Could not listen on {args.coordinator} - {e}")
+        return None
+    bound_host, bound_port = coordinator.address
+    print(f"Coordinator listening on {bound_host}:{bound_port}.")
+    print(
+        "Start workers with: python distributed.py worker --connect "
+        f"HOST:{bound_port} --authkey KEY"
+    )
+    if args.local_workers:
+        coordinator.start_local_workers(args.local_workers, authkey)
+    print("Waiting for workers to connect...")
+    print(
+        f"{coordinator.wait_for_workers()} worker processes connected; more "
+        "may join at any time."
+    )
+    return coordinator
+
+
+def schedule_batch(
+    pending_items: List[Tuple[str, dict]],
+    cards_data: dict,
+    settings: SimulationSettings,
+    score_cache: ScoreDistributionCache,
+    coordinator: Optional[Any] = None,
+    profiler: Optional[SimulationProfiler] = None
+) -> None:
+    """
+    Simulates the decks of every pending batch item up front, on one pool.
+
+    Jobs from all items are ordered longest first (see `BatchScheduler`)
+    and their distributions are stored in the shared score cache, so
+    `run_simulation_for_item` then only re-scores them.
+
+    Args:
+        pending_items: The (item name, item data) pairs still to simulate.
+        cards_data: The contents of cards.json.
+        settings: The run's simulation settings.
+        score_cache: The batch's shared score cache.
+        coordinator: Evaluates the decks on distributed workers, if given.
+        profiler: Receives the simulation profile, if profiling.
+    """
+    scheduler = BatchScheduler(
+        score_cache, coordinator=coordinator, profiler=profiler
+    )
+    crafting_instances: Dict[str, BaseCrafting] = {}
+    for item_name, item_data in pending_items:
+        chosen_type_name = item_data.get('crafting_type')
+        CraftingClass = CRAFTING_TYPE_CLASSES.get(chosen_type_name)
+        if not cards_data.get(chosen_type_name) or not CraftingClass:
+            # Reported when the item itself is run.
+            continue
+        if chosen_type_name not in crafting_instances:
+            crafting_instances[chosen_type_name] = CraftingClass(
+                cards_data[chosen_type_name]
+            )
+        simulator = CardSimulator(
+            crafting_instances[chosen_type_name],
+            active_buff_id=item_data.get('buff_id'),
+            star_thresholds=item_data.get('star_thresholds'),
+            crafting_type=chosen_type_name,
+            settings=settings,
+            score_cache=score_cache
+        )
+        scheduler.add(simulator, item_data['deck_size'])
+    if len(scheduler):
+        if coordinator is not None:
+            workers = coordinator.capacity()
+        else:
+            workers = os.cpu_count()
+        print(
+            f"\n--- Simulating {len(scheduler)} decks of {len(pending_items)} "
+            f"items on {workers} workers, longest first ---"
+        )
+        scheduler.run()
+
+
+def save_index(
+    index_entries: Dict[str, Dict[str, Any]],
+    items_data: dict,
+    run_fingerprints: Dict[str, str],
+    settings: SimulationSettings,
+    output_path: str
+) -> None:
+    """
+    Writes the recommendation index, reporting (not raising) write
+    errors.
+    """
+    fingerprints = {
+        item_name: index_fingerprint(
+            items_data[item_name],
+            run_fingerprints.get(items_data[item_name].get('crafting_type'))
+        )
+        for item_name in index_entries
+    }
+    try:
+        write_index(
+            output_path,
+            index_entries,
+            fingerprints,
+            settings.distribution_fields()
+        )
+    except OSError as e:
+        print(
+            "Error: Could not write the recommendation index "
+            f"'{output_path}' - {e}"
+        )
+        return
+    print(
+        f"Recommendation index of {len(index_entries)} items written to: "
+        f"{output_path}"
+    )
+
+
+def report_profile(
+    profiler: SimulationProfiler, output_path: Optional[str]
+) -> None:
+    """
+    Prints a simulation profile and optionally exports it as JSON.
+
+    Args:
+        profiler: The profile recorded during the run.
+        output_path: Where to write the JSON export, or None to only print.
+    """
+    print("\n--- Simulation Profile ---")
+    if not profiler:
+        print("Nothing was simulated, so there is nothing to profile.")
+        return
+    print(profiler.format_report())
+    if output_path:
+        try:
+            directory = os.path.dirname(output_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(output_path, "w") as f:
+                json.dump(profiler.to_dict(), f, indent=2)
+        except OSError as e:
+            print(
+                f"Error: Could not write the profile to '{output_path}' - {e}"
+            )
+            return
+        print(f"Profile saved to: {output_path}")
+
+
+def print_item_report(
+    item_result: dict, crafting_type: str, report_type: str
+) -> None:
+    """Formats and prints the report of a single item."""
+    # Group it for the formatter
+    grouped_results = defaultdict(list)
+    grouped_results[crafting_type].append(item_result)
+    
+    # Format and print
+    item_name = item_result['item_name']
+    if report_type == "wishpoints":
+        discord_report = format_wishpoints_report(grouped_results)
+        print(f"\n\n--- Wish Point Efficiency Report for: {item_name} ---")
+    else: # "stars"
+        discord_report = format_stars_report(grouped_results)
+        print(f"\n\n--- Star-Optimized Analysis Report for: {item_name} ---")
+
+    print(discord_report)
+
+
+def open_index(args: argparse.Namespace) -> Optional[RecommendationIndex]:
+    """
+    Opens the recommendation index, if it may answer this run's queries.
+
+    Runs that build the index, race or search decks, profile, or export
+    distributions always simulate.
+
+    Returns:
+        Optional[RecommendationIndex]: The index, or None when there is
+            none or it may not be used.
+    """
+    if (
+        args.build_index
+        or args.no_index
+        or args.adaptive
+        or args.search
+        or args.profile
+        or args.distribution_output
+    ):
+        return None
+    if not os.path.exists(args.index):
+        return None
+    try:
+        return RecommendationIndex(args.index)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Ignoring the recommendation index - {e}")
+        return None
+
+
+def indexed_item_result(
+    index: Optional[RecommendationIndex],
+    item_name: str,
+    item_data: dict,
+    run_fingerprints: Dict[str, str],
+    settings: SimulationSettings,
+    report_type: str
+) -> Optional[dict]:
+    """
+    Reads an item's result from the recommendation index.
+
+    Says why when the item is indexed but its entry is stale.
+
+    Returns:
+        Optional[dict]: The item's result, or None when there is no index
+            or the item's entry is stale against the data files and settings.
+    """
+    if index is None:
+        return None
+    item_key = index_fingerprint(
+        item_data, run_fingerprints.get(item_data.get('crafting_type'))
+    )
+    if not index.is_fresh(item_name, item_key):
+        if item_name in index.items:
+            reason = index.stale_reason(
+                item_name, item_key, settings.distribution_fields()
+            )
+            print(
+                f"    The recommendation index entry of '{item_name}' is "
+                f"out of date ({reason}); simulating instead."
+            )
+        return None
+    return index.report(item_name, report_type)
+
+
+def build_craft_options(
+    index: RecommendationIndex,
+    items_data: dict,
+    run_fingerprints: Dict[str, str],
+    settings: SimulationSettings,
+    focus: Dict[str, FocusItem],
+    objective: str,
+    min_stars: int
+) -> Tuple[List[CraftOption], List[str]]:
+    """
+    Picks every item's best deck for a plan from the recommendation index.
+
+    With the "stars" objective, the focus file's star targets are planned
+    (or, without any, every item at `min_stars`), each by its chance of
+    reaching its star level; with "wishpoints", every item by its expected
+    wish points. Items with a priority of 0 are left out.
+
+    Returns:
+        The craft options, and the items that could not be planned because
+        the index has no up-to-date entry for them, each with the reason
+        (see `RecommendationIndex.stale_reason`).
+    """
+    targets = {
+        name for name, entry in focus.items() if entry.min_stars is not None
+    }
+    options: List[CraftOption] = []
+    missing: List[str] = []
+    for item_name, item_data in items_data.items():
+        entry = focus.get(item_name, FocusItem())
+        stamina_cost = item_data.get('stamina_cost') or 0
+        if (
+            'star_thresholds' not in item_data
+            or stamina_cost <= 0
+            or entry.priority <= 0
+        ):
+            continue
+        if objective == "stars" and targets and item_name not in targets:
+            continue
+        item_key = index_fingerprint(
+            item_data, run_fingerprints.get(item_data.get('crafting_type'))
+        )
+        reason = index.stale_reason(
+            item_name, item_key, settings.distribution_fields()
+        )
+        if reason is not None:
+            missing.append(f"{item_name} ({reason})")
+            continue
+        if objective == "stars":
+            star_key = f"{entry.min_stars or min_stars}_star"
+            if star_key not in (
+                f"{i + 1}_star"
+                for i in range(len(item_data['star_thresholds']))
+            ):
+                continue
+            deck, metrics = max(
+                index.deck_table(item_name),
+                key=lambda row: row[1]['star_chances'][star_key]
+            )
+            value = metrics['star_chances'][star_key] / 100
+        else:
+            deck, metrics = max(
+                index.deck_table(item_name),
+                key=lambda row: row[1]['expected_wish_points']
+            )
+            value = metrics['expected_wish_points']
+        options.append(
+            CraftOption(
+                item_name,
+                stamina_cost,
+                deck,
+                value,
+                entry.priority,
+                entry.needed if objective == "stars" else None
+            )
+        )
+    return options, missing
+
+
+def run_planner(
+    items_data: dict, cards_data: dict, args: argparse.Namespace
+) -> None:
+    """
+    Plans the crafts for a stamina budget from the recommendation index
+    and prints the plan.
+    """
+    if not os.path.exists(args.index):
+        print(
+            f"Error: No recommendation index at '{args.index}'. Build it "
+            "first with: python main.py --build-index"
+        )
+        return
+    focus: Dict[str, FocusItem] = {}
+    if args.focus:
+        try:
+            with open(args.focus, 'r', encoding='utf-8') as f:
+                focus = parse_focus(f.read(), items_data.keys())
+        except OSError as e:
+            print(f"Error: Could not read the focus file - {e}")
+            return
+    try:
+        index = RecommendationIndex(args.index)
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not open the recommendation index - {e}")
+        return
+    settings = settings_from_args(args)
+    with index:
+        options, missing = build_craft_options(
+            index,
+            items_data,
+            run_fingerprints(cards_data, settings),
+            settings,
+            focus,
+            args.plan_objective,
+            args.min_stars
+        )
+    plan = plan_crafts(options, args.plan)
+
+    if args.plan_objective == "stars":
+        objective = "star-target crafts"
+    else:
+        objective = "wish points"
+    print(
+        f"\n--- Crafting Plan: {args.plan} stamina, most expected "
+        f"{objective} ---"
+    )
+    if not plan.crafts:
+        print("  Nothing to craft: no planned item fits the budget.")
+    for option, crafts in plan.crafts:
+        deck_str = ", ".join(
+            f"{count}x {name}" for name, count in option.deck.items()
+        )
+        if args.plan_objective == "stars":
+            focus_item = focus.get(option.item_name) or FocusItem()
+            star_level = focus_item.min_stars or args.min_stars
+            wanted = ""
+            if option.needed is not None:
+                wanted = f", {option.needed} wanted"
+            expected = expected_successes(
+                option.value_per_craft, crafts, option.needed
+            )
+            outcome = (
+                f"{option.value_per_craft * 100:.2f}% for >= {star_level} "
+                f"stars each, {expected:.2f} expected{wanted}"
+            )
+        else:
+            total = option.value_per_craft * crafts
+            outcome = (
+                f"{option.value_per_craft:.2f} WP each, {total:.2f} total"
+            )
+        priority = ""
+        if option.priority != 1:
+            priority = f" | Priority {option.priority:g}"
+        print(
+            f"  {crafts}x {option.item_name} ({crafts * option.stamina_cost} "
+            f"stamina) | {outcome}{priority}"
+        )
+        print(f"     Deck: {deck_str}")
+    print(
+        f"Stamina used: {plan.stamina_used} of {args.plan}. "
+        f"Priority-weighted value: {plan.value:.2f}"
+    )
+    if missing:
+        print(
+            "Not planned, as the index has no up-to-date results for them "
+            f"(rerun --build-index): {', '.join(missing)}"
+        )
+
+
+def format_evaluation_details(result: dict) -> str:
+    """
+    Returns how a deck was evaluated: exactly, pruned, or its adaptive
+    sim count and confidence, plus any paired lead.
+    """
+    details = ""
+    if result.get('exact'):
+        details = " | Exact"
+    elif result.get('pruned'):
+        details = f" | Pruned (max score {result['upper_bound']:,.0f})"
+    elif 'simulations' in result:
+        details = f" | Sims: {result['simulations']}"
+        if 'ranking_confidence' in result:
+            details += (
+                f", Confidence: {result['ranking_confidence'] * 100:.1f}%"
+            )
+    if 'paired_difference' in result:
+        margin = 1.96 * result['paired_standard_error']
+        details += (
+            f" | Lead vs runner-up: {result['paired_difference']:+.2f}"
+            f" ± {margin:.2f}"
+            f" ({result['paired_confidence'] * 100:.1f}% confident)"
+        )
+    return details
 
 
 def format_stars_report(grouped_results: Dict[str, list]) -> str:
@@ -126,7 +764,9 @@ def format_stars_report(grouped_results: Dict[str, list]) -> str:
                     chance = result.get('star_chances', {}).get(star_key, 0)
                     deck_str = ", ".join([f"{count}x {name}" for name, count in result['deck'].items()])
                     report_parts.append(
-                        f"- **Best for {i+1}-Star ({threshold} pts):** {chance:.2f}% | Deck: {deck_str}"
+                        f"- **Best for {i+1}-Star ({threshold} pts):** "
+                        f"{chance:.2f}% | Deck: "
+                        f"{deck_str}{format_evaluation_details(result)}"
                     )
             
             report_parts.append("---")
@@ -157,72 +797,193 @@ def format_wishpoints_report(grouped_results: Dict[str, list]) -> str:
             report_parts.append(
                 f"**Item: {item_name}** (Stamina: {stamina_cost})")
             report_parts.append(f"  - **Expected Wish Points**: {expected_wp:.2f} (Efficiency: {wp_per_stamina:.2f} WP/Stamina)")
-            report_parts.append(f"  - **Deck**: {deck_str}")
+            report_parts.append(
+                "  - **Deck**: "
+                f"{deck_str}{format_evaluation_details(top_deck)}"
+            )
             report_parts.append("---")
     return "\n".join(report_parts)
 
 
-def main() -> None:
+def run_workflow(
+    args: argparse.Namespace,
+    items_data: Dict[str, Any],
+    cards_data: Dict[str, Any],
+    settings: SimulationSettings,
+    coordinator: Optional[Coordinator] = None
+) -> None:
     """
-    Main function to run the crafting simulation.
-    """
-    parser = argparse.ArgumentParser(description="AFK Journey Crafting Simulator")
-    parser.add_argument(
-        "crafting_type",
-        nargs='?',
-        default=None,
-        choices=CRAFTING_TYPE_CLASSES.keys(),
-        help="The crafting type to analyze (optional if --item is used)."
-    )
-    parser.add_argument(
-        "--item",
-        type=str,
-        help="The name of a special item to use for the simulation, or 'all' for batch mode."
-    )
-    parser.add_argument(
-        "--save-report",
-        action="store_true",
-        help="Save the batch simulation report to a markdown file."
-    )
-    parser.add_argument(
-        "--report-type",
-        type=str,
-        default="stars",
-        choices=["stars", "wishpoints"],
-        help="The type of report to generate: 'stars' for per-star optimization, 'wishpoints' for wish point efficiency."
-    )
-    args = parser.parse_args()
-
-    # --- Data Loading ---
-    try:
-        with open(CARDS_PATH, 'r') as f:
-            cards_data = json.load(f)
-        with open(ITEMS_PATH, 'r') as f:
-            items_data = json.load(f)
-    except FileNotFoundError as e:
-        print(f"Error: Data file not found - {e.filename}")
-        return
-    except json.JSONDecodeError:
-        print("Error: A data file is not a valid JSON file.")
-        return
+    Runs the batch, index build or single-item workflow the arguments select.
 
+    Args:
+        args: The parsed command-line arguments.
+        items_data: The contents of items.json.
+        cards_data: The contents of cards.json.
+        settings: The run settings built from the arguments.
+        coordinator: Evaluates the decks on distributed workers, if given.
+    """
     # --- Workflow Selection ---
-    if args.item == "all" or args.crafting_type:
-        if args.crafting_type:
+    if args.item == "all" or args.crafting_type or args.build_index:
+        if args.build_index:
+            print(
+                "--- Building the recommendation index for all items. This "
+                "may take a while... ---"
+            )
+        elif args.crafting_type:
             print(f"--- Running simulations for all items of type: {args.crafting_type}. This may take a while... ---")
         else:
             print("--- Running simulations for all items. This may take a while... ---")
 
         all_results = []
-        for item_name, item_data in items_data.items():
-            # If a crafting_type is specified, filter by it. Otherwise, run for all.
-            if args.crafting_type and item_data.get('crafting_type') != args.crafting_type:
-                continue
-            
-            if 'star_thresholds' in item_data:
-                result = run_simulation_for_item(item_name, item_data, cards_data, report_type=args.report_type)
+        profiler = SimulationProfiler() if args.profile else None
+        distributions: Optional[Dict[str, list]] = (
+            {} if args.distribution_output else None
+        )
+        index_entries: Optional[Dict[str, Dict[str, Any]]] = (
+            {} if args.build_index else None
+        )
+        index = open_index(args)
+        fingerprints = run_fingerprints(cards_data, settings)
+        # Shared across items so those differing only in thresholds
+        # reuse simulations.
+        if args.no_result_store or args.profile:
+            if args.profile and not args.no_result_store:
+                print(
+                    "Note: Profiling keeps results in memory, so every item "
+                    "is simulated instead of read from the result store."
+                )
+            score_cache = ScoreDistributionCache()
+        else:
+            try:
+                score_cache = ResultStore(args.result_store, fingerprints)
+            except (sqlite3.Error, OSError) as e:
+                print(
+                    "Error: Could not open the result store "
+                    f"'{args.result_store}' - {e}"
+                )
+                return
+            print(f"Using result store: {args.result_store}")
+        if args.adaptive or args.search:
+            mode = 'Deck search' if args.search else 'Adaptive racing'
+            print(
+                f"Note: {mode} does not read or write the shared score "
+                "cache."
+            )
+        try:
+            # Items answered from the index or the result store, and the item
+            # fingerprints of the rest, in items.json order.
+            item_results: Dict[str, Optional[dict]] = {}
+            item_keys: Dict[str, str] = {}
+            for item_name, item_data in items_data.items():
+                # If a crafting_type is specified, filter by it.
+                # Otherwise, run for all.
+                if (
+                    args.crafting_type
+                    and item_data.get('crafting_type') != args.crafting_type
+                ):
+                    continue
+
+                if 'star_thresholds' in item_data:
+                    result = indexed_item_result(
+                        index,
+                        item_name,
+                        item_data,
+                        fingerprints,
+                        settings,
+                        args.report_type
+                    )
+                    if result is not None:
+                        print(
+                            "\n--- Item indexed, reading the recommendation "
+                            f"index: {item_name} ---"
+                        )
+                    elif (
+                        isinstance(score_cache, ResultStore)
+                        and distributions is None
+                        and index_entries is None
+                    ):
+                        # Reused items were not evaluated, so they would
+                        # have no sketches or deck tables.
+                        item_keys[item_name] = item_fingerprint(
+                            item_data,
+                            fingerprints.get(item_data.get('crafting_type')),
+                            settings,
+                            args.report_type
+                        )
+                        result = score_cache.get_item_result(
+                            item_keys[item_name]
+                        )
+                        if result is not None:
+                            print(
+                                "\n--- Item unchanged, reusing stored "
+                                f"results: {item_name} ---"
+                            )
+                    item_results[item_name] = result
+
+            pending_items = [
+                (item_name, items_data[item_name])
+                for item_name, result in item_results.items()
+                if result is None
+            ]
+            if pending_items and not (args.adaptive or args.search):
+                schedule_batch(
+                    pending_items,
+                    cards_data,
+                    settings,
+                    score_cache,
+                    coordinator,
+                    profiler
+                )
+
+            for item_name, result in item_results.items():
+                if result is None:
+                    result = run_simulation_for_item(
+                        item_name, items_data[item_name], cards_data, settings,
+                        report_type=args.report_type, score_cache=score_cache,
+                        profiler=profiler, distributions=distributions,
+                        coordinator=coordinator, index_entries=index_entries
+                    )
+                    if result and item_name in item_keys:
+                        score_cache.put_item_result(
+                            item_keys[item_name], result
+                        )
                 if result:
                     all_results.append(result)
+        except KeyboardInterrupt:
+            if isinstance(score_cache, ResultStore):
+                print(
+                    f"\nInterrupted. {score_cache.stored} deck results were "
+                    f"saved to {args.result_store}; rerun the same command "
+                    "to resume."
+                )
+            else:
+                print("\nInterrupted.")
+            return
+        finally:
+            if isinstance(score_cache, ResultStore):
+                score_cache.close()
+        if isinstance(score_cache, ResultStore):
+            print(
+                f"\nResult store: {score_cache.items_reused} unchanged items "
+                f"reused, {score_cache.stored} deck distributions simulated, "
+                f"{score_cache.loaded} resumed from disk, {score_cache.hits} "
+                "decks re-scored from cache."
+            )
+        else:
+            print(
+                f"\nScore cache: {len(score_cache)} deck distributions "
+                f"simulated, {score_cache.hits} decks re-scored from cache."
+            )
+        if profiler is not None:
+            report_profile(profiler, args.profile_output)
+        if distributions is not None:
+            save_distributions(distributions, args.distribution_output)
+        if index_entries is not None:
+            save_index(
+                index_entries, items_data, fingerprints, settings, args.index
+            )
+        if index is not None:
+            index.close()
         
         grouped_results = defaultdict(list)
         for result in all_results:
@@ -276,7 +1037,28 @@ def main() -> None:
             print(f"    Mode: {args.report_type.title()} Analysis")
         else:
             print("    Mode: Highest Average Score (Item-specific)")
-    
+
+        if star_thresholds:
+            index = open_index(args)
+            indexed_result = indexed_item_result(
+                index,
+                args.item,
+                item,
+                run_fingerprints(cards_data, settings),
+                settings,
+                args.report_type
+            )
+            if index is not None:
+                index.close()
+            if indexed_result is not None:
+                print(
+                    f"    Answered from the recommendation index: {args.index}"
+                )
+                print_item_report(
+                    indexed_result, chosen_type_name, args.report_type
+                )
+                return
+
     else:
         print_usage_guide()
         return
@@ -299,7 +1081,10 @@ def main() -> None:
         active_buff_id=active_buff_id,
         star_thresholds=star_thresholds,
         wish_points=item_data_for_sim.get('wish_points'),
-        stamina_cost=item_data_for_sim.get('stamina_cost')
+        stamina_cost=item_data_for_sim.get('stamina_cost'),
+        crafting_type=chosen_type_name,
+        settings=settings,
+        coordinator=coordinator
     )
     
     simulation_results = simulator.find_best_decks(deck_sizes_to_check, report_type=args.report_type)
@@ -316,20 +1101,9 @@ def main() -> None:
                 'results': simulation_results,
                 'deck_size': item_data_for_report.get('deck_size')
             }
-            
-            # Group it for the formatter
-            grouped_results = defaultdict(list)
-            grouped_results[chosen_type_name].append(single_item_result)
-            
-            # Format and print
-            if args.report_type == "wishpoints":
-                discord_report = format_wishpoints_report(grouped_results)
-                print(f"\n\n--- Wish Point Efficiency Report for: {item_name_for_display} ---")
-            else: # "stars"
-                discord_report = format_stars_report(grouped_results)
-                print(f"\n\n--- Star-Optimized Analysis Report for: {item_name_for_display} ---")
-
-            print(discord_report)
+            print_item_report(
+                single_item_result, chosen_type_name, args.report_type
+            )
         else:
             print(f"\n\n--- Top {top_n_results} Highest-Score Decks for: {chosen_type_name} ---")
             for size, decks in simulation_results.items():
@@ -340,10 +1114,371 @@ def main() -> None:
                 
                 for i, result in enumerate(decks):
                     deck_str = ", ".join([f"{count}x {name}" for name, count in result['deck'].items()])
-                    avg_score = result.get('score', 0)
-                    print(f"  #{i+1}: Expected Score: {avg_score:.2f}")
+                    avg_score = result.get('score')
+                    score_str = (
+                        "n/a" if avg_score is None else f"{avg_score:.2f}"
+                    )
+                    print(
+                        f"  #{i+1}: Expected Score: "
+                        f"{score_str}{format_evaluation_details(result)}"
+                    )
                     print(f"     Deck: {deck_str}")
 
+    if simulator.profiler is not None:
+        report_profile(simulator.profiler, args.profile_output)
+    if args.distribution_output:
+        save_distributions(
+            {item_name_for_display: export_sketches(simulator)},
+            args.distribution_output
+        )
+
+
+def main() -> None:
+    """
+    Main function to run the crafting simulation.
+    """
+    parser = argparse.ArgumentParser(
+        description="AFK Journey Crafting Simulator"
+    )
+    parser.add_argument(
+        "crafting_type",
+        nargs='?',
+        default=None,
+        choices=CRAFTING_TYPE_CLASSES.keys(),
+        help="The crafting type to analyze (optional if --item is used)."
+    )
+    parser.add_argument(
+        "--item",
+        type=str,
+        help=(
+            "The name of a special item to use for the simulation, or 'all' "
+            "for batch mode."
+        )
+    )
+    parser.add_argument(
+        "--save-report",
+        action="store_true",
+        help="Save the batch simulation report to a markdown file."
+    )
+    parser.add_argument(
+        "--report-type",
+        type=str,
+        default="stars",
+        choices=["stars", "wishpoints"],
+        help=(
+            "The type of report to generate: 'stars' for per-star "
+            "optimization, 'wishpoints' for wish point efficiency."
+        )
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help=(
+            "Race decks in rounds, dropping hopeless ones early instead of "
+            "running 5000 sims on every deck."
+        )
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help=(
+            "Search the deck space heuristically (hill climbing with cheap "
+            "screening runs, full runs for finalists) instead of evaluating "
+            "every deck. For deck sizes or card pools too large to "
+            "enumerate; the best deck is not guaranteed."
+        )
+    )
+    parser.add_argument(
+        "--search-evaluations",
+        type=int,
+        default=DEFAULT_MAX_EVALUATIONS,
+        help=(
+            "With --search, the most decks screened per deck size (default: "
+            f"{DEFAULT_MAX_EVALUATIONS})."
+        )
+    )
+    parser.add_argument(
+        "--search-time",
+        type=float,
+        default=None,
+        help=(
+            "With --search, the most seconds spent screening per deck size "
+            "before the finalists are simulated."
+        )
+    )
+    parser.add_argument(
+        "--no-prune",
+        action="store_true",
+        help=(
+            "Simulate every deck, including those whose best possible score "
+            "is below the 1-star threshold."
+        )
+    )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        default="python",
+        choices=["python", "numpy", "exact"],
+        help=(
+            "The simulation engine: 'python' plays one run at a time, "
+            "'numpy' runs all simulations of a deck as arrays, 'exact' "
+            "computes exact star chances where the state space is small and "
+            "simulates the rest."
+        )
+    )
+    parser.add_argument(
+        "--exact-state-limit",
+        type=int,
+        default=20000,
+        help=(
+            "With --engine exact, the most distinct states per card position "
+            "before a deck falls back to simulation."
+        )
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help=(
+            "Root seed for reproducible results. Each deck gets its own "
+            "stable random stream, so reports are identical across runs and "
+            "worker counts."
+        )
+    )
+    parser.add_argument(
+        "--variance-reduction",
+        action="store_true",
+        help=(
+            "Drive every deck with the same random streams in antithetic "
+            "pairs, and report each best deck's paired lead over its "
+            "runner-up."
+        )
+    )
+    parser.add_argument(
+        "--result-store",
+        type=str,
+        default=DEFAULT_RESULT_STORE_PATH,
+        help=(
+            "SQLite file where batch runs save each deck's results as they "
+            "finish, so an interrupted run resumes where it stopped "
+            f"(default: {DEFAULT_RESULT_STORE_PATH})."
+        )
+    )
+    parser.add_argument(
+        "--no-result-store",
+        action="store_true",
+        help=(
+            "Keep batch results in memory only, without reading or writing "
+            "the result store."
+        )
+    )
+    parser.add_argument(
+        "--build-index",
+        action="store_true",
+        help=(
+            "Evaluate every item once and write the recommendation index, "
+            "from which later --item and batch runs answer instantly (both "
+            "report types) until the data files or simulation settings "
+            "change."
+        )
+    )
+    parser.add_argument(
+        "--index",
+        type=str,
+        default=DEFAULT_INDEX_PATH,
+        help=f"The recommendation index file (default: {DEFAULT_INDEX_PATH})."
+    )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help=(
+            "Simulate even when the recommendation index holds an up-to-date "
+            "answer."
+        )
+    )
+    parser.add_argument(
+        "--plan",
+        type=int,
+        default=None,
+        metavar="STAMINA",
+        help=(
+            "Plan which items to craft, how often and with which decks, to "
+            "get the most out of this much stamina. Reads the recommendation "
+            "index instead of simulating."
+        )
+    )
+    parser.add_argument(
+        "--plan-objective",
+        type=str,
+        default="wishpoints",
+        choices=["wishpoints", "stars"],
+        help=(
+            "With --plan, maximize expected wish points, or the expected "
+            "number of crafts reaching the star targets (the focus file's "
+            "'>=N stars' items, or every item at --min-stars)."
+        )
+    )
+    parser.add_argument(
+        "--min-stars",
+        type=int,
+        default=2,
+        help=(
+            "With --plan-objective stars, the star level items without a "
+            "focus target aim for (default: 2)."
+        )
+    )
+    parser.add_argument(
+        "--focus",
+        type=str,
+        default=None,
+        help=(
+            "With --plan, a focus file like data/current_focus.txt: item "
+            "priorities by section, '>=N stars' targets and 'done/wanted' "
+            "progress."
+        )
+    )
+    parser.add_argument(
+        "--distribution-output",
+        type=str,
+        default=None,
+        help=(
+            "Keep a compact sketch of every deck's score distribution and "
+            "write them to this JSON file, so any threshold or percentile "
+            "can be queried later with sketch.py instead of re-simulating."
+        )
+    )
+    parser.add_argument(
+        "--sketch-accuracy",
+        type=float,
+        default=DEFAULT_RELATIVE_ACCURACY,
+        help=(
+            "With --distribution-output, the relative error of the sketched "
+            f"percentiles (default: {DEFAULT_RELATIVE_ACCURACY})."
+        )
+    )
+    parser.add_argument(
+        "--coordinator",
+        type=str,
+        default=None,
+        help=(
+            "Evaluate decks on worker processes of other machines: listen on "
+            "this HOST:PORT (e.g. 0.0.0.0:5005) for workers started with "
+            "'python distributed.py worker'."
+        )
+    )
+    parser.add_argument(
+        "--authkey",
+        type=str,
+        default=None,
+        help=(
+            "With --coordinator, the secret workers must present (default: "
+            f"${AUTHKEY_ENV_VAR}, or a random one)."
+        )
+    )
+    parser.add_argument(
+        "--local-workers",
+        type=int,
+        default=0,
+        help=(
+            "With --coordinator, also start this many worker processes on "
+            "this machine."
+        )
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Time every simulation phase and card (across all worker "
+            "processes) and print where the time goes. Slows the run down."
+        )
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=str,
+        default=None,
+        help="With --profile, also write the profile as JSON to this file."
+    )
+    args = parser.parse_args()
+    if args.search and args.adaptive:
+        parser.error(
+            "--search and --adaptive are alternative ways to evaluate decks; "
+            "pick one."
+        )
+    if args.engine == "exact" and (args.adaptive or args.search):
+        mode = '--search' if args.search else '--adaptive'
+        parser.error(
+            "--engine exact computes each deck's distribution outright; it "
+            f"cannot be combined with {mode}, which samples decks in rounds."
+        )
+    if args.search_evaluations < 1:
+        parser.error("--search-evaluations must be at least 1.")
+    if not 0 < args.sketch_accuracy < 1:
+        parser.error("--sketch-accuracy must be between 0 and 1.")
+    if args.build_index and (args.crafting_type or args.item):
+        parser.error(
+            "--build-index always indexes every item; drop the crafting type "
+            "and --item."
+        )
+    if args.build_index and (args.adaptive or args.search):
+        parser.error(
+            "--build-index evaluates every deck; it cannot be combined with "
+            "--adaptive or --search."
+        )
+    if args.plan is not None and args.plan < 1:
+        parser.error("--plan needs a stamina budget of at least 1.")
+    if args.plan is not None and (
+        args.build_index or args.item or args.crafting_type
+    ):
+        parser.error(
+            "--plan reads the recommendation index; run --build-index "
+            "separately and drop the crafting type and --item."
+        )
+    if args.min_stars < 1:
+        parser.error("--min-stars must be at least 1.")
+    if args.local_workers < 0:
+        parser.error("--local-workers cannot be negative.")
+    if args.local_workers and not args.coordinator:
+        parser.error("--local-workers needs --coordinator.")
+    if args.coordinator:
+        try:
+            parse_address(args.coordinator)
+        except ValueError as e:
+            parser.error(f"--coordinator: {e}")
+
+    # --- Data Loading ---
+    try:
+        with open(CARDS_PATH, 'r') as f:
+            cards_data = json.load(f)
+        with open(ITEMS_PATH, 'r') as f:
+            items_data = json.load(f)
+    except FileNotFoundError as e:
+        print(f"Error: Data file not found - {e.filename}")
+        return
+    except json.JSONDecodeError:
+        print("Error: A data file is not a valid JSON file.")
+        return
+
+    if args.plan is not None:
+        run_planner(items_data, cards_data, args)
+        return
+
+    settings = settings_from_args(args)
+
+    coordinator = None
+    if args.coordinator and (
+        args.item or args.crafting_type or args.build_index
+    ):
+        coordinator = start_coordinator(args)
+        if coordinator is None:
+            return
+
+    try:
+        run_workflow(args, items_data, cards_data, settings, coordinator)
+    except NoLiveWorkers as e:
+        print(f"\nError: {e}")
+    finally:
+        if coordinator is not None:
+            coordinator.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,214 @@
+# Standard library imports
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Priority weights of the sections of a focus file (see `parse_focus`).
+PRIORITY_WEIGHTS = {
+    'top priority': 2.0,
+    'medium priority': 1.0,
+    'low priority': 0.5,
+}
+DEFAULT_PRIORITY = 1.0
+
+
+class FocusItem:
+    """What a focus file says about an item."""
+    def __init__(
+        self,
+        priority: float = DEFAULT_PRIORITY,
+        needed: Optional[int] = None,
+        min_stars: Optional[int] = None
+    ) -> None:
+        self.priority = priority
+        # How many more crafts of at least `min_stars` stars are wanted, if
+        # the item is a star target.
+        self.needed = needed
+        self.min_stars = min_stars
+
+
+class CraftOption:
+    """The planner's view of one craftable item: its cost and its best deck."""
+    def __init__(
+        self,
+        item_name: str,
+        stamina_cost: int,
+        deck: Counter,
+        value_per_craft: float,
+        priority: float = DEFAULT_PRIORITY,
+        needed: Optional[int] = None
+    ) -> None:
+        """
+        Initializes the option.
+
+        Args:
+            item_name: The item.
+            stamina_cost: The stamina one craft costs.
+            deck: The deck every craft of the item uses.
+            value_per_craft: The expected wish points of one craft, or the
+                chance (0 to 1) of one craft reaching the target star
+                level, depending on the objective.
+            priority: How much the item's value counts.
+            needed: For star targets, how many successes are wanted;
+                further successes add nothing. None counts every one.
+        """
+        self.item_name = item_name
+        self.stamina_cost = stamina_cost
+        self.deck = deck
+        self.value_per_craft = value_per_craft
+        self.priority = priority
+        self.needed = needed
+
+
+class Plan:
+    """The crafts chosen for a stamina budget."""
+    def __init__(self, value: float = 0.0) -> None:
+        self.crafts: List[Tuple[CraftOption, int]] = []
+        self.value = value
+        self.stamina_used = 0
+
+
+def parse_focus(text: str, item_names: Iterable[str]) -> Dict[str, FocusItem]:
+    """
+    Reads item priorities and star targets from a free-form focus file.
+
+    Items are recognized by their names in items.json (longest first, so
+    "Calming Warmdust" is not also read as "Warmdust"). Lines under a
+    heading containing "Top Priority", "Medium Priority" or "Low Priority"
+    set the priority of the items they name, and a line starting with
+    "Ignore" sets it to 0. A line like "Cut => Chillguard Armor >=2 stars
+    3/8" makes the item a star target: at least 2 stars, 5 more crafts
+    wanted (one, when there is no progress count).
+
+    Args:
+        text: The focus file's contents.
+        item_names: The known item names.
+
+    Returns:
+        Dict[str, FocusItem]: The items the file mentions.
+    """
+    names = sorted(item_names, key=len, reverse=True)
+    focus: Dict[str, FocusItem] = {}
+    section_priority: Optional[float] = None
+    for line in text.splitlines():
+        lowered = line.lower()
+        heading = next(
+            (
+                weight
+                for name, weight in PRIORITY_WEIGHTS.items()
+                if name in lowered
+            ),
+            None
+        )
+        if heading is not None:
+            section_priority = heading
+            continue
+        if not line.strip():
+            continue
+        mentioned = []
+        remaining = lowered
+        for name in names:
+            if name.lower() in remaining:
+                mentioned.append(name)
+                remaining = remaining.replace(name.lower(), " ")
+        if not mentioned:
+            continue
+        stars = re.search(r">=\s*(\d+)\s*star", lowered)
+        progress = re.search(r"(\d+)\s*/\s*(\d+)", line)
+        for name in mentioned:
+            entry = focus.setdefault(name, FocusItem())
+            if lowered.lstrip().startswith("ignore"):
+                entry.priority = 0.0
+            elif section_priority is not None:
+                entry.priority = section_priority
+            if stars:
+                entry.min_stars = int(stars.group(1))
+                entry.needed = (
+                    max(0, int(progress.group(2)) - int(progress.group(1)))
+                    if progress
+                    else 1
+                )
+    return focus
+
+
+def expected_successes(
+    chance: float, crafts: int, needed: Optional[int]
+) -> float:
+    """
+    Returns the expected number of useful successes of `crafts` crafts.
+
+    Each craft succeeds independently with `chance`. Without a `needed`
+    cap every success counts; with one, successes beyond it do not, i.e.
+    E[min(X, needed)] for X ~ Binomial(crafts, chance).
+    """
+    if needed is None or needed >= crafts:
+        return chance * crafts
+    # E[min(X, m)] = sum over j = 1..m of P(X >= j).
+    at_most = [
+        math.comb(crafts, k) * chance ** k * (1 - chance) ** (crafts - k)
+        for k in range(needed)
+    ]
+    return sum(1 - sum(at_most[:j]) for j in range(1, needed + 1))
+
+
+def craft_value(option: CraftOption, crafts: int) -> float:
+    """
+    Returns the priority-weighted value of crafting an item `crafts`
+    times.
+    """
+    return option.priority * expected_successes(
+        option.value_per_craft, crafts, option.needed
+    )
+
+
+def plan_crafts(options: List[CraftOption], stamina: int) -> Plan:
+    """
+    Picks how often to craft each item to get the most value from a budget.
+
+    This is a multiple-choice knapsack: for every item, one craft count is
+    chosen, worth its `craft_value`, and the counts must fit the stamina.
+    Dynamic programming over the stamina spent finds the optimum in
+    O(items * stamina * crafts per item).
+
+    Args:
+        options: The craftable items with their best decks.
+        stamina: The stamina available.
+
+    Returns:
+        Plan: The optimal crafts, highest total value first.
+
+    Raises:
+        ValueError: If an item's stamina cost is not positive.
+    """
+    # best[s] is the best value spending at most s stamina on the items so far.
+    best = [0.0] * (stamina + 1)
+    choices: List[List[int]] = []
+    for option in options:
+        if option.stamina_cost <= 0:
+            raise ValueError(
+                f"Item '{option.item_name}' must cost stamina to be planned."
+            )
+        max_crafts = stamina // option.stamina_cost
+        values = [craft_value(option, n) for n in range(max_crafts + 1)]
+        new_best = list(best)
+        chosen = [0] * (stamina + 1)
+        for spent in range(stamina + 1):
+            for n in range(1, spent // option.stamina_cost + 1):
+                value = best[spent - n * option.stamina_cost] + values[n]
+                if value > new_best[spent] + 1e-12:
+                    new_best[spent] = value
+                    chosen[spent] = n
+        best = new_best
+        choices.append(chosen)
+
+    plan = Plan(value=best[stamina])
+    spent = stamina
+    for option, chosen in zip(reversed(options), reversed(choices)):
+        n = chosen[spent]
+        if n:
+            plan.crafts.append((option, n))
+            spent -= n * option.stamina_cost
+    plan.stamina_used = stamina - spent
+    plan.crafts.sort(key=lambda craft: craft_value(*craft), reverse=True)
+    return plan
@@ -0,0 +1,94 @@
+# Standard library imports
+from collections import Counter, defaultdict
+from typing import Any, DefaultDict, Dict, List, Tuple
+
+# A profile key is ('phase', name) or ('card', card name). Extra triggers
+# of a played card have their own card rows, such as 'Forge (re-trigger)'.
+ProfileKey = Tuple[str, str]
+
+
+class SimulationProfiler:
+    """
+    Call counts and cumulative wall time per simulation phase and card.
+
+    `CardSimulator` only records into a profiler when one is enabled: the
+    phases through a separate instrumented loop and the cards through the
+    crafting instance's timed dispatch tables, so the regular simulation
+    loop is left untouched. The NumPy engines play whole batches at once
+    and only report their 'numpy batch' phase. A profiler is plain data:
+    worker processes drain theirs into each chunk's results and the main
+    process merges them.
+    """
+    def __init__(self) -> None:
+        """Initializes an empty profile."""
+        self.calls: Counter = Counter()
+        self.seconds: DefaultDict[ProfileKey, float] = defaultdict(float)
+
+    def record(self, key: ProfileKey, seconds: float, calls: int = 1) -> None:
+        """Adds time spent in a phase or card."""
+        self.calls[key] += calls
+        self.seconds[key] += seconds
+
+    def merge(self, other: "SimulationProfiler") -> None:
+        """Adds another profile's counts and times to this one."""
+        for key, seconds in other.seconds.items():
+            self.record(key, seconds, other.calls[key])
+
+    def drain(self) -> "SimulationProfiler":
+        """Returns the profile recorded so far and starts a fresh one."""
+        drained = SimulationProfiler()
+        drained.calls, drained.seconds = self.calls, self.seconds
+        self.calls, self.seconds = Counter(), defaultdict(float)
+        return drained
+
+    def __bool__(self) -> bool:
+        return bool(self.calls)
+
+    def to_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Exports the profile as JSON-friendly data.
+
+        Returns:
+            A dictionary with 'phases' and 'cards' lists, each entry holding
+            the name, call count, total seconds and microseconds per call,
+            slowest first.
+        """
+        exported: Dict[str, List[Dict[str, Any]]] = {'phases': [], 'cards': []}
+        for (kind, name), seconds in sorted(
+            self.seconds.items(), key=lambda item: item[1], reverse=True
+        ):
+            calls = self.calls[(kind, name)]
+            exported['phases' if kind == 'phase' else 'cards'].append(
+                {
+                    'name': name,
+                    'calls': calls,
+                    'seconds': seconds,
+                    'microseconds_per_call': (
+                        seconds / calls * 1e6 if calls else 0.0
+                    )
+                }
+            )
+        return exported
+
+    def format_report(self) -> str:
+        """Formats the profile as a table, slowest entries first."""
+        exported = self.to_dict()
+        total = sum(entry['seconds'] for entry in exported['phases'])
+        lines = [
+            f"{'Phase / Card':<34} {'Calls':>12} {'Total (s)':>10} "
+            f"{'us/call':>9} {'Share':>7}"
+        ]
+        for section, title in (('phases', 'phase'), ('cards', 'card')):
+            for entry in exported[section]:
+                share = entry['seconds'] / total * 100 if total else 0.0
+                lines.append(
+                    f"{title + ': ' + entry['name']:<34} "
+                    f"{entry['calls']:>12,} {entry['seconds']:>10.3f} "
+                    f"{entry['microseconds_per_call']:>9.2f} {share:>6.1f}%"
+                )
+        lines.append(
+            "Shares are of the total phase time; card time is part of the "
+            "'play cards' or 'exact evaluation' phase, and item triggers "
+            "are part of their card's time."
+        )
+        return "\n".join(lines)
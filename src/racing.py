@@ -0,0 +1,365 @@
+# Standard library imports
+import math
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+Deck = Tuple[str, ...]
+# A race metric is ('star', index), ('wish_points', None) or ('score', None).
+RaceMetric = Tuple[str, Optional[int]]
+# Runs one round: takes (deck, simulations) pairs and yields (deck,
+# score_counts).
+RoundRunner = Callable[
+    [List[Tuple[Deck, int]]], Iterable[Tuple[Deck, Counter]]
+]
+
+
+def metrics_for_report(
+    report_type: str,
+    star_thresholds: Optional[List[int]],
+    wish_points: Optional[List[int]]
+) -> List[RaceMetric]:
+    """
+    Returns the metrics a report ranks decks by.
+
+    Args:
+        report_type: Either "stars" or "wishpoints".
+        star_thresholds: The item's star thresholds, if any.
+        wish_points: The item's wish points per star count, if any.
+
+    Returns:
+        List[RaceMetric]: The metrics to race on.
+    """
+    if not star_thresholds:
+        return [('score', None)]
+    if report_type == "wishpoints" and wish_points:
+        return [('wish_points', None)]
+    return [('star', i) for i in range(len(star_thresholds))]
+
+
+def _normal_cdf(value: float) -> float:
+    """Standard normal cumulative distribution function."""
+    return 0.5 * (1.0 + math.erf(value / math.sqrt(2.0)))
+
+
+def metric_value_function(
+    metric: RaceMetric,
+    star_thresholds: Optional[List[int]],
+    wish_points: Optional[List[int]]
+) -> Callable[[float], float]:
+    """
+    Returns the per-run value of a metric as a function of the final score.
+
+    A star metric is 1 when the run reached the threshold and 0 otherwise,
+    so its mean is the star chance.
+    """
+    kind, index = metric
+    if kind == 'star':
+        threshold = star_thresholds[index]
+        return lambda score: 1.0 if score >= threshold else 0.0
+    if kind == 'wish_points':
+        def value_of(score: float) -> float:
+            stars = sum(
+                1 for threshold in star_thresholds if score >= threshold
+            )
+            return wish_points[stars]
+        return value_of
+    return lambda score: score
+
+
+def metric_statistics(
+    score_counts: Counter,
+    metric: RaceMetric,
+    star_thresholds: Optional[List[int]],
+    wish_points: Optional[List[int]],
+    z: float = 1.96
+) -> Tuple[float, float, float, float]:
+    """
+    Estimates a metric from a score distribution with a confidence interval.
+
+    Star chances use the Wilson score interval, which stays meaningful when
+    no simulation (or every simulation) reached the threshold. Means use the
+    normal approximation.
+
+    Args:
+        score_counts: A Counter mapping final scores to their frequency.
+        metric: The metric to estimate.
+        star_thresholds: The item's star thresholds, if any.
+        wish_points: The item's wish points per star count, if any.
+        z: The z-value of the confidence interval.
+
+    Returns:
+        Tuple[float, float, float, float]: The estimate, its standard error,
+            and the lower and upper confidence bounds.
+    """
+    simulations = sum(score_counts.values())
+    if simulations == 0:
+        return 0.0, math.inf, -math.inf, math.inf
+
+    kind, index = metric
+    if kind == 'star':
+        threshold = star_thresholds[index]
+        successes = sum(
+            count
+            for score, count in score_counts.items()
+            if score >= threshold
+        )
+        p = successes / simulations
+        denominator = 1 + z * z / simulations
+        center = (p + z * z / (2 * simulations)) / denominator
+        spread = math.sqrt(
+            p * (1 - p) / simulations
+            + z * z / (4 * simulations * simulations)
+        )
+        half_width = z * spread / denominator
+        return (
+            p,
+            math.sqrt(p * (1 - p) / simulations),
+            center - half_width,
+            center + half_width
+        )
+
+    value_of = metric_value_function(metric, star_thresholds, wish_points)
+    total = 0.0
+    total_squared = 0.0
+    for score, count in score_counts.items():
+        value = value_of(score)
+        total += value * count
+        total_squared += value * value * count
+    mean = total / simulations
+    variance = max(0.0, total_squared / simulations - mean * mean)
+    standard_error = math.sqrt(variance / simulations)
+    return (
+        mean,
+        standard_error,
+        mean - z * standard_error,
+        mean + z * standard_error
+    )
+
+
+def paired_statistics(
+    leader_scores: List[float],
+    runner_up_scores: List[float],
+    metric: RaceMetric,
+    star_thresholds: Optional[List[int]],
+    wish_points: Optional[List[int]],
+    block_size: int = 1
+) -> Tuple[float, float, float]:
+    """
+    Estimates the leader's advantage from runs paired across two decks.
+
+    With common random numbers, run `i` of both decks used the same random
+    stream, so the per-run differences cancel the noise the two decks share
+    and give a much tighter estimate than comparing two independent means.
+
+    Args:
+        leader_scores: The leader's final score of every run, in run order.
+        runner_up_scores: The runner-up's final scores, in the same order.
+        metric: The metric to compare on.
+        star_thresholds: The item's star thresholds, if any.
+        wish_points: The item's wish points per star count, if any.
+        block_size: How many consecutive runs form one independent unit,
+            e.g. 2 for antithetic pairs. The standard error is computed over
+            the block averages, which keeps it honest when runs inside a
+            block are correlated.
+
+    Returns:
+        Tuple[float, float, float]: The mean difference (leader minus
+            runner-up), its standard error, and the normal-approximation
+            confidence (0 to 1) that the leader is truly ahead.
+    """
+    value_of = metric_value_function(metric, star_thresholds, wish_points)
+    run_differences = [
+        value_of(a) - value_of(b)
+        for a, b in zip(leader_scores, runner_up_scores)
+    ]
+    blocks = [
+        run_differences[i:i + block_size]
+        for i in range(0, len(run_differences), block_size)
+    ]
+    differences = [sum(block) / len(block) for block in blocks]
+    if not differences:
+        return 0.0, math.inf, 0.5
+    mean = sum(differences) / len(differences)
+    squared_deviations = sum((d - mean) ** 2 for d in differences)
+    variance = squared_deviations / max(1, len(differences) - 1)
+    standard_error = math.sqrt(variance / len(differences))
+    if standard_error == 0:
+        return mean, 0.0, 1.0 if mean > 0 else 0.5
+    return mean, standard_error, _normal_cdf(mean / standard_error)
+
+
+class DeckRace:
+    """
+    Adaptive racing (successive halving) over a set of candidate decks.
+
+    Every deck starts with a small number of simulations. After each round,
+    decks whose confidence interval cannot reach the current leader on any
+    raced metric are dropped, and the survivors get twice as many
+    simulations in the next round until the budget runs out or every metric
+    has a single contender left. A metric no deck has shown it can reach
+    (every lower bound is 0, e.g. a star level no run reached yet) keeps no
+    deck alive, so an unreachable top star cannot stall the race.
+    """
+    def __init__(
+        self,
+        metrics: List[RaceMetric],
+        star_thresholds: Optional[List[int]] = None,
+        wish_points: Optional[List[int]] = None,
+        initial_simulations: int = 250,
+        max_simulations: int = 20000,
+        budget_per_deck: int = 1000,
+        z: float = 1.96
+    ) -> None:
+        """
+        Initializes the race.
+
+        Args:
+            metrics: The metrics a deck can win on.
+            star_thresholds: The item's star thresholds, if any.
+            wish_points: The item's wish points per star count, if any.
+            initial_simulations: Simulations per deck in the first round.
+            max_simulations: The most simulations any single deck receives.
+            budget_per_deck: The total simulation budget, expressed as an
+                average per starting deck.
+            z: The z-value used for the elimination confidence intervals.
+        """
+        self.metrics = metrics
+        self.star_thresholds = star_thresholds
+        self.wish_points = wish_points
+        self.initial_simulations = initial_simulations
+        self.max_simulations = max_simulations
+        self.budget_per_deck = budget_per_deck
+        self.z = z
+        self.score_counts: Dict[Deck, Counter] = {}
+        self.survivors: List[Deck] = []
+        self.rounds = 0
+
+    def _statistics(
+        self, deck: Deck, metric: RaceMetric
+    ) -> Tuple[float, float, float, float]:
+        return metric_statistics(
+            self.score_counts[deck],
+            metric,
+            self.star_thresholds,
+            self.wish_points,
+            self.z
+        )
+
+    def _contenders(
+        self, decks: List[Deck], metric: RaceMetric
+    ) -> Optional[List[Deck]]:
+        """
+        Returns the decks whose upper bound still reaches the best lower
+        bound, or None when no lower bound is positive yet: every upper
+        bound reaches 0, so the metric cannot tell the decks apart.
+        """
+        stats = {deck: self._statistics(deck, metric) for deck in decks}
+        best_lower = max(lower for _, _, lower, _ in stats.values())
+        if best_lower <= 0:
+            return None
+        return [deck for deck in decks if stats[deck][3] >= best_lower]
+
+    def simulations_for(self, deck: Deck) -> int:
+        """Returns how many simulations a deck received in total."""
+        return sum(self.score_counts.get(deck, Counter()).values())
+
+    def run(
+        self, decks: Iterable[Deck], run_round: RoundRunner
+    ) -> Dict[Deck, Counter]:
+        """
+        Races the decks and returns every deck's merged score distribution.
+
+        Args:
+            decks: The candidate decks.
+            run_round: A callable evaluating a list of (deck, simulations)
+                pairs and yielding (deck, score_counts) results.
+
+        Returns:
+            Dict[Deck, Counter]: The score distribution of every deck,
+                including the ones eliminated early.
+        """
+        survivors = list(decks)
+        self.score_counts = {deck: Counter() for deck in survivors}
+        budget_left = self.budget_per_deck * len(survivors)
+        round_simulations = self.initial_simulations
+
+        while survivors and budget_left > 0:
+            per_deck = min(round_simulations, budget_left // len(survivors))
+            tasks = []
+            for deck in survivors:
+                simulations = min(
+                    per_deck, self.max_simulations - self.simulations_for(deck)
+                )
+                if simulations > 0:
+                    tasks.append((deck, simulations))
+            if not tasks:
+                break
+
+            for deck, score_counts in run_round(tasks):
+                self.score_counts[deck].update(score_counts)
+            budget_left -= sum(simulations for _, simulations in tasks)
+            self.rounds += 1
+
+            # Metrics no deck has reached yet cannot eliminate anyone.
+            contenders_per_metric = [
+                contenders
+                for contenders in (
+                    self._contenders(survivors, metric)
+                    for metric in self.metrics
+                )
+                if contenders is not None
+            ]
+            if contenders_per_metric:
+                still_contending = set().union(*contenders_per_metric)
+                survivors = [
+                    deck for deck in survivors if deck in still_contending
+                ]
+            print(
+                f"Round {self.rounds}: {len(tasks)} decks x {per_deck} sims, "
+                f"{len(survivors)} still in contention."
+            )
+
+            if contenders_per_metric and all(
+                len(contenders) == 1 for contenders in contenders_per_metric
+            ):
+                break
+            round_simulations *= 2
+
+        self.survivors = survivors
+        return self.score_counts
+
+    def ranking_confidence(
+        self, metric: RaceMetric
+    ) -> Tuple[Optional[Deck], float]:
+        """
+        Estimates how confident the race is in the leader of a metric.
+
+        The confidence is the normal-approximation probability that the
+        leader's true value is above the runner-up's.
+
+        Args:
+            metric: The metric to rank by.
+
+        Returns:
+            Tuple[Optional[Deck], float]: The leading deck and the confidence
+                (0.5 to 1.0) that it beats the runner-up.
+        """
+        ranked = sorted(
+            (
+                (self._statistics(deck, metric), deck)
+                for deck in self.score_counts
+                if self.simulations_for(deck)
+            ),
+            key=lambda item: item[0][0],
+            reverse=True
+        )
+        if not ranked:
+            return None, 0.0
+        (leader_mean, leader_se, _, _), leader = ranked[0]
+        if len(ranked) == 1:
+            return leader, 1.0
+        (runner_mean, runner_se, _, _), _ = ranked[1]
+        spread = math.sqrt(leader_se ** 2 + runner_se ** 2)
+        if spread == 0:
+            return leader, 1.0 if leader_mean > runner_mean else 0.5
+        return leader, _normal_cdf((leader_mean - runner_mean) / spread)
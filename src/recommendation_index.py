@@ -0,0 +1,332 @@
+# Standard library imports
+import json
+import math
+import mmap
+import os
+import struct
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Local application imports
+from result_store import fingerprint
+
+# The file starts with the magic, the format version and the header length.
+INDEX_MAGIC = b"AFKIDX"
+# Bumped whenever the layout of the index file changes.
+INDEX_FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<6sHI")
+
+REPORT_TYPES = ("stars", "wishpoints")
+
+# Flags of a deck table record.
+FLAG_EXACT = 1
+FLAG_PRUNED = 2
+
+
+def index_fingerprint(item_data: dict, run_fingerprint: Optional[str]) -> str:
+    """
+    Fingerprints what an item's indexed reports depend on.
+
+    Args:
+        item_data: The item's entry in items.json.
+        run_fingerprint: The fingerprint of the item's crafting type and the
+            simulation settings (see `main.run_fingerprints`).
+
+    Returns:
+        str: A fingerprint that changes whenever the item's reports could.
+    """
+    relevant_fields = {
+        field: item_data.get(field)
+        for field in (
+            'crafting_type',
+            'buff_id',
+            'deck_size',
+            'star_thresholds',
+            'wish_points',
+            'stamina_cost'
+        )
+    }
+    return fingerprint(run_fingerprint, relevant_fields, INDEX_FORMAT_VERSION)
+
+
+def _record_struct(num_cards: int, num_stars: int) -> struct.Struct:
+    # Card counts, mean score (NaN when unknown, for pruned decks), star
+    # chances, expected wish points, flags.
+    return struct.Struct(f"<{num_cards}B{num_stars + 2}fB")
+
+
+def make_index_entry(
+    simulator: Any, item_result: Dict[str, Any], size: int
+) -> Dict[str, Any]:
+    """
+    Collects what the index keeps of an evaluated item.
+
+    Args:
+        simulator: The `CardSimulator` that evaluated the item, created with
+            `keep_deck_table=True`.
+        item_result: The item's result, as returned by
+            `main.run_simulation_for_item`.
+        size: The item's deck size.
+
+    Returns:
+        Dict[str, Any]: The item's result for every report type, ranked from
+            the one evaluation, and its deck metric table.
+    """
+    return {
+        'reports': {
+            report_type: dict(
+                item_result,
+                results={size: simulator.report(size, report_type)}
+            )
+            for report_type in REPORT_TYPES
+        },
+        'cards': simulator.crafting.get_card_names(),
+        'num_stars': len(item_result.get('star_thresholds') or []),
+        'table': [
+            (
+                simulator.crafting.encode_deck(
+                    tuple(deck_info['deck'].elements())
+                ),
+                deck_info
+            )
+            for deck_info in simulator.deck_tables[size]
+        ],
+    }
+
+
+def write_index(
+    path: str,
+    entries: Dict[str, Dict[str, Any]],
+    fingerprints: Dict[str, str],
+    settings: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Writes a recommendation index file.
+
+    The file holds a small JSON header, then per item a JSON blob of its
+    reports and a table of fixed-size binary records, one per deck. Readers
+    memory-map the file and only decode the parts a query touches. The file
+    is written to a temporary path first, so readers never see half of it.
+
+    Args:
+        path: The index file to write.
+        entries: Item names mapped to entries from `make_index_entry`.
+        fingerprints: Item names mapped to their `index_fingerprint`.
+        settings: The simulation settings the entries were built with
+            (see `SimulationSettings.distribution_fields`), kept in the
+            header to tell readers why an entry went stale.
+    """
+    blobs: List[bytes] = []
+    items: Dict[str, Dict[str, Any]] = {}
+    offset = 0
+    for item_name, entry in entries.items():
+        reports = json.dumps(entry['reports'], default=dict).encode("utf-8")
+        record = _record_struct(len(entry['cards']), entry['num_stars'])
+        table = bytearray()
+        for counts, deck_info in entry['table']:
+            chances = [
+                deck_info['star_chances'].get(f"{i + 1}_star", 0.0)
+                for i in range(entry['num_stars'])
+            ]
+            flags = (FLAG_EXACT if deck_info.get('exact') else 0) | (
+                FLAG_PRUNED if deck_info.get('pruned') else 0
+            )
+            score = deck_info['score']
+            table += record.pack(
+                *counts,
+                math.nan if score is None else score,
+                *chances,
+                deck_info['expected_wish_points'],
+                flags
+            )
+        items[item_name] = {
+            'fingerprint': fingerprints[item_name],
+            'cards': entry['cards'],
+            'num_stars': entry['num_stars'],
+            'reports_offset': offset,
+            'reports_length': len(reports),
+            'table_offset': offset + len(reports),
+            'table_records': len(entry['table']),
+        }
+        blobs += [reports, bytes(table)]
+        offset += len(reports) + len(table)
+
+    header = json.dumps({'items': items, 'settings': settings}).encode(
+        "utf-8"
+    )
+    temporary_path = f"{path}.tmp"
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(temporary_path, "wb") as f:
+        f.write(_PREAMBLE.pack(INDEX_MAGIC, INDEX_FORMAT_VERSION, len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(temporary_path, path)
+
+
+class RecommendationIndex:
+    """
+    A memory-mapped recommendation index written by `write_index`.
+
+    Opening an index only parses its header; an item's reports and deck
+    table are decoded from the mapping when asked for.
+    """
+    def __init__(self, path: str) -> None:
+        """
+        Opens an index file.
+
+        Args:
+            path: The index file.
+
+        Raises:
+            OSError: If the file cannot be opened.
+            ValueError: If the file is not an index of this format version.
+        """
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, header_length = _PREAMBLE.unpack_from(self._map, 0)
+        except struct.error:
+            self._map.close()
+            raise ValueError(f"'{path}' is not a recommendation index.")
+        if magic != INDEX_MAGIC or version != INDEX_FORMAT_VERSION:
+            self._map.close()
+            raise ValueError(
+                f"'{path}' is not a recommendation index of format version "
+                f"{INDEX_FORMAT_VERSION}."
+            )
+        self._body_offset = _PREAMBLE.size + header_length
+        header = json.loads(self._map[_PREAMBLE.size:self._body_offset])
+        self.items: Dict[str, Dict[str, Any]] = header['items']
+        # The simulation settings the index was built with, if recorded.
+        self.settings: Optional[Dict[str, Any]] = header.get('settings')
+
+    def is_fresh(self, item_name: str, item_fingerprint: str) -> bool:
+        """
+        Tells whether an item is indexed for its current data and
+        settings.
+        """
+        entry = self.items.get(item_name)
+        return entry is not None and entry['fingerprint'] == item_fingerprint
+
+    def stale_reason(
+        self,
+        item_name: str,
+        item_fingerprint: str,
+        settings: Dict[str, Any]
+    ) -> Optional[str]:
+        """
+        Explains why an item's entry is not fresh.
+
+        Args:
+            item_name: The item.
+            item_fingerprint: The item's current `index_fingerprint`.
+            settings: The current simulation settings (see
+                `SimulationSettings.distribution_fields`).
+
+        Returns:
+            Optional[str]: None when the entry is fresh; otherwise which
+                settings differ from the ones the index was built with,
+                e.g. "seed 7 -> 0", or that the item is not indexed or
+                its item or card data changed.
+        """
+        if self.is_fresh(item_name, item_fingerprint):
+            return None
+        if item_name not in self.items:
+            return "not indexed"
+        if self.settings is None:
+            return "built with unknown settings"
+        changed = [
+            f"{field} {self.settings.get(field)} -> {value}"
+            for field, value in settings.items()
+            if self.settings.get(field) != value
+        ]
+        if not changed:
+            return "item or card data changed"
+        return ", ".join(changed)
+
+    def report(self, item_name: str, report_type: str) -> Dict[str, Any]:
+        """
+        Returns an indexed item result, shaped like the results of
+        `main.run_simulation_for_item`.
+
+        Raises:
+            KeyError: If the item or report type is not indexed.
+        """
+        entry = self.items[item_name]
+        start = self._body_offset + entry['reports_offset']
+        result = json.loads(
+            self._map[start:start + entry['reports_length']]
+        )[report_type]
+        results = {}
+        for size, decks in result['results'].items():
+            if isinstance(decks, dict):
+                decks = {
+                    star_key: dict(deck_info, deck=Counter(deck_info['deck']))
+                    for star_key, deck_info in decks.items()
+                }
+            else:
+                decks = [
+                    dict(deck_info, deck=Counter(deck_info['deck']))
+                    for deck_info in decks
+                ]
+            results[int(size)] = decks
+        result['results'] = results
+        return result
+
+    def deck_table(
+        self, item_name: str
+    ) -> Iterator[Tuple[Counter, Dict[str, Any]]]:
+        """
+        Yields the metrics of every deck evaluated for an item.
+
+        Yields:
+            (deck, metrics) pairs, where metrics hold the mean 'score'
+            (None for pruned decks, whose score is unknown), the
+            'star_chances' percentages, the 'expected_wish_points' and the
+            'exact' and 'pruned' flags.
+
+        Raises:
+            KeyError: If the item is not indexed.
+        """
+        entry = self.items[item_name]
+        cards, num_stars = entry['cards'], entry['num_stars']
+        record = _record_struct(len(cards), num_stars)
+        start = self._body_offset + entry['table_offset']
+        end = start + record.size * entry['table_records']
+        table = memoryview(self._map)[start:end]
+        try:
+            for values in record.iter_unpack(table):
+                deck = Counter(
+                    {
+                        card: count
+                        for card, count in zip(cards, values)
+                        if count
+                    }
+                )
+                metrics = values[len(cards):]
+                flags = metrics[-1]
+                yield deck, {
+                    'score': None if math.isnan(metrics[0]) else metrics[0],
+                    'star_chances': {
+                        f"{i + 1}_star": chance
+                        for i, chance in enumerate(metrics[1:1 + num_stars])
+                    },
+                    'expected_wish_points': metrics[1 + num_stars],
+                    'exact': bool(flags & FLAG_EXACT),
+                    'pruned': bool(flags & FLAG_PRUNED),
+                }
+        finally:
+            table.release()
+
+    def close(self) -> None:
+        """Unmaps the file."""
+        self._map.close()
+
+    def __enter__(self) -> "RecommendationIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,205 @@
+# Standard library imports
+import hashlib
+import json
+import os
+import sqlite3
+from collections import Counter
+from typing import Any, Dict, Optional
+
+# Local application imports
+from score_cache import DistributionKey, ScoreDistributionCache
+
+# Bumped whenever the layout of the stored rows changes.
+STORE_FORMAT_VERSION = 1
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Hashes JSON-serializable parts into a stable hexadecimal fingerprint.
+
+    Dictionaries are serialized with sorted keys, so reordering keys in
+    cards.json does not change the fingerprint.
+
+    Args:
+        *parts: The values that identify what is being fingerprinted.
+
+    Returns:
+        str: A SHA-256 hex digest.
+    """
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _encode_item_result(result: Dict[str, Any]) -> str:
+    """Serializes an item's result; deck Counters become plain dicts."""
+    return json.dumps(result, default=dict)
+
+
+def _decode_item_result(payload: str) -> Dict[str, Any]:
+    """Restores an item's result, including the integer deck-size keys."""
+    result = json.loads(payload)
+    result['results'] = {
+        int(size): decks for size, decks in result.get('results', {}).items()
+    }
+    return result
+
+
+class ResultStore(ScoreDistributionCache):
+    """
+    A `ScoreDistributionCache` persisted to an SQLite file.
+
+    Every distribution is written as soon as it is simulated, so an
+    interrupted batch run can be resumed and only simulates the decks it
+    had not reached. Rows are keyed by a hash of the deck cache key and the
+    run fingerprint of its crafting type (card definitions, engine,
+    simulation count, seed...). Changing any of those leaves the old rows
+    unused instead of returning stale results.
+
+    Finished item results are stored as well, keyed by an item fingerprint,
+    so an unchanged item is reported without being re-scored at all.
+    """
+    def __init__(self, path: str, run_fingerprints: Dict[str, str]) -> None:
+        """
+        Opens (or creates) the store.
+
+        Args:
+            path: The SQLite file to use; its directory is created if needed.
+            run_fingerprints: The run fingerprint of each crafting type.
+        """
+        super().__init__()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.run_fingerprints = run_fingerprints
+        self.loaded = 0
+        self.stored = 0
+        self.items_reused = 0
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS distributions ("
+            "row_key TEXT PRIMARY KEY, score_counts TEXT NOT NULL, "
+            "exact INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = [
+            row[1]
+            for row in self._connection.execute(
+                "PRAGMA table_info(distributions)"
+            )
+        ]
+        if 'exact' not in columns:
+            # Stores written before exact results were flagged read as sampled.
+            self._connection.execute(
+                "ALTER TABLE distributions "
+                "ADD COLUMN exact INTEGER NOT NULL DEFAULT 0"
+            )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS item_results ("
+            "item_key TEXT PRIMARY KEY, result TEXT NOT NULL)"
+        )
+        self._connection.commit()
+
+    def _row_key(self, key: DistributionKey) -> str:
+        crafting_type, buff_id, deck = key
+        return fingerprint(
+            STORE_FORMAT_VERSION,
+            self.run_fingerprints.get(crafting_type),
+            buff_id,
+            list(deck)
+        )
+
+    def _load(self, key: DistributionKey) -> Optional[Counter]:
+        """Reads a distribution from disk into memory, if it was stored."""
+        row = self._connection.execute(
+            "SELECT score_counts, exact FROM distributions WHERE row_key = ?",
+            (self._row_key(key),)
+        ).fetchone()
+        if row is None:
+            return None
+        score_counts = Counter(
+            {score: count for score, count in json.loads(row[0])}
+        )
+        self._distributions[key] = score_counts
+        if row[1]:
+            self._exact.add(key)
+        self.loaded += 1
+        return score_counts
+
+    def get(self, key: DistributionKey) -> Optional[Counter]:
+        """
+        Returns a distribution from memory or disk; see
+        `ScoreDistributionCache.get`.
+        """
+        if key not in self._distributions:
+            self._load(key)
+        return super().get(key)
+
+    def put(
+        self, key: DistributionKey, score_counts: Counter, exact: bool = False
+    ) -> None:
+        """Stores a distribution in memory and commits it to disk."""
+        super().put(key, score_counts, exact)
+        self._connection.execute(
+            "INSERT OR REPLACE INTO distributions "
+            "(row_key, score_counts, exact) VALUES (?, ?, ?)",
+            (
+                self._row_key(key),
+                json.dumps(sorted(score_counts.items())),
+                int(exact)
+            )
+        )
+        self._connection.commit()
+        self.stored += 1
+
+    def get_item_result(self, item_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the stored result of an item, if its fingerprint is unchanged.
+
+        Args:
+            item_key: The item fingerprint.
+
+        Returns:
+            Optional[Dict[str, Any]]: The result `run_simulation_for_item`
+                returned, or None if it was never stored.
+        """
+        row = self._connection.execute(
+            "SELECT result FROM item_results WHERE item_key = ?",
+            (fingerprint(STORE_FORMAT_VERSION, item_key),)
+        ).fetchone()
+        if row is None:
+            return None
+        self.items_reused += 1
+        return _decode_item_result(row[0])
+
+    def put_item_result(self, item_key: str, result: Dict[str, Any]) -> None:
+        """
+        Stores the finished result of an item.
+
+        Args:
+            item_key: The item fingerprint.
+            result: The result `run_simulation_for_item` returned.
+        """
+        self._connection.execute(
+            "INSERT OR REPLACE INTO item_results "
+            "(item_key, result) VALUES (?, ?)",
+            (
+                fingerprint(STORE_FORMAT_VERSION, item_key),
+                _encode_item_result(result)
+            )
+        )
+        self._connection.commit()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._distributions or self._load(key) is not None
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        self._connection.close()
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,242 @@
+# Standard library imports
+import multiprocessing
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from tqdm import tqdm
+
+# Local application imports
+from profiling import SimulationProfiler
+from score_cache import DistributionKey, ScoreDistributionCache
+from simulator import MAX_CHUNK_SIZE, CardSimulator
+
+# Measured Python engine time per card play of one simulation run, in
+# microseconds. Only the ratios matter: they order the jobs of a batch.
+CARD_COST_MICROSECONDS = {
+    'forging': 2.4,
+    'kitchen': 3.5,
+    'alchemy': 5.0,
+}
+DEFAULT_CARD_COST_MICROSECONDS = 4.0
+# The per-run time that does not depend on the deck: reset, shuffle, scoring.
+RUN_OVERHEAD_MICROSECONDS = 1.0
+
+# Like `simulator._chunk_size`, aim for about four chunks per worker.
+CHUNKS_PER_WORKER = 4
+
+# The simulators of the current worker process, one per (crafting type,
+# buff) group, installed once by the pool initializer.
+_worker_simulators: List[CardSimulator] = []
+
+# A scheduled job: estimated cost, simulator group, deck and cache key.
+Job = Tuple[float, int, Tuple[str, ...], DistributionKey]
+
+
+def estimate_deck_cost(
+    crafting_type: Optional[str], deck_size: int, simulations: int
+) -> float:
+    """
+    Estimates the seconds one deck evaluation takes on one worker.
+
+    Args:
+        crafting_type: The deck's crafting type, e.g. "forging".
+        deck_size: The number of cards in the deck.
+        simulations: The number of simulation runs of the deck.
+
+    Returns:
+        float: The estimated evaluation time.
+    """
+    card_cost = CARD_COST_MICROSECONDS.get(
+        crafting_type or '', DEFAULT_CARD_COST_MICROSECONDS
+    )
+    return (
+        simulations
+        * (RUN_OVERHEAD_MICROSECONDS + card_cost * deck_size)
+        * 1e-6
+    )
+
+
+def _init_batch_worker(simulators: List[CardSimulator]) -> None:
+    """
+    Pool initializer that keeps every group's simulator for the worker's
+    lifetime.
+    """
+    global _worker_simulators
+    _worker_simulators = simulators
+
+
+def _evaluate_batch_chunk(
+    chunk: List[Tuple[int, Tuple[int, ...]]]
+) -> Tuple[List[Tuple[Counter, bool]], Optional[SimulationProfiler]]:
+    """
+    Evaluates a chunk of scheduled decks in a worker process.
+
+    Args:
+        chunk: (group, deck counts) pairs, where group indexes the worker's
+            simulators and the counts come from `BaseCrafting.encode_deck`.
+
+    Returns:
+        The score distribution of every deck in the chunk and whether it is
+        exact, and the profile recorded while evaluating them when profiling
+        is enabled.
+    """
+    results = []
+    for group, counts in chunk:
+        simulator = _worker_simulators[group]
+        eval_results = simulator.evaluate_deck(
+            simulator.crafting.decode_deck(counts)
+        )
+        results.append(
+            (eval_results['score_counts'], eval_results.get('exact', False))
+        )
+    profile = None
+    for simulator in _worker_simulators:
+        if simulator.profiler is not None:
+            if profile is None:
+                profile = SimulationProfiler()
+            profile.merge(simulator.profiler.drain())
+    return results, profile
+
+
+class BatchScheduler:
+    """
+    Evaluates the decks of many items on one pool, longest jobs first.
+
+    Evaluating a batch item by item forks a pool per item, and every item
+    ends with a tail where most workers idle while the last chunks finish.
+    The scheduler instead collects the pending decks of every item, runs
+    each distinct deck once (items sharing a crafting type and buff share
+    distributions), and dispatches them in decreasing order of estimated
+    cost, so the cheap decks fill in the gaps at the very end of the batch.
+    Each distribution goes into the shared score cache, where the items'
+    own `find_best_decks` calls then re-score it without simulating.
+    """
+    def __init__(
+        self,
+        score_cache: ScoreDistributionCache,
+        coordinator: Optional[Any] = None,
+        profiler: Optional[SimulationProfiler] = None
+    ) -> None:
+        """
+        Initializes an empty schedule.
+
+        Args:
+            score_cache: The cache the evaluated distributions are stored in.
+            coordinator: Evaluates the decks on its workers instead of a local
+                process pool; see `CardSimulator`.
+            profiler: Receives the workers' profiles when the simulators
+                profile.
+        """
+        self.score_cache = score_cache
+        self.coordinator = coordinator
+        self.profiler = profiler
+        self._simulators: List[CardSimulator] = []
+        self._groups: Dict[Tuple[str, Optional[str]], int] = {}
+        self._jobs: Dict[DistributionKey, Job] = {}
+
+    def add(self, simulator: CardSimulator, size: int) -> int:
+        """
+        Schedules the decks of a size that a simulator has yet to evaluate.
+
+        Args:
+            simulator: An item's simulator, using the scheduler's score cache.
+            size: The item's deck size.
+
+        Returns:
+            int: How many new decks were scheduled; decks already scheduled
+                for another item of the same group are not counted.
+        """
+        group_key = (simulator.crafting_type or '', simulator.active_buff_id)
+        if group_key not in self._groups:
+            self._groups[group_key] = len(self._simulators)
+            self._simulators.append(simulator)
+        group = self._groups[group_key]
+        cost = estimate_deck_cost(
+            simulator.crafting_type, size, simulator.simulations
+        )
+        added = 0
+        for deck in simulator.pending_decks(size):
+            key = ScoreDistributionCache.make_key(*group_key, deck)
+            if key not in self._jobs:
+                self._jobs[key] = (cost, group, deck, key)
+                added += 1
+        return added
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def _chunks(self, jobs: List[Job], num_workers: int) -> List[List[Job]]:
+        """Groups jobs in order into chunks of about equal estimated cost."""
+        budget = sum(job[0] for job in jobs) / (
+            num_workers * CHUNKS_PER_WORKER
+        )
+        chunks: List[List[Job]] = []
+        chunk: List[Job] = []
+        chunk_cost = 0.0
+        for job in jobs:
+            chunk.append(job)
+            chunk_cost += job[0]
+            if chunk_cost >= budget or len(chunk) == MAX_CHUNK_SIZE:
+                chunks.append(chunk)
+                chunk = []
+                chunk_cost = 0.0
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def run(self) -> int:
+        """
+        Evaluates every scheduled deck and stores its distribution.
+
+        Results are stored as each chunk finishes, so with a persistent
+        `ResultStore` an interrupted batch resumes where it stopped.
+
+        Returns:
+            int: The number of decks evaluated.
+        """
+        if not self._jobs:
+            return 0
+        # Longest first; sorting is stable, so equal costs keep item order.
+        jobs = sorted(
+            self._jobs.values(), key=lambda job: job[0], reverse=True
+        )
+        self._jobs = {}
+        if self.coordinator is not None:
+            num_workers = self.coordinator.capacity()
+            pool = self.coordinator.make_pool(
+                self._simulators, _init_batch_worker
+            )
+        else:
+            num_workers = multiprocessing.cpu_count()
+            pool = multiprocessing.Pool(
+                num_workers,
+                initializer=_init_batch_worker,
+                initargs=(self._simulators,)
+            )
+        max_in_flight = num_workers * 2
+
+        with pool, tqdm(total=len(jobs), desc="Evaluating decks") as progress:
+            def store(chunk: List[Job], async_result: Any) -> None:
+                chunk_results, profile = async_result.get()
+                if profile is not None and self.profiler is not None:
+                    self.profiler.merge(profile)
+                for (_, _, _, key), (score_counts, exact) in zip(
+                    chunk, chunk_results
+                ):
+                    self.score_cache.put(key, score_counts, exact)
+                progress.update(len(chunk))
+
+            pending: deque = deque()
+            for chunk in self._chunks(jobs, num_workers):
+                tasks = [
+                    (group, self._simulators[group].crafting.encode_deck(deck))
+                    for _, group, deck, _ in chunk
+                ]
+                pending.append(
+                    (chunk, pool.apply_async(_evaluate_batch_chunk, (tasks,)))
+                )
+                if len(pending) >= max_in_flight:
+                    store(*pending.popleft())
+            while pending:
+                store(*pending.popleft())
+        return len(jobs)
@@ -0,0 +1,84 @@
+# Standard library imports
+from collections import Counter
+from typing import Dict, Optional, Set, Tuple
+
+# A cache key identifies everything that shapes a deck's score distribution.
+# Star thresholds and wish points are deliberately not part of it.
+DistributionKey = Tuple[str, Optional[str], Tuple[str, ...]]
+
+
+class ScoreDistributionCache:
+    """
+    A run-scoped store of per-deck final score distributions.
+
+    Items that share a crafting type and buff (for example the plain forging
+    armors) produce identical score distributions for the same deck; only
+    their star thresholds and wish points differ. Caching the distribution
+    lets every such item be scored after a single simulation per deck.
+    """
+    def __init__(self) -> None:
+        """Initializes an empty cache."""
+        self._distributions: Dict[DistributionKey, Counter] = {}
+        # The keys whose distribution was computed exactly rather than sampled.
+        self._exact: Set[DistributionKey] = set()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        crafting_type: str, buff_id: Optional[str], deck: Tuple[str, ...]
+    ) -> DistributionKey:
+        """
+        Builds the cache key for a deck.
+
+        Args:
+            crafting_type: The name of the crafting type, e.g. "forging".
+            buff_id: The active special item buff, or None.
+            deck: The deck as a tuple of card names.
+
+        Returns:
+            DistributionKey: A hashable key independent of card order.
+        """
+        return (crafting_type, buff_id, tuple(sorted(deck)))
+
+    def get(self, key: DistributionKey) -> Optional[Counter]:
+        """
+        Returns the cached score distribution for a key, if present.
+
+        Args:
+            key: A key built with `make_key`.
+
+        Returns:
+            Optional[Counter]: The score counts, or None on a cache miss.
+        """
+        score_counts = self._distributions.get(key)
+        if score_counts is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return score_counts
+
+    def put(
+        self, key: DistributionKey, score_counts: Counter, exact: bool = False
+    ) -> None:
+        """
+        Stores the score distribution of a deck.
+
+        Args:
+            key: A key built with `make_key`.
+            score_counts: A Counter mapping final scores to their frequency.
+            exact: Whether the distribution is exact (see `ExactEvaluator`).
+        """
+        self._distributions[key] = score_counts
+        if exact:
+            self._exact.add(key)
+
+    def is_exact(self, key: DistributionKey) -> bool:
+        """Tells whether the distribution stored for a key is exact."""
+        return key in self._exact
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._distributions
+
+    def __len__(self) -> int:
+        return len(self._distributions)
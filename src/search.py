@@ -0,0 +1,272 @@
+# Standard library imports
+import random
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Local application imports
+from racing import RaceMetric, metric_statistics
+
+Deck = Tuple[str, ...]
+# Evaluates (deck, simulations) pairs on a random stream and yields
+# (deck, score_counts).
+StreamEvaluator = Callable[
+    [List[Tuple[Deck, int]], int], Iterable[Tuple[Deck, Counter]]
+]
+
+# The random streams screening and finalist simulations are drawn from.
+SCREENING_STREAM = 0
+FINAL_STREAM = 1
+
+DEFAULT_SCREENING_SIMULATIONS = 250
+DEFAULT_MAX_EVALUATIONS = 2000
+
+
+class DeckSearch:
+    """
+    Heuristic deck search for pools too large to enumerate.
+
+    Several hill climbers walk the deck space at once. A neighbour of a deck
+    swaps one of its cards for another card that still has copies left, so
+    every deck visited respects the card quantities. Each step screens all
+    unseen neighbours of every climber with a few simulations and moves each
+    climber to its best neighbour; a climber that cannot improve has reached
+    a local optimum and restarts from a random unseen deck. Climbers take
+    turns optimizing each metric, so every star level gets its own climbs.
+
+    When the evaluation or time budget runs out, the best screened decks of
+    every metric are simulated again with the full number of simulations,
+    and only those finalists are reported.
+    """
+    def __init__(
+        self,
+        metrics: List[RaceMetric],
+        card_quantities: List[Tuple[str, int]],
+        size: int,
+        star_thresholds: Optional[List[int]] = None,
+        wish_points: Optional[List[int]] = None,
+        rng: Optional[random.Random] = None,
+        screening_simulations: int = DEFAULT_SCREENING_SIMULATIONS,
+        final_simulations: int = 5000,
+        climbers: int = 4,
+        finalists: int = 3,
+        max_evaluations: int = DEFAULT_MAX_EVALUATIONS,
+        time_limit: Optional[float] = None
+    ) -> None:
+        """
+        Initializes the search.
+
+        Args:
+            metrics: The metrics decks are ranked by.
+            card_quantities: (card name, quantity) of every card, in the
+                order of the card definitions.
+            size: The number of cards in each deck.
+            star_thresholds: The item's star thresholds, if any.
+            wish_points: The item's wish points per star count, if any.
+            rng: The generator for starting decks; None draws unseeded.
+            screening_simulations: Simulations per deck while climbing.
+            final_simulations: Simulations per finalist.
+            climbers: How many hill climbers run side by side.
+            finalists: How many of the best screened decks per metric are
+                simulated again in full.
+            max_evaluations: The most decks screened.
+            time_limit: The most seconds spent climbing, or None for no limit.
+        """
+        self.metrics = metrics
+        self.names = [name for name, _ in card_quantities]
+        self.quantities = [quantity for _, quantity in card_quantities]
+        self.size = size
+        self.star_thresholds = star_thresholds
+        self.wish_points = wish_points
+        self.rng = rng or random.Random()
+        self.screening_simulations = screening_simulations
+        self.final_simulations = final_simulations
+        self.climbers = climbers
+        self.finalists = finalists
+        self.max_evaluations = max_evaluations
+        self.time_limit = time_limit
+        self.screened: Dict[Deck, Counter] = {}
+        self.score_counts: Dict[Deck, Counter] = {}
+        self.iterations = 0
+        self.restarts = 0
+        self.local_optima: Set[Deck] = set()
+
+    def _decode(self, counts: Tuple[int, ...]) -> Deck:
+        deck: Deck = ()
+        for name, count in zip(self.names, counts):
+            deck += (name,) * count
+        return deck
+
+    def _encode(self, deck: Deck) -> Tuple[int, ...]:
+        counts = Counter(deck)
+        return tuple(counts[name] for name in self.names)
+
+    def neighbours(self, deck: Deck) -> List[Deck]:
+        """Returns every deck that differs from `deck` by swapping one card."""
+        counts = self._encode(deck)
+        result = []
+        for removed, removed_count in enumerate(counts):
+            if removed_count == 0:
+                continue
+            for added, added_count in enumerate(counts):
+                if added == removed or added_count >= self.quantities[added]:
+                    continue
+                swapped = list(counts)
+                swapped[removed] -= 1
+                swapped[added] += 1
+                result.append(self._decode(tuple(swapped)))
+        return result
+
+    def random_deck(self, attempts: int = 100) -> Optional[Deck]:
+        """
+        Draws a random deck that has not been screened yet.
+
+        Returns:
+            Optional[Deck]: The deck, or None when `attempts` draws only
+                found decks already screened (or the pool is too small).
+        """
+        pool = [
+            name
+            for name, quantity in zip(self.names, self.quantities)
+            for _ in range(quantity)
+        ]
+        if len(pool) < self.size:
+            return None
+        for _ in range(attempts):
+            deck = self._decode(
+                self._encode(tuple(self.rng.sample(pool, self.size)))
+            )
+            if deck not in self.screened:
+                return deck
+        return None
+
+    def value(self, deck: Deck, metric: RaceMetric) -> float:
+        """Returns a deck's screened estimate of a metric."""
+        return metric_statistics(
+            self.screened[deck], metric, self.star_thresholds, self.wish_points
+        )[0]
+
+    def _out_of_budget(self, started: float) -> bool:
+        if len(self.screened) >= self.max_evaluations:
+            return True
+        return (
+            self.time_limit is not None
+            and time.monotonic() - started >= self.time_limit
+        )
+
+    def _screen(self, decks: List[Deck], evaluate: StreamEvaluator) -> None:
+        """
+        Screens the unseen decks among `decks`, within the evaluation
+        budget.
+        """
+        pending = [
+            deck for deck in dict.fromkeys(decks) if deck not in self.screened
+        ]
+        pending = pending[:max(0, self.max_evaluations - len(self.screened))]
+        if not pending:
+            return
+        for deck, score_counts in evaluate(
+            [(deck, self.screening_simulations) for deck in pending],
+            SCREENING_STREAM
+        ):
+            self.screened[deck] = score_counts
+
+    def run(self, evaluate: StreamEvaluator) -> Dict[Deck, Counter]:
+        """
+        Searches the deck space and returns the finalists' distributions.
+
+        Args:
+            evaluate: A callable evaluating a list of (deck, simulations)
+                pairs on a random stream and yielding (deck, score_counts).
+
+        Returns:
+            Dict[Deck, Counter]: The merged screening and final score
+                distribution of every finalist.
+        """
+        started = time.monotonic()
+        # Each climber is a (current deck, metric index) pair.
+        climbers: List[Tuple[Deck, int]] = []
+        for i in range(self.climbers):
+            deck = self.random_deck()
+            if deck is not None:
+                climbers.append((deck, i % len(self.metrics)))
+        self._screen([deck for deck, _ in climbers], evaluate)
+        climbers = [
+            (deck, metric_index)
+            for deck, metric_index in climbers
+            if deck in self.screened
+        ]
+
+        while climbers and not self._out_of_budget(started):
+            self._screen(
+                [
+                    neighbour
+                    for deck, _ in climbers
+                    for neighbour in self.neighbours(deck)
+                ],
+                evaluate
+            )
+            self.iterations += 1
+
+            moved: List[Tuple[Deck, int]] = []
+            restarted: List[Tuple[Deck, int]] = []
+            for deck, metric_index in climbers:
+                metric = self.metrics[metric_index]
+                candidates = [
+                    neighbour
+                    for neighbour in self.neighbours(deck)
+                    if neighbour in self.screened
+                ]
+                best = max(
+                    candidates,
+                    key=lambda neighbour: self.value(neighbour, metric),
+                    default=None
+                )
+                current = self.value(deck, metric)
+                if best is not None and self.value(best, metric) > current:
+                    moved.append((best, metric_index))
+                    continue
+                self.local_optima.add(deck)
+                restart = self.random_deck()
+                if restart is not None:
+                    self.restarts += 1
+                    # The next climb optimizes the next metric.
+                    restarted.append(
+                        (restart, (metric_index + 1) % len(self.metrics))
+                    )
+            self._screen([deck for deck, _ in restarted], evaluate)
+            climbers = moved + [
+                (deck, metric_index)
+                for deck, metric_index in restarted
+                if deck in self.screened
+            ]
+            print(
+                f"Search step {self.iterations}: {len(self.screened)} decks "
+                f"screened, {len(self.local_optima)} local optima, "
+                f"{len(climbers)} climbers."
+            )
+
+        finalists: List[Deck] = []
+        for metric in self.metrics:
+            ranked = sorted(
+                self.screened,
+                key=lambda deck: self.value(deck, metric),
+                reverse=True
+            )
+            finalists.extend(ranked[:self.finalists])
+        finalists = list(dict.fromkeys(finalists))
+        self.score_counts = {
+            deck: Counter(self.screened[deck]) for deck in finalists
+        }
+        tasks = [(deck, self.final_simulations) for deck in finalists]
+        for deck, score_counts in evaluate(tasks, FINAL_STREAM):
+            self.score_counts[deck].update(score_counts)
+        print(
+            f"Search finished: {len(finalists)} finalists simulated "
+            f"{self.final_simulations} more times each."
+        )
+        return self.score_counts
+
+    def simulations_for(self, deck: Deck) -> int:
+        """Returns how many simulations a finalist received in total."""
+        return sum(self.score_counts.get(deck, Counter()).values())
@@ -0,0 +1,53 @@
+# Standard library imports
+import hashlib
+import random
+from typing import Any
+
+
+def derive_seed(root_seed: int, *labels: Any) -> int:
+    """
+    Derives an independent, stable seed from a root seed and a set of labels.
+
+    The labels are hashed with SHA-256 rather than Python's `hash`, which is
+    salted per process, so the same root seed and labels give the same seed
+    in every worker and on every run.
+
+    Args:
+        root_seed: The seed given on the command line.
+        *labels: Anything identifying the stream, e.g. the crafting type,
+            the buff and the deck. Labels are compared by their `repr`.
+
+    Returns:
+        int: A 64-bit seed for `random.Random` or `numpy.random.default_rng`.
+    """
+    material = repr((root_seed,) + labels).encode("utf-8")
+    digest = hashlib.sha256(material).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+class AntitheticRandom(random.Random):
+    """
+    A `random.Random` that can mirror its uniform draws.
+
+    Simulations run in antithetic pairs: both runs of a pair are seeded the
+    same, and the second one sees `1 - u` for every uniform draw `u`. Card
+    functions make all their random decisions from `random()` (see
+    `BaseCrafting._random_index`), so a run that drew lucky colors or
+    re-triggers is paired with one that drew the opposite, which cancels
+    part of the noise in the pair's average.
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.antithetic = False
+
+    def start_run(self, seed: int, antithetic: bool) -> None:
+        """
+        Reseeds the stream for one run, mirrored for the second of a
+        pair.
+        """
+        self.seed(seed)
+        self.antithetic = antithetic
+
+    def random(self) -> float:
+        u = super().random()
+        return 1.0 - u if self.antithetic else u
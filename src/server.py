@@ -0,0 +1,593 @@
+# Standard library imports
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import pickle
+import signal
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Local application imports
+from crafting.base_crafting import BaseCrafting
+from main import (
+    CARDS_PATH, CRAFTING_TYPE_CLASSES, ITEMS_PATH,
+    format_stars_report, format_wishpoints_report, run_simulation_for_item
+)
+from score_cache import ScoreDistributionCache
+from simulator import SimulationSettings
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 128
+# How long a failed computation is reported instead of being retried.
+FAILURE_TTL_SECONDS = 30.0
+REPORT_TYPES = ("stars", "wishpoints")
+
+# A result cache key: (item name, report type).
+ResultKey = Tuple[str, str]
+# A finished report, as answered to clients.
+Report = Dict[str, Any]
+
+# The jobs of the warm pool, shared with its workers: job id ->
+# (pool initializer, pickled simulator).
+_warm_jobs: Optional[Dict[str, Tuple[Callable[[Any], None], bytes]]] = None
+# The simulator job the current worker process was last initialized for.
+_warm_job_id: Optional[str] = None
+
+
+def _init_warm_worker(
+    jobs: Dict[str, Tuple[Callable[[Any], None], bytes]]
+) -> None:
+    """Pool initializer that keeps the shared job table of the worker."""
+    global _warm_jobs
+    _warm_jobs = jobs
+
+
+def _run_warm_task(
+    job_id: str, func: Callable[..., Any], args: Tuple[Any, ...]
+) -> Any:
+    """
+    Runs a pool task in a warm worker, fetching and installing the job's
+    simulator only when the worker last ran another job.
+    """
+    global _warm_job_id
+    if job_id != _warm_job_id:
+        initializer, simulator_bytes = _warm_jobs[job_id]
+        initializer(pickle.loads(simulator_bytes))
+        _warm_job_id = job_id
+    return func(*args)
+
+
+class _WarmJob:
+    """
+    The pool one simulator sees: its simulator is published once in the
+    shared job table, and tasks only carry the job id.
+    """
+    def __init__(
+        self,
+        pool: Any,
+        jobs: Dict[str, Tuple[Callable[[Any], None], bytes]],
+        simulator: Any,
+        initializer: Callable[[Any], None]
+    ) -> None:
+        self._pool = pool
+        self._jobs = jobs
+        self._job_id = uuid.uuid4().hex
+        self._jobs[self._job_id] = (initializer, pickle.dumps(simulator))
+
+    def apply_async(
+        self, func: Callable[..., Any], args: Tuple[Any, ...] = ()
+    ) -> Any:
+        return self._pool.apply_async(
+            _run_warm_task, (self._job_id, func, args)
+        )
+
+    def __enter__(self) -> "_WarmJob":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._jobs.pop(self._job_id, None)
+
+
+class WarmPool:
+    """
+    One process pool kept alive across simulations.
+
+    `CardSimulator` normally forks a fresh pool for every deck size it
+    evaluates. Passed as its `coordinator`, a warm pool hands out views of a
+    single long-lived pool instead. Each view publishes its simulator once
+    in a job table shared with the workers, and tasks only carry the job
+    id: a worker fetches and unpickles a simulator only when it differs
+    from the one it last ran.
+    """
+    def __init__(self, processes: int) -> None:
+        """
+        Starts the worker processes.
+
+        Args:
+            processes: The number of worker processes.
+        """
+        self.processes = processes
+        self._manager = multiprocessing.Manager()
+        self._jobs = self._manager.dict()
+        self._pool = multiprocessing.Pool(
+            processes, initializer=_init_warm_worker, initargs=(self._jobs,)
+        )
+
+    def make_pool(
+        self, simulator: Any, initializer: Callable[[Any], None]
+    ) -> _WarmJob:
+        """Returns a pool view whose tasks run with `simulator`."""
+        return _WarmJob(self._pool, self._jobs, simulator, initializer)
+
+    def capacity(self) -> int:
+        """Returns the number of worker processes."""
+        return self.processes
+
+    def close(self) -> None:
+        """Stops the worker processes."""
+        self._pool.terminate()
+        self._pool.join()
+        self._manager.shutdown()
+
+
+class RecommendationService:
+    """
+    Answers "best decks for item X" queries from warm state.
+
+    The item and card data, one crafting instance per crafting type, the
+    worker pool and a score distribution cache stay loaded between queries.
+    Finished reports are kept in an LRU cache keyed by item and report type.
+    Concurrent queries for the same report share one computation, and
+    computations run one at a time in a background thread so the event loop
+    keeps answering cached queries meanwhile. When cards.json or items.json
+    changes on disk, the data is reloaded and every cache is cleared.
+    A failed computation is logged and its error is returned for
+    `FAILURE_TTL_SECONDS`, so clients polling with wait=0 learn about it
+    instead of restarting it over and over.
+    """
+    def __init__(
+        self,
+        pool: WarmPool,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        settings: Optional[SimulationSettings] = None
+    ) -> None:
+        """
+        Initializes the service and loads the data files.
+
+        Args:
+            pool: The warm worker pool simulations run on.
+            cache_size: The most reports kept in the result cache.
+            settings: The simulation settings of every query; None uses
+                the defaults.
+
+        Raises:
+            OSError: If a data file cannot be read.
+            json.JSONDecodeError: If a data file is not valid JSON.
+        """
+        self.pool = pool
+        self.cache_size = cache_size
+        self.settings = (
+            settings if settings is not None else SimulationSettings()
+        )
+        self.results: "OrderedDict[ResultKey, Dict[str, Any]]" = OrderedDict()
+        self._in_flight: Dict[ResultKey, "asyncio.Future[Dict[str, Any]]"] = {}
+        # key -> (time of the failure, error message)
+        self.failures: Dict[ResultKey, Tuple[float, str]] = {}
+        # Simulations share the pool, so they run one at a time.
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._load_data()
+
+    def _data_mtimes(self) -> Tuple[float, float]:
+        return os.path.getmtime(CARDS_PATH), os.path.getmtime(ITEMS_PATH)
+
+    def _load_data(self) -> None:
+        """(Re)loads the data files and resets everything derived from them."""
+        self._mtimes = self._data_mtimes()
+        with open(CARDS_PATH, 'r') as f:
+            self.cards_data = json.load(f)
+        with open(ITEMS_PATH, 'r') as f:
+            self.items_data = json.load(f)
+        self.crafting_instances: Dict[str, BaseCrafting] = {
+            name: crafting_class(self.cards_data[name])
+            for name, crafting_class in CRAFTING_TYPE_CLASSES.items()
+            if name in self.cards_data
+        }
+        self.score_cache = ScoreDistributionCache()
+        self.results.clear()
+        self.failures.clear()
+
+    def _reload_if_changed(self) -> None:
+        # Running computations keep the data they started with.
+        if not self._in_flight and self._data_mtimes() != self._mtimes:
+            print("Data files changed; reloading and clearing the caches.")
+            self._load_data()
+
+    def _compute(self, item_name: str, report_type: str) -> Dict[str, Any]:
+        """
+        Simulates an item and formats its report (runs in the executor
+        thread).
+        """
+        item_data = self.items_data[item_name]
+        started = time.monotonic()
+        result = run_simulation_for_item(
+            item_name,
+            item_data,
+            self.cards_data,
+            self.settings,
+            report_type=report_type,
+            score_cache=self.score_cache,
+            coordinator=self.pool,
+            crafting_instance=self.crafting_instances.get(
+                item_data.get('crafting_type')
+            )
+        )
+        if not result:
+            raise ValueError(
+                f"Item '{item_name}' cannot be simulated; see the server log."
+            )
+        grouped_results = defaultdict(list)
+        grouped_results[item_data['crafting_type']].append(result)
+        formatter = (
+            format_wishpoints_report
+            if report_type == "wishpoints"
+            else format_stars_report
+        )
+        # The JSON round trip turns deck Counters into plain objects.
+        return {
+            'item': item_name,
+            'report_type': report_type,
+            'report': formatter(grouped_results),
+            'result': json.loads(json.dumps(result, default=dict)),
+            'seconds': time.monotonic() - started,
+        }
+
+    def _store(self, key: ResultKey, future: "asyncio.Future[Report]") -> None:
+        """Caches a finished computation's report, or logs its failure."""
+        del self._in_flight[key]
+        if future.cancelled():
+            return
+        # Retrieved here, as a wait=0 computation may have no other reader.
+        error = future.exception()
+        if error is not None:
+            item_name, report_type = key
+            print(f"Computing {item_name} ({report_type}) failed: {error!r}")
+            self.failures[key] = (time.monotonic(), str(error))
+            return
+        self.results[key] = future.result()
+        self.results.move_to_end(key)
+        while len(self.results) > self.cache_size:
+            self.results.popitem(last=False)
+
+    def recommend(
+        self, item_name: str, report_type: str
+    ) -> Tuple[Optional[Report], Optional["asyncio.Future[Report]"]]:
+        """
+        Looks up or starts the computation of an item's report.
+
+        Args:
+            item_name: The item, as named in items.json.
+            report_type: "stars" or "wishpoints".
+
+        Returns:
+            The cached report and None on a hit; on a miss, None and the
+            future of the computation, shared by concurrent callers.
+
+        Raises:
+            KeyError: If the item is unknown or has no star thresholds.
+            RuntimeError: If computing the report failed within the last
+                `FAILURE_TTL_SECONDS`.
+        """
+        self._reload_if_changed()
+        item_data = self.items_data.get(item_name)
+        if item_data is None or 'star_thresholds' not in item_data:
+            raise KeyError(item_name)
+        key = (item_name, report_type)
+        cached = self.results.get(key)
+        if cached is not None:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return cached, None
+        failure = self.failures.get(key)
+        if failure is not None:
+            failed_at, message = failure
+            if time.monotonic() - failed_at < FAILURE_TTL_SECONDS:
+                raise RuntimeError(message)
+            del self.failures[key]
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return None, future
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        future = asyncio.ensure_future(
+            loop.run_in_executor(
+                self._executor, self._compute, item_name, report_type
+            )
+        )
+        self._in_flight[key] = future
+        future.add_done_callback(lambda done: self._store(key, done))
+        return None, future
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the cache counters."""
+        return {
+            'cached_reports': len(self.results),
+            'cache_size': self.cache_size,
+            'in_flight': [
+                f"{item} ({report_type})"
+                for item, report_type in self._in_flight
+            ],
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'cached_distributions': len(self.score_cache),
+            'worker_processes': self.pool.capacity(),
+        }
+
+    def close(self) -> None:
+        """Stops the background thread."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class RecommendationServer:
+    """
+    A minimal HTTP/1.0 front end for a `RecommendationService`.
+
+    Endpoints (GET only, JSON responses):
+        /recommend?item=NAME[&report_type=stars|wishpoints][&wait=0]
+            The item's report. With wait=0, a miss answers 202 at once
+            while the report is computed in the background. A failed
+            computation answers 500 for `FAILURE_TTL_SECONDS`.
+        /stats
+            Cache and worker counters.
+    """
+    def __init__(self, service: RecommendationService) -> None:
+        self.service = service
+
+    async def _respond(
+        self, writer: asyncio.StreamWriter, status: int, body: Dict[str, Any]
+    ) -> None:
+        reasons = {
+            200: "OK",
+            202: "Accepted",
+            400: "Bad Request",
+            404: "Not Found",
+            405: "Method Not Allowed",
+            500: "Internal Server Error"
+        }
+        payload = json.dumps(body).encode("utf-8")
+        header = (
+            f"HTTP/1.0 {status} {reasons[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(header.encode("utf-8") + payload)
+        await writer.drain()
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serves one request per connection."""
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            # Skip the headers; requests have no body.
+            while (await reader.readline()).strip():
+                pass
+            if len(request_line) < 2:
+                await self._respond(
+                    writer, 400, {'error': "Malformed request."}
+                )
+                return
+            method, target = request_line[0], request_line[1]
+            if method != "GET":
+                await self._respond(
+                    writer, 405, {'error': "Only GET is supported."}
+                )
+                return
+            url = urlsplit(target)
+            query = {
+                name: values[-1]
+                for name, values in parse_qs(url.query).items()
+            }
+            if url.path == "/stats":
+                await self._respond(writer, 200, self.service.stats())
+            elif url.path == "/recommend":
+                await self._recommend(writer, query)
+            else:
+                await self._respond(
+                    writer, 404, {'error': f"Unknown path '{url.path}'."}
+                )
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _recommend(
+        self, writer: asyncio.StreamWriter, query: Dict[str, str]
+    ) -> None:
+        item_name = query.get('item')
+        report_type = query.get('report_type', "stars")
+        if not item_name:
+            await self._respond(
+                writer, 400, {'error': "Missing the 'item' parameter."}
+            )
+            return
+        if report_type not in REPORT_TYPES:
+            choices = ', '.join(REPORT_TYPES)
+            error = f"'report_type' must be one of {choices}."
+            await self._respond(writer, 400, {'error': error})
+            return
+        try:
+            cached, future = self.service.recommend(item_name, report_type)
+        except KeyError:
+            error = (
+                f"Unknown item '{item_name}' (or it has no star thresholds)."
+            )
+            await self._respond(writer, 404, {'error': error})
+            return
+        except RuntimeError as e:
+            await self._respond(writer, 500, {'error': str(e)})
+            return
+        if cached is not None:
+            await self._respond(writer, 200, dict(cached, cached=True))
+            return
+        if query.get('wait', "1") == "0":
+            await self._respond(
+                writer,
+                202,
+                {
+                    'status': "pending",
+                    'item': item_name,
+                    'report_type': report_type
+                }
+            )
+            return
+        try:
+            # Shielded, so a client hanging up does not cancel the
+            # shared computation.
+            result = await asyncio.shield(future)
+        except Exception as e:
+            await self._respond(writer, 500, {'error': str(e)})
+            return
+        await self._respond(writer, 200, dict(result, cached=False))
+
+
+async def serve(
+    server: RecommendationServer,
+    host: str,
+    port: int,
+    unix_socket: Optional[str]
+) -> None:
+    """
+    Serves until SIGTERM (or Ctrl+C), on a Unix socket if given, else on
+    TCP.
+    """
+    if unix_socket:
+        listener = await asyncio.start_unix_server(
+            server.handle, path=unix_socket
+        )
+        print(f"Serving on unix socket {unix_socket}.")
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+        print(f"Serving on http://{host}:{port}.")
+    stop = asyncio.Event()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    except NotImplementedError:
+        # Windows event loops have no signal handlers; Ctrl+C still works.
+        pass
+    async with listener:
+        await stop.wait()
+    print("Shutting down.")
+
+
+def main() -> None:
+    """Runs the recommendation daemon."""
+    parser = argparse.ArgumentParser(
+        description=(
+            "Serve best-deck recommendations from warm engines and a result "
+            "cache."
+        )
+    )
+    parser.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="The interface to listen on."
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"The TCP port (default: {DEFAULT_PORT})."
+    )
+    parser.add_argument(
+        "--unix-socket",
+        type=str,
+        default=None,
+        help="Listen on this Unix socket path instead of TCP."
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help=(
+            "The most reports kept in memory (default: "
+            f"{DEFAULT_CACHE_SIZE})."
+        )
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=multiprocessing.cpu_count(),
+        help="Worker processes kept warm for simulations."
+    )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        default="python",
+        choices=["python", "numpy", "exact"],
+        help="The simulation engine, as for main.py."
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help=(
+            "Root seed, so repeated runs (e.g. after a data reload) give the "
+            "same reports."
+        )
+    )
+    parser.add_argument(
+        "--no-prune",
+        action="store_true",
+        help="Simulate decks that cannot earn a single star as well."
+    )
+    args = parser.parse_args()
+    if args.cache_size < 1:
+        parser.error("--cache-size must be at least 1.")
+    if args.processes < 1:
+        parser.error("--processes must be at least 1.")
+
+    pool = WarmPool(args.processes)
+    try:
+        settings = SimulationSettings(
+            engine=args.engine, seed=args.seed, prune=not args.no_prune
+        )
+        service = RecommendationService(pool, args.cache_size, settings)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error: Could not load the data files - {e}")
+        pool.close()
+        return
+    try:
+        asyncio.run(
+            serve(
+                RecommendationServer(service),
+                args.host,
+                args.port,
+                args.unix_socket
+            )
+        )
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    except OSError as e:
+        print(f"Error: Could not listen - {e}")
+    finally:
+        service.close()
+        pool.close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+
+
+if __name__ == "__main__":
+    main()
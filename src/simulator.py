@@ -1,21 +1,269 @@
 # Standard library imports
+import copy
 import random
 import sys
-from collections import Counter
-from itertools import combinations
-from typing import List, Dict, Tuple, Set, Any, Optional
+import time
+from collections import Counter, deque
+from typing import List, Dict, Tuple, Any, Iterable, Iterator, Optional
 import multiprocessing
 from tqdm import tqdm
 
 # Local application imports
+from aggregation import TopKAggregator
 from crafting.base_crafting import BaseCrafting, State
+from exact import ExactEvaluator, StateSpaceExceeded
+from profiling import SimulationProfiler
+from racing import DeckRace, RaceMetric, metrics_for_report, paired_statistics
+from score_cache import ScoreDistributionCache
+from search import (
+    DEFAULT_MAX_EVALUATIONS,
+    DEFAULT_SCREENING_SIMULATIONS,
+    DeckSearch
+)
+from sketch import ScoreSketch
+from seeding import AntitheticRandom, derive_seed
 
 
-def evaluate_deck_wrapper(args):
-    """Helper function to allow instance methods to be used with multiprocessing."""
-    simulator_instance, deck = args
-    eval_results = simulator_instance.evaluate_deck(deck)
-    return deck, eval_results
+# The number of simulations a deck receives unless told otherwise.
+DEFAULT_SIMULATIONS = 5000
+
+# Bumped whenever a change alters the score distributions the engines
+# produce, so persisted results from older versions are not reused.
+ENGINE_VERSION = 2
+
+# The simulator of the current worker process, installed once by the pool
+# initializer so that it is not pickled along with every deck.
+_worker_simulator: Optional["CardSimulator"] = None
+
+# Bounds on how many decks are sent to a worker per task.
+MIN_CHUNK_SIZE = 1
+MAX_CHUNK_SIZE = 32
+
+# A deck and its evaluation results.
+DeckResults = Tuple[Tuple[str, ...], Dict[str, Any]]
+# The per-metric rankings of a deck size, and the race behind them if any.
+Ranking = Tuple[TopKAggregator, Optional[DeckRace]]
+
+
+def _init_worker(simulator: "CardSimulator") -> None:
+    """Pool initializer that keeps the simulator for the worker's lifetime."""
+    global _worker_simulator
+    _worker_simulator = simulator
+
+
+def _evaluate_deck_chunk(
+    chunk: List[Tuple[Tuple[int, ...], Optional[int], int]]
+) -> Tuple[List[DeckResults], Optional[SimulationProfiler]]:
+    """
+    Evaluates a chunk of decks in a worker process.
+
+    Args:
+        chunk: (deck counts, simulations, stream) tuples, where the counts
+            come from `BaseCrafting.encode_deck`, simulations may be None to
+            use the default number, and stream selects the seeded random
+            stream (see `CardSimulator.evaluate_deck`).
+
+    Returns:
+        The (deck, results) pair of every deck in the chunk, and the profile
+        recorded while evaluating them when profiling is enabled.
+    """
+    simulator = _worker_simulator
+    results = []
+    for counts, simulations, stream in chunk:
+        deck = simulator.crafting.decode_deck(counts)
+        if simulations is None:
+            eval_results = simulator.evaluate_deck(deck, stream=stream)
+        else:
+            eval_results = simulator.evaluate_deck(
+                deck, simulations, stream=stream
+            )
+        results.append((deck, eval_results))
+    profile = None
+    if simulator.profiler is not None:
+        profile = simulator.profiler.drain()
+    return results, profile
+
+
+def _chunk_size(num_tasks: int, num_workers: int) -> int:
+    """
+    Picks how many decks to send per task.
+
+    Like `Pool.map`, it aims for about four chunks per worker, so the
+    per-task overhead is amortized while the work still balances across
+    workers near the end.
+    """
+    size = -(-num_tasks // (num_workers * 4))
+    return max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, size))
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Groups an iterable into lists of at most `size` items."""
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _stream_pool_results(
+    pool: Any, func: Any, tasks: Iterable[Any], max_in_flight: int
+) -> Iterator[Any]:
+    """
+    Feeds tasks to a pool lazily, keeping at most `max_in_flight` pending.
+
+    `Pool.imap_unordered` drains its input iterable eagerly, which would
+    queue every deck up front. Bounding the number of outstanding tasks keeps
+    memory proportional to the pool size instead of the number of decks.
+    """
+    pending: deque = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(func, (task,)))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def summarize_score_counts(
+    score_counts: Counter,
+    star_thresholds: Optional[List[int]] = None,
+    wish_points: Optional[List[int]] = None
+) -> Dict[str, Any]:
+    """
+    Derives the per-item metrics from a deck's final score distribution.
+
+    Args:
+        score_counts: A Counter mapping each final score to how many
+            simulations ended with it.
+        star_thresholds: The scores needed for each star level, if any.
+        wish_points: The wish points awarded for each number of stars.
+
+    Returns:
+        A dictionary with the average 'score' and, when applicable, the
+        'star_chances' percentages and 'expected_wish_points'.
+    """
+    simulations = sum(score_counts.values())
+    if simulations == 0:
+        return {'score': 0.0}
+
+    total_score = sum(score * count for score, count in score_counts.items())
+    results: Dict[str, Any] = {'score': total_score / simulations}
+
+    if star_thresholds:
+        successful_runs_stars = [0] * len(star_thresholds)
+        total_wish_points = 0.0
+        for score, count in score_counts.items():
+            stars_achieved = 0
+            for i, threshold in enumerate(star_thresholds):
+                if score >= threshold:
+                    successful_runs_stars[i] += count
+                    stars_achieved += 1
+            if wish_points:
+                total_wish_points += wish_points[stars_achieved] * count
+
+        results['star_chances'] = {
+            f"{i+1}_star": (count / simulations) * 100
+            for i, count in enumerate(successful_runs_stars)
+        }
+        if wish_points:
+            results['expected_wish_points'] = total_wish_points / simulations
+
+    return results
+
+
+class SimulationSettings:
+    """
+    How a run simulates and evaluates decks, shared by all of its items.
+
+    A run builds one (see `main.settings_from_args`) and hands it to every
+    `CardSimulator`, instead of passing each option through every layer.
+    """
+    def __init__(
+        self,
+        engine: str = "python",
+        exact_state_limit: int = 20000,
+        seed: Optional[int] = None,
+        variance_reduction: bool = False,
+        simulations: int = DEFAULT_SIMULATIONS,
+        profile: bool = False,
+        prune: bool = True,
+        sketch_accuracy: Optional[float] = None,
+        adaptive: bool = False,
+        search: bool = False,
+        search_evaluations: int = DEFAULT_MAX_EVALUATIONS,
+        search_time_limit: Optional[float] = None
+    ) -> None:
+        """
+        Initializes the settings.
+
+        Args:
+            engine: "python" to play each simulation through the card
+                functions, "numpy" to run all simulations of a deck at
+                once with the crafting type's batch engine, or "exact" to
+                compute the exact score distribution where feasible.
+            exact_state_limit: For the "exact" engine, the most distinct
+                states per deck position before a deck falls back to
+                Monte Carlo simulation.
+            seed: The root seed of a reproducible run. Each deck then gets
+                its own stable random stream derived from the seed, the
+                crafting type, the buff and the deck, so results do not
+                depend on worker count or scheduling. None draws unseeded.
+            variance_reduction: Drive every deck with the same random
+                streams (common random numbers) in antithetic pairs, and
+                compare each reported deck with its runner-up on paired
+                runs. Without a seed, a random root seed is picked.
+            simulations: The number of simulations per deck when a caller
+                does not ask for a specific number.
+            profile: Record call counts and time per simulation phase and
+                per card, including the time spent in pool workers. Off by
+                default, as timing every card call slows the simulation down.
+            prune: Skip simulating decks whose optimistic upper bound (see
+                `BaseCrafting.optimistic_upper_bound`) is below the lowest
+                star threshold; they cannot earn a single star.
+            sketch_accuracy: Keep a `ScoreSketch` of every deck's final
+                score distribution with this relative accuracy, so any
+                threshold or percentile can be queried later without
+                re-simulating. None keeps no sketches.
+            adaptive: Race decks in rounds instead of giving each the full
+                number of simulations (see `CardSimulator.find_best_decks`).
+            search: Search the decks heuristically instead of enumerating
+                them.
+            search_evaluations: With `search`, the most decks screened per
+                deck size.
+            search_time_limit: With `search`, the most seconds spent
+                screening per deck size, or None for no limit.
+        """
+        self.engine = engine
+        self.exact_state_limit = exact_state_limit
+        self.seed = seed
+        self.variance_reduction = variance_reduction
+        self.simulations = simulations
+        self.profile = profile
+        self.prune = prune
+        self.sketch_accuracy = sketch_accuracy
+        self.adaptive = adaptive
+        self.search = search
+        self.search_evaluations = search_evaluations
+        self.search_time_limit = search_time_limit
+
+    def distribution_fields(self) -> Dict[str, Any]:
+        """
+        Returns the settings that shape the score distributions, e.g. to
+        fingerprint them.
+        """
+        return {
+            'engine': self.engine,
+            'engine_version': ENGINE_VERSION,
+            'simulations': self.simulations,
+            'seed': self.seed,
+            'variance_reduction': self.variance_reduction,
+            'exact_state_limit': (
+                self.exact_state_limit if self.engine == "exact" else None
+            )
+        }
 
 
 class CardSimulator:
@@ -29,7 +277,12 @@ class CardSimulator:
         active_buff_id: Optional[str] = None,
         star_thresholds: Optional[List[int]] = None,
         wish_points: Optional[List[int]] = None,
-        stamina_cost: Optional[int] = None
+        stamina_cost: Optional[int] = None,
+        crafting_type: Optional[str] = None,
+        settings: Optional[SimulationSettings] = None,
+        score_cache: Optional[ScoreDistributionCache] = None,
+        coordinator: Optional[Any] = None,
+        keep_deck_table: bool = False
     ) -> None:
         """
         Initializes the simulator.
@@ -40,96 +293,822 @@ class CardSimulator:
             star_thresholds: A list of scores to check for star-level consistency.
             wish_points: A list of wish points awarded for each star level.
             stamina_cost: The stamina cost to craft the item.
+            crafting_type: The name of the crafting type, used to key the
+                shared score cache.
+            settings: The run's simulation settings; None uses the defaults.
+            score_cache: A run-scoped cache of score distributions shared
+                between items with the same crafting type and buff.
+            coordinator: A `distributed.Coordinator` whose workers, on this
+                or other machines, evaluate the decks instead of a fresh
+                local process pool (or any object with the same `make_pool`
+                and `capacity` methods, like `server.WarmPool`). None
+                evaluates locally.
+            keep_deck_table: Keep the summarized results of every deck
+                `find_best_decks` evaluates in `deck_tables[size]`, e.g. to
+                build a recommendation index.
+
+        Raises:
+            ValueError: If the settings name an unknown engine.
         """
-        self.crafting = crafting_instance
-        self.card_functions = self.crafting.get_card_functions()
+        if settings is None:
+            settings = SimulationSettings()
+        self.settings = settings
+        # Each simulator owns a copy, so resolving the buff flags and the
+        # dispatch table never leaks into other items sharing the instance.
+        self.crafting = copy.copy(crafting_instance)
+        self.crafting.set_active_buff(active_buff_id)
         self.active_buff_id = active_buff_id
         self.star_thresholds = star_thresholds
         self.wish_points = wish_points
         self.stamina_cost = stamina_cost
+        self.crafting_type = crafting_type
+        self.score_cache = score_cache
+        # Copied, as the engine may fall back and the seed may be drawn below.
+        self.engine = settings.engine
+        self.variance_reduction = settings.variance_reduction
+        self.prune = settings.prune
+        self.sketch_accuracy = settings.sketch_accuracy
+        self.coordinator = coordinator
+        # The sketch of every deck evaluated by `find_best_decks`, per
+        # deck size.
+        self.deck_sketches: Dict[int, Dict[Tuple[str, ...], ScoreSketch]] = {}
+        # The summarized results of every evaluated deck, per deck size.
+        self.deck_tables: Optional[Dict[int, List[Dict[str, Any]]]] = (
+            {} if keep_deck_table else None
+        )
+        # The per-metric rankings and race behind each size's report.
+        self._rankings: Dict[int, Ranking] = {}
+        # How many decks the last enumeration skipped without simulating.
+        self.pruned_decks = 0
+        self.simulations = settings.simulations
+        seed = settings.seed
+        if self.variance_reduction and seed is None:
+            # Common random numbers need one root seed shared by every deck.
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.profiler: Optional[SimulationProfiler] = (
+            SimulationProfiler() if settings.profile else None
+        )
+        if self.profiler is not None:
+            # Before the exact evaluator copies the instance, so exactly
+            # evaluated decks get their card rows too.
+            self.crafting.enable_profiling(self.profiler)
+        self.batch_engine = None
+        self.exact_evaluator: Optional[ExactEvaluator] = None
+        if self.engine == "numpy":
+            self.batch_engine = self.crafting.get_batch_engine(active_buff_id)
+            if self.batch_engine is None:
+                print(
+                    "Warning: No NumPy engine for "
+                    f"'{crafting_type or type(crafting_instance).__name__}'. "
+                    "Falling back to the Python engine."
+                )
+                self.engine = "python"
+        elif self.engine == "exact":
+            self.exact_evaluator = ExactEvaluator(
+                self.crafting, max_states=settings.exact_state_limit
+            )
+        elif self.engine != "python":
+            raise ValueError(
+                f"Unknown simulation engine '{self.engine}'. Expected "
+                "'python', 'numpy' or 'exact'."
+            )
+
+    def _deck_seed(self, deck: Tuple[str, ...], stream: int) -> Optional[int]:
+        """
+        Derives the seed of a deck's random stream, or None when
+        unseeded.
+        """
+        if self.seed is None:
+            return None
+        return derive_seed(
+            self.seed,
+            self.crafting_type,
+            self.active_buff_id,
+            tuple(sorted(deck)),
+            stream
+        )
+
+    def _common_seed(self, stream: int) -> int:
+        """Derives the seed shared by every deck under variance reduction."""
+        return derive_seed(
+            self.seed,
+            self.crafting_type,
+            self.active_buff_id,
+            'common',
+            stream
+        )
 
-    def evaluate_deck(self, deck: Tuple[str, ...], simulations: int = 5000) -> Dict[str, Any]:
+    def evaluate_deck(
+        self,
+        deck: Tuple[str, ...],
+        simulations: Optional[int] = None,
+        stream: int = 0,
+        keep_samples: bool = False
+    ) -> Dict[str, Any]:
         """
         Runs a Monte Carlo simulation for a given deck.
 
         Returns a dictionary containing the average score and other metrics based
         on the simulation mode (star chances or single-target consistency).
+        With the "exact" engine, decks whose state space stays within the bound
+        are evaluated exactly ('exact' is True in the results) and the rest
+        fall back to Monte Carlo.
+
+        With a seed, evaluating the same deck and stream again reproduces the
+        result exactly; callers that simulate a deck more than once (such as
+        the rounds of a race) pass a different stream each time.
+
+        With variance reduction, run `i` of every deck draws from the same
+        stream instead, so decks can be compared run by run. The Python
+        engine also plays the runs in antithetic pairs; the NumPy engine
+        shares one generator seed across decks. With `keep_samples`, the
+        final score of every run is returned in run order under 'samples'.
+        Without `simulations`, the simulator's own count is used.
         """
-        total_score = 0.0
-        total_wish_points = 0.0
-        max_score = 0.0
+        if simulations is None:
+            simulations = self.simulations
+        if self.variance_reduction:
+            deck_seed: Optional[int] = self._common_seed(stream)
+        else:
+            deck_seed = self._deck_seed(deck, stream)
+        if self.exact_evaluator is not None:
+            started = time.perf_counter()
+            try:
+                score_counts = self.exact_evaluator.score_distribution(
+                    deck, self.crafting.new_state()
+                )
+            except StateSpaceExceeded:
+                score_counts = None
+            if self.profiler is not None:
+                # Includes the attempts that fall back to simulation.
+                self.profiler.record(
+                    ('phase', 'exact evaluation'),
+                    time.perf_counter() - started
+                )
+            if score_counts is not None:
+                results = summarize_score_counts(
+                    score_counts, self.star_thresholds, self.wish_points
+                )
+                results['score_counts'] = score_counts
+                results['exact'] = True
+                self._attach_sketch(results, score_counts)
+                return results
+
+        if self.batch_engine is not None:
+            started = time.perf_counter()
+            scores = self.batch_engine.simulate(
+                deck, simulations, self.batch_engine.generator(deck_seed)
+            )
+            if self.profiler is not None:
+                self.profiler.record(
+                    ('phase', 'numpy batch'), time.perf_counter() - started
+                )
+            scores = scores.tolist()
+            score_counts = Counter(scores)
+            results = summarize_score_counts(
+                score_counts, self.star_thresholds, self.wish_points
+            )
+            results['score_counts'] = score_counts
+            self._attach_sketch(results, score_counts)
+            if keep_samples:
+                results['samples'] = scores
+            return results
+
+        crafting = self.crafting
+        # One state object is reused for every run of this deck.
+        state = crafting.new_state()
+        score_counts: Counter = Counter()
+        samples: List[float] = []
+        orders = self._shuffled_orders(deck, simulations, deck_seed)
+
+        if self.profiler is not None:
+            self._play_profiled(
+                deck,
+                orders,
+                state,
+                score_counts,
+                samples if keep_samples else None
+            )
+        else:
+            for shuffled_deck in orders:
+                # Reset the state for each simulation run
+                state.reset()
+
+                # Start-of-cycle effects
+                state = crafting.apply_start_of_cycle_effects(state, deck)
+
+                # On-play effects loop
+                for card_name in shuffled_deck:
+                    state = crafting.apply_pre_card_effects(state)
+                    state = crafting.play_card(card_name, state)
+
+                # End-of-cycle effects
+                state = crafting.apply_end_of_cycle_effects(state, deck)
+
+                score = state.yellow * state.blue
+                score_counts[score] += 1
+                if keep_samples:
+                    samples.append(score)
+
+        results = summarize_score_counts(
+            score_counts, self.star_thresholds, self.wish_points
+        )
+        # The raw distribution does not depend on thresholds or wish points, so
+        # it is kept for callers that re-score the same deck for other items.
+        results['score_counts'] = score_counts
+        self._attach_sketch(results, score_counts)
+        if keep_samples:
+            results['samples'] = samples
+        return results
+
+    def _attach_sketch(
+        self, results: Dict[str, Any], score_counts: Counter
+    ) -> None:
+        """
+        Adds a sketch of the distribution to a deck's results when
+        sketches are kept.
+        """
+        if self.sketch_accuracy is not None:
+            results['sketch'] = ScoreSketch.from_counts(
+                score_counts, self.sketch_accuracy
+            )
+
+    def _merge_sketch(
+        self,
+        sketches: Dict[Tuple[str, ...], ScoreSketch],
+        deck: Tuple[str, ...],
+        eval_results: Dict[str, Any]
+    ) -> None:
+        """
+        Merges a partial evaluation's sketch (one round or stream) into
+        the deck's sketch.
+        """
+        if 'sketch' in eval_results:
+            sketches.setdefault(deck, ScoreSketch(self.sketch_accuracy)).merge(
+                eval_results['sketch']
+            )
+
+    def _shuffled_orders(
+        self, deck: Tuple[str, ...], simulations: int, deck_seed: Optional[int]
+    ) -> Iterator[List[str]]:
+        """
+        Seeds the crafting instance and yields the card order of every run.
+
+        The crafting instance's stream is positioned for each run before its
+        order is drawn, so the card functions that follow continue on it.
+        """
+        crafting = self.crafting
+        deck_cards = list(deck)
+        if not self.variance_reduction:
+            if deck_seed is not None:
+                crafting.seed(deck_seed)
+            for _ in range(simulations):
+                yield crafting.shuffle_deck(deck_cards)
+            return
+
+        antithetic_rng = AntitheticRandom()
+        crafting.rng = antithetic_rng
+        for run in range(simulations):
+            # Runs come in antithetic pairs sharing one seed. The second
+            # run plays the first one's order reversed, and every later
+            # draw of it is mirrored (the shuffle's draws are still
+            # consumed so both runs stay aligned on the same stream).
+            antithetic_rng.start_run(
+                deck_seed + run // 2, antithetic=run % 2 == 1
+            )
+            if run % 2 == 0:
+                shuffled_deck = crafting.shuffle_deck(deck_cards)
+            else:
+                crafting.shuffle_deck(deck_cards)
+                shuffled_deck = shuffled_deck[::-1]
+            yield shuffled_deck
+
+    def _play_profiled(
+        self,
+        deck: Tuple[str, ...],
+        orders: Iterator[List[str]],
+        state: State,
+        score_counts: Counter,
+        samples: Optional[List[float]]
+    ) -> None:
+        """
+        The simulation loop of `evaluate_deck`, timing every phase.
+
+        It plays exactly like the regular loop but records into the
+        profiler, and is only used while profiling is enabled. Cards are
+        timed by the crafting instance's own dispatch (see
+        `BaseCrafting.enable_profiling`).
+        """
+        crafting = self.crafting
+        record = self.profiler.record
+        clock = time.perf_counter
+        while True:
+            started = clock()
+            shuffled_deck = next(orders, None)
+            if shuffled_deck is None:
+                return
+            record(('phase', 'shuffle'), clock() - started)
+
+            state.reset()
+            started = clock()
+            state = crafting.apply_start_of_cycle_effects(state, deck)
+            record(('phase', 'start of cycle'), clock() - started)
 
-        # This history object is persistent across all simulations for this one deck.
-        # This allows the self-correcting PRD to work over a large sample size.
-        prd_history = {
-            'hc_plays': 0,
-            'hc_successes': 0,
-        }
-        successful_runs_stars = [0] * len(self.star_thresholds) if self.star_thresholds else []
-
-        for _ in range(simulations):
-            # Reset the state for each simulation run
-            state: State = {
-                'yellow': 1, 'blue': 1, 'artisan_bonus': 0,
-                'forge_expert_bonus': 0, 'slow_cook_all_color_bonus': 0,
-                'charge_count': 0, 'first_forge_played': False,
-                'fe_played_count': 0, 'enchant_debuff': 0,
-                'overload_debuff': 0,
-                'reforge_bonus': 0,
-                'ferment_buff_active': False,
-                'heat_control_trigger_count': 0,
-                'artisan_cards_played_count': 0,
-                # Pass a reference to the persistent history into each run.
-                'prd_history': prd_history,
-                'multi_forge_triggers': 0
-            }
-            if self.active_buff_id:
-                state[self.active_buff_id] = True
-
-            shuffled_deck = random.sample(list(deck), len(deck))
-
-            # Start-of-cycle effects
-            state = self.crafting.apply_start_of_cycle_effects(state, deck)
-
-            # On-play effects loop
             for card_name in shuffled_deck:
-                state = self.crafting.apply_pre_card_effects(state)
-                state = self.crafting.play_card(card_name, state)
-
-            # End-of-cycle effects
-            state = self.crafting.apply_end_of_cycle_effects(state, deck)
-
-            final_score = state['yellow'] * state['blue']
-            total_score += final_score
-
-            # Check against star thresholds
-            if self.star_thresholds:
-                stars_achieved = 0
-                for i, threshold in enumerate(self.star_thresholds):
-                    if final_score >= threshold:
-                        successful_runs_stars[i] += 1
-                        stars_achieved += 1
-                
-                if self.wish_points:
-                    total_wish_points += self.wish_points[stars_achieved]
-
-        # Prepare results
-        results = {'score': total_score / simulations}
-        if self.star_thresholds:
-            results['star_chances'] = {
-                f"{i+1}_star": (count / simulations) * 100
-                for i, count in enumerate(successful_runs_stars)
-            }
+                started = clock()
+                state = crafting.apply_pre_card_effects(state)
+                played = clock()
+                state = crafting.play_card(card_name, state)
+                record(('phase', 'pre-card effects'), played - started)
+                record(('phase', 'play cards'), clock() - played)
+
+            started = clock()
+            state = crafting.apply_end_of_cycle_effects(state, deck)
+            record(('phase', 'end of cycle'), clock() - started)
+
+            score = state.yellow * state.blue
+            score_counts[score] += 1
+            if samples is not None:
+                samples.append(score)
+
+    def _paired_comparison(
+        self,
+        leader: Dict[str, Any],
+        runner_up: Dict[str, Any],
+        metric: RaceMetric
+    ) -> Optional[Dict[str, float]]:
+        """
+        Compares a reported deck with its runner-up on common random numbers.
+
+        Both decks are replayed with their samples kept. With variance
+        reduction, run `i` of both decks shares its random stream, so the
+        paired differences are far less noisy than the two decks' own
+        estimates. Exactly evaluated decks are not compared.
+
+        Returns:
+            A dictionary with the leader's 'paired_difference' over the
+            runner-up (percentage points for star chances), its
+            'paired_standard_error' and the 'paired_confidence' that the
+            leader is ahead, or None if either deck was evaluated exactly.
+        """
+        if leader.get('exact') or runner_up.get('exact'):
+            return None
+        samples = [
+            self.evaluate_deck(
+                tuple(deck_info['deck'].elements()), keep_samples=True
+            )['samples']
+            for deck_info in (leader, runner_up)
+        ]
+        difference, standard_error, confidence = paired_statistics(
+            samples[0],
+            samples[1],
+            metric,
+            self.star_thresholds,
+            self.wish_points,
+            # The Python engine plays antithetic pairs, which are the
+            # independent units.
+            block_size=1 if self.batch_engine is not None else 2
+        )
+        scale = 100 if metric[0] == 'star' else 1
+        return {
+            'paired_difference': difference * scale,
+            'paired_standard_error': standard_error * scale,
+            'paired_confidence': confidence,
+        }
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Leaves the run-scoped score cache and the coordinator behind
+        when sent to a worker.
+        """
+        state = self.__dict__.copy()
+        state['score_cache'] = None
+        state['coordinator'] = None
+        return state
+
+    def _num_workers(self) -> int:
+        """Returns how many worker processes evaluate decks side by side."""
+        if self.coordinator is not None:
+            return self.coordinator.capacity()
+        return multiprocessing.cpu_count()
+
+    def _make_pool(self, num_workers: int) -> Any:
+        """
+        Creates a pool whose workers hold a copy of this simulator: a local
+        process pool, or the coordinator's remote workers when one is set.
+        """
+        if self.coordinator is not None:
+            return self.coordinator.make_pool(self, _init_worker)
+        return multiprocessing.Pool(
+            num_workers, initializer=_init_worker, initargs=(self,)
+        )
+
+    def _evaluate_in_pool(
+        self,
+        pool: Any,
+        deck_tasks: Iterable[Tuple[Tuple[str, ...], Optional[int]]],
+        num_tasks: int,
+        num_workers: int,
+        stream: int = 0
+    ) -> Iterator[DeckResults]:
+        """
+        Streams (deck, simulations) tasks through a pool of this simulator.
+
+        Decks travel as count vectors in chunks, and each chunk's results
+        come back together, along with the worker's profile when profiling
+        is enabled, which is merged into `self.profiler`.
+
+        Args:
+            pool: A pool created by `_make_pool`.
+            deck_tasks: (deck, simulations) pairs; simulations may be None.
+            num_tasks: How many tasks there are, used to size the chunks.
+            num_workers: The number of worker processes.
+            stream: The seeded random stream every deck is evaluated with.
+
+        Yields:
+            The (deck, results) pair of every task.
+        """
+        encoded = (
+            (self.crafting.encode_deck(deck), simulations, stream)
+            for deck, simulations in deck_tasks
+        )
+        chunks = _chunked(encoded, _chunk_size(num_tasks, num_workers))
+        for chunk_results, profile in _stream_pool_results(
+            pool, _evaluate_deck_chunk, chunks, max_in_flight=num_workers * 2
+        ):
+            if profile is not None:
+                self.profiler.merge(profile)
+            yield from chunk_results
+
+    def _cache_key(
+        self, deck: Tuple[str, ...]
+    ) -> Tuple[str, Optional[str], Tuple[str, ...]]:
+        """Builds the shared score-cache key for a deck of this simulator."""
+        return ScoreDistributionCache.make_key(
+            self.crafting_type or '', self.active_buff_id, deck
+        )
+
+    def _pruning_bound(self, deck: Tuple[str, ...]) -> Optional[float]:
+        """
+        Returns the deck's upper bound if it proves the deck cannot earn
+        a star, else None.
+        """
+        if not self.prune or not self.star_thresholds:
+            return None
+        bound = self.crafting.optimistic_upper_bound(deck)
+        if bound is None or bound >= min(self.star_thresholds):
+            return None
+        return bound
+
+    def _pruned_results(self, bound: float) -> Dict[str, Any]:
+        """
+        Builds the results of a pruned deck: no star is reachable, so no
+        simulation is needed. Its mean score is unknown, so 'score' is
+        None; only its 'upper_bound' is known.
+        """
+        results: Dict[str, Any] = {
+            'score': None,
+            'star_chances': {
+                f"{i+1}_star": 0.0 for i in range(len(self.star_thresholds))
+            },
+            'pruned': True,
+            'upper_bound': bound,
+        }
         if self.wish_points:
-            results['expected_wish_points'] = total_wish_points / simulations
-        
+            results['expected_wish_points'] = self.wish_points[0]
         return results
 
-    def find_best_decks(self, deck_sizes: List[int], top_n: int = 5, report_type: str = "stars") -> Dict[int, Any]:
+    def pending_decks(self, size: int) -> Iterator[Tuple[str, ...]]:
+        """
+        Yields the decks of a size that `find_best_decks` would simulate.
+
+        These are the unique decks whose distribution is not in the score
+        cache yet and that are not pruned (see `_pruning_bound`). A batch
+        scheduler that fills the cache up front leaves none.
+        """
+        for deck in self.crafting.iter_unique_decks(size):
+            if (
+                self.score_cache is None
+                or self._cache_key(deck) not in self.score_cache
+            ) and self._pruning_bound(deck) is None:
+                yield deck
+
+    def _evaluate_decks(self, size: int) -> Iterator[DeckResults]:
+        """
+        Yields (deck, results) for every unique deck of the given size.
+
+        Decks whose score distribution is already in the shared cache are
+        re-scored against this item's thresholds without simulating; decks
+        that cannot earn a star are pruned (see `_pruning_bound`) and come
+        last, so simulated decks win ties at 0%; the rest are streamed
+        through a process pool and added to the cache.
+        """
+        num_pending = 0
+        pruned: List[Tuple[Tuple[str, ...], float]] = []
+        for deck in self.crafting.iter_unique_decks(size):
+            if self.score_cache is not None:
+                key = self._cache_key(deck)
+                score_counts = self.score_cache.get(key)
+                if score_counts is not None:
+                    eval_results = summarize_score_counts(
+                        score_counts, self.star_thresholds, self.wish_points
+                    )
+                    if self.score_cache.is_exact(key):
+                        eval_results['exact'] = True
+                    self._attach_sketch(eval_results, score_counts)
+                    yield deck, eval_results
+                    continue
+            bound = self._pruning_bound(deck)
+            if bound is not None:
+                pruned.append((deck, bound))
+            else:
+                num_pending += 1
+        self.pruned_decks = len(pruned)
+
+        if num_pending:
+            num_workers = self._num_workers()
+            tasks = ((deck, None) for deck in self.pending_decks(size))
+            with self._make_pool(num_workers) as pool:
+                for deck, eval_results in self._evaluate_in_pool(
+                    pool, tasks, num_pending, num_workers
+                ):
+                    if self.score_cache is not None:
+                        self.score_cache.put(
+                            self._cache_key(deck),
+                            eval_results['score_counts'],
+                            eval_results.get('exact', False)
+                        )
+                    yield deck, eval_results
+
+        for deck, bound in pruned:
+            yield deck, self._pruned_results(bound)
+
+    def _race_decks(
+        self, size: int, report_type: str
+    ) -> Tuple[Iterator[DeckResults], DeckRace]:
+        """
+        Evaluates every unique deck of a size with adaptive racing.
+
+        Returns a lazy stream of the (deck, results) pairs, where each
+        result also carries the number of simulations the deck received,
+        along with the finished race. Decks that cannot earn a star are
+        pruned before the race and come last.
+        """
+        race = DeckRace(
+            metrics_for_report(
+                report_type, self.star_thresholds, self.wish_points
+            ),
+            self.star_thresholds,
+            self.wish_points
+        )
+        num_workers = self._num_workers()
+
+        rounds_run = 0
+        sketches: Dict[Tuple[str, ...], ScoreSketch] = {}
+
+        with self._make_pool(num_workers) as pool:
+            def run_round(
+                deck_tasks: List[Tuple[Tuple[str, ...], int]]
+            ) -> Iterator[Tuple[Tuple[str, ...], Counter]]:
+                # Each round draws from a fresh stream, so its simulations add
+                # new information instead of repeating the previous round's.
+                nonlocal rounds_run
+                stream = rounds_run
+                rounds_run += 1
+                for deck, eval_results in self._evaluate_in_pool(
+                    pool,
+                    deck_tasks,
+                    len(deck_tasks),
+                    num_workers,
+                    stream=stream
+                ):
+                    self._merge_sketch(sketches, deck, eval_results)
+                    yield deck, eval_results['score_counts']
+
+            pruned: List[Tuple[Tuple[str, ...], float]] = []
+            contenders: List[Tuple[str, ...]] = []
+            for deck in self.crafting.iter_unique_decks(size):
+                bound = self._pruning_bound(deck)
+                if bound is None:
+                    contenders.append(deck)
+                else:
+                    pruned.append((deck, bound))
+            self.pruned_decks = len(pruned)
+            distributions = race.run(contenders, run_round)
+
+        def evaluated() -> Iterator[DeckResults]:
+            for deck, score_counts in distributions.items():
+                eval_results = summarize_score_counts(
+                    score_counts, self.star_thresholds, self.wish_points
+                )
+                eval_results['simulations'] = race.simulations_for(deck)
+                if deck in sketches:
+                    eval_results['sketch'] = sketches[deck]
+                yield deck, eval_results
+            for deck, bound in pruned:
+                yield deck, self._pruned_results(bound)
+        return evaluated(), race
+
+    def _search_decks(
+        self,
+        size: int,
+        report_type: str,
+        max_evaluations: int,
+        time_limit: Optional[float]
+    ) -> Tuple[Iterator[DeckResults], DeckSearch]:
+        """
+        Searches the decks of a size heuristically instead of enumerating them.
+
+        Returns a lazy stream of the finalists' (deck, results) pairs, where
+        each result also carries the number of simulations the deck received,
+        along with the finished search.
+        """
+        if self.seed is None:
+            rng = random.Random()
+        else:
+            search_seed = derive_seed(
+                self.seed, self.crafting_type, self.active_buff_id, 'search',
+                size
+            )
+            rng = random.Random(search_seed)
+        search = DeckSearch(
+            metrics_for_report(
+                report_type, self.star_thresholds, self.wish_points
+            ),
+            list(self.crafting.get_card_pool_info().items()),
+            size,
+            self.star_thresholds,
+            self.wish_points,
+            rng=rng,
+            screening_simulations=min(
+                DEFAULT_SCREENING_SIMULATIONS, self.simulations
+            ),
+            final_simulations=self.simulations,
+            max_evaluations=max_evaluations,
+            time_limit=time_limit
+        )
+        num_workers = self._num_workers()
+        sketches: Dict[Tuple[str, ...], ScoreSketch] = {}
+
+        with self._make_pool(num_workers) as pool:
+            def evaluate(
+                deck_tasks: List[Tuple[Tuple[str, ...], int]], stream: int
+            ) -> Iterator[Tuple[Tuple[str, ...], Counter]]:
+                for deck, eval_results in self._evaluate_in_pool(
+                    pool,
+                    deck_tasks,
+                    len(deck_tasks),
+                    num_workers,
+                    stream=stream
+                ):
+                    self._merge_sketch(sketches, deck, eval_results)
+                    yield deck, eval_results['score_counts']
+
+            distributions = search.run(evaluate)
+
+        def evaluated() -> Iterator[DeckResults]:
+            for deck, score_counts in distributions.items():
+                eval_results = summarize_score_counts(
+                    score_counts, self.star_thresholds, self.wish_points
+                )
+                eval_results['simulations'] = search.simulations_for(deck)
+                if deck in sketches:
+                    eval_results['sketch'] = sketches[deck]
+                yield deck, eval_results
+        return evaluated(), search
+
+    def _ranked_metrics(self) -> List[RaceMetric]:
+        """Returns every metric the reports can rank decks by."""
+        if not self.star_thresholds:
+            return [('score', None)]
+        metrics: List[RaceMetric] = [
+            ('star', i) for i in range(len(self.star_thresholds))
+        ]
+        if self.wish_points:
+            metrics.append(('wish_points', None))
+        return metrics
+
+    def report(
+        self, size: int, report_type: str = "stars", top_n: int = 5
+    ) -> Any:
+        """
+        Ranks the decks of a size evaluated by the last `find_best_decks` call.
+
+        The per-metric rankings are kept after evaluation, so a report of
+        another type costs no further simulations.
+
+        Args:
+            size: A deck size passed to `find_best_decks`.
+            report_type: "stars" for the best deck per star level, or
+                "wishpoints" for the decks with the most expected wish points.
+            top_n: How many decks list reports hold, up to the `top_n` the
+                decks were evaluated with.
+
+        Returns:
+            The best deck per star level ("N_star" keys) or a list of the best
+            decks, as stored in the results of `find_best_decks`.
+        """
+        aggregator, race = self._rankings[size]
+        if self.star_thresholds:
+            if (
+                report_type == "wishpoints"
+                and self.wish_points
+                and self.stamina_cost
+                and self.stamina_cost > 0
+            ):
+                # Ranked by wish points; dividing by the stamina cost
+                # keeps the order.
+                ranked = aggregator.top(('wish_points', None))
+                # Copies, so annotating a report never changes the kept
+                # rankings.
+                top_decks = [dict(deck_info) for deck_info in ranked[:top_n]]
+                if race and top_decks:
+                    _, confidence = race.ranking_confidence(
+                        ('wish_points', None)
+                    )
+                    top_decks[0]['ranking_confidence'] = confidence
+                if self.variance_reduction and len(ranked) > 1:
+                    paired = self._paired_comparison(
+                        ranked[0], ranked[1], ('wish_points', None)
+                    )
+                    top_decks[0].update(paired or {})
+                return top_decks
+            else: # Default to "stars" report
+                # Find the best deck for each star level
+                best_decks_for_stars: Dict[str, Dict[str, Any]] = {}
+                for i in range(1, len(self.star_thresholds) + 1):
+                    star_key = f"{i}_star"
+                    ranked = aggregator.top(('star', i - 1))
+                    if not ranked:
+                        continue
+                    best_deck = ranked[0]
+                    if race:
+                        # Copy so a deck that wins several star levels
+                        # keeps one confidence each.
+                        _, confidence = race.ranking_confidence(
+                            ('star', i - 1)
+                        )
+                        best_deck = dict(
+                            best_deck, ranking_confidence=confidence
+                        )
+                    if self.variance_reduction and len(ranked) > 1:
+                        paired = self._paired_comparison(
+                            ranked[0], ranked[1], ('star', i - 1)
+                        )
+                        best_deck = dict(best_deck, **(paired or {}))
+                    best_decks_for_stars[star_key] = best_deck
+                return best_decks_for_stars
+        else:
+            # Fallback for non-star mode
+            ranked = aggregator.top(('score', None))
+            top_decks = [dict(deck_info) for deck_info in ranked[:top_n]]
+            if race and top_decks:
+                _, confidence = race.ranking_confidence(('score', None))
+                top_decks[0]['ranking_confidence'] = confidence
+            if self.variance_reduction and len(ranked) > 1:
+                paired = self._paired_comparison(
+                    ranked[0], ranked[1], ('score', None)
+                )
+                top_decks[0].update(paired or {})
+            return top_decks
+
+    def find_best_decks(
+        self,
+        deck_sizes: List[int],
+        top_n: int = 5,
+        report_type: str = "stars"
+    ) -> Dict[int, Any]:
         """
         Generates all possible unique decks, evaluates them, and returns the top
         results based on the simulation mode.
+
+        With the `adaptive` setting, decks are raced in rounds instead of
+        receiving a fixed 5000 simulations each; hopeless decks are dropped
+        early and each reported deck carries its simulation count and
+        ranking confidence.
+
+        With the `search` setting, decks are not enumerated at all: a
+        heuristic search (see `DeckSearch`) screens at most
+        `search_evaluations` decks, for at most `search_time_limit` seconds,
+        and only its finalists are ranked. The best deck found is not
+        guaranteed to be the best overall.
+
+        With a `sketch_accuracy`, the sketch of every simulated deck is kept
+        in `deck_sketches[size]`.
+
+        Raises:
+            ValueError: If `adaptive` or `search` is combined with the
+                "exact" engine, whose probability distributions cannot be
+                counted as simulation runs.
         """
+        settings = self.settings
+        adaptive, search = settings.adaptive, settings.search
+        if self.engine == "exact" and (adaptive or search):
+            raise ValueError(
+                "The exact engine cannot be combined with adaptive racing or "
+                "deck search."
+            )
         all_cards: List[str] = self.crafting.get_all_cards()
 
         print(f"Total available cards: {len(all_cards)}")
@@ -142,47 +1121,70 @@ class CardSimulator:
                 print(f"Cannot form a deck of size {size}, not enough cards available.")
                 continue
 
-            unique_decks: Set[Tuple[str, ...]] = set(combinations(all_cards, size))
-
-            deck_scores: List[Dict[str, Any]] = []
-            num_decks = len(unique_decks)
-            print(f"Found {num_decks} unique decks to evaluate...")
-
-            tasks = [(self, deck) for deck in unique_decks]
-
-            with multiprocessing.Pool() as pool:
-                results_from_pool = list(tqdm(pool.imap_unordered(evaluate_deck_wrapper, tasks), total=num_decks, desc="Evaluating decks"))
+            num_decks = self.crafting.count_unique_decks(size)
+            if search:
+                print(
+                    f"Searching {num_decks} unique decks, screening at most "
+                    f"{settings.search_evaluations}..."
+                )
+            else:
+                print(f"Found {num_decks} unique decks to evaluate...")
 
-            for deck, eval_results in results_from_pool:
+            # Keep a runner-up per metric for the paired comparison.
+            aggregator = TopKAggregator(
+                self._ranked_metrics(), k=max(top_n, 2)
+            )
+            race: Optional[DeckRace] = None
+            self.pruned_decks = 0
+            size_sketches: Dict[Tuple[str, ...], ScoreSketch] = {}
+            if self.sketch_accuracy is not None:
+                self.deck_sketches[size] = size_sketches
+            if self.deck_tables is not None:
+                self.deck_tables[size] = []
+            if search:
+                evaluated_decks, _ = self._search_decks(
+                    size,
+                    report_type,
+                    settings.search_evaluations,
+                    settings.search_time_limit
+                )
+            elif adaptive:
+                evaluated_decks, race = self._race_decks(size, report_type)
+            else:
+                evaluated_decks = tqdm(
+                    self._evaluate_decks(size),
+                    total=num_decks,
+                    desc="Evaluating decks"
+                )
+            for deck, eval_results in evaluated_decks:
                 deck_info = {
                     'deck': Counter(deck),
-                    'score': eval_results.get('score', 0),
+                    'score': eval_results.get('score'),
                     'star_chances': eval_results.get('star_chances', {}),
                     'expected_wish_points': eval_results.get('expected_wish_points', 0)
                 }
-                deck_scores.append(deck_info)
+                if 'simulations' in eval_results:
+                    deck_info['simulations'] = eval_results['simulations']
+                if eval_results.get('exact'):
+                    deck_info['exact'] = True
+                if eval_results.get('pruned'):
+                    deck_info['pruned'] = True
+                    deck_info['upper_bound'] = eval_results['upper_bound']
+                if 'sketch' in eval_results:
+                    size_sketches[deck] = eval_results['sketch']
+                aggregator.add(deck_info)
+                if self.deck_tables is not None:
+                    self.deck_tables[size].append(deck_info)
 
             print("\nEvaluation complete.")
+            if self.pruned_decks:
+                print(
+                    f"Pruned {self.pruned_decks} of {num_decks} decks "
+                    "without simulating: their best possible score is below "
+                    f"the {min(self.star_thresholds)} point 1-star threshold."
+                )
 
-            # --- Analysis ---
-            if self.star_thresholds:
-                if report_type == "wishpoints" and self.wish_points and self.stamina_cost and self.stamina_cost > 0:
-                    # Sort by wish points per stamina
-                    deck_scores.sort(key=lambda x: x.get('expected_wish_points', 0) / self.stamina_cost, reverse=True)
-                    results[size] = deck_scores[:top_n]
-                else: # Default to "stars" report
-                    # Find the best deck for each star level
-                    best_decks_for_stars: Dict[str, Dict[str, Any]] = {}
-                    for i in range(1, len(self.star_thresholds) + 1):
-                        star_key = f"{i}_star"
-                        best_deck = max(deck_scores, key=lambda x: x.get('star_chances', {}).get(star_key, 0))
-                        best_decks_for_stars[star_key] = best_deck
-                    results[size] = best_decks_for_stars
-            else:
-                # Fallback for non-star mode
-                deck_scores.sort(key=lambda x: x.get('score', 0), reverse=True)
-                results[size] = deck_scores[:top_n]
+            self._rankings[size] = (aggregator, race)
+            results[size] = self.report(size, report_type, top_n)
 
         return results
-
-
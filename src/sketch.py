@@ -0,0 +1,297 @@
+# Standard library imports
+import argparse
+import json
+import math
+import sys
+from collections import Counter, defaultdict
+from typing import Any, DefaultDict, Dict, List, Optional
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+class ScoreSketch:
+    """
+    A compact, mergeable sketch of a deck's final score distribution.
+
+    Scores are counted in logarithmically spaced buckets (as in DDSketch):
+    bucket `i` holds the scores in `(gamma ** (i - 1), gamma ** i]`, with
+    `gamma = (1 + accuracy) / (1 - accuracy)`. Every quantile is then
+    returned within `accuracy` relative error, whatever the spread of the
+    scores, using a few hundred buckets at most. The count, sum, minimum and
+    maximum are kept exactly. Two sketches with the same accuracy merge by
+    adding their buckets, so sketches built per worker, chunk or racing
+    round combine into the sketch of all their runs.
+
+    Weights may be fractional, so exact probability distributions (see
+    `ExactEvaluator`) can be sketched as well.
+    """
+    def __init__(
+        self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+    ) -> None:
+        """
+        Initializes an empty sketch.
+
+        Args:
+            relative_accuracy: The relative error of quantile estimates,
+                between 0 and 1 (exclusive).
+
+        Raises:
+            ValueError: If the accuracy is out of range.
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(
+                "The relative accuracy must be between 0 and 1, got "
+                f"{relative_accuracy}."
+            )
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: DefaultDict[int, float] = defaultdict(float)
+        # Scores of 0 or less cannot be bucketed on a log scale.
+        self.zero_count = 0.0
+        self.count = 0.0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @classmethod
+    def from_counts(
+        cls,
+        score_counts: Counter,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+    ) -> "ScoreSketch":
+        """
+        Sketches a score distribution.
+
+        Args:
+            score_counts: A Counter mapping final scores to how many runs
+                (or what probability) ended with them.
+            relative_accuracy: The relative error of quantile estimates.
+
+        Returns:
+            ScoreSketch: The sketch.
+        """
+        sketch = cls(relative_accuracy)
+        for score, weight in score_counts.items():
+            sketch.add(score, weight)
+        return sketch
+
+    def _index(self, score: float) -> int:
+        return math.ceil(math.log(score) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        """
+        Returns the value of a bucket that is within the relative
+        accuracy of all its scores.
+        """
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def add(self, score: float, weight: float = 1) -> None:
+        """
+        Adds a score with the given weight (number of runs or
+        probability).
+        """
+        if weight <= 0:
+            return
+        if score > 0:
+            self.buckets[self._index(score)] += weight
+        else:
+            self.zero_count += weight
+        self.count += weight
+        self.sum += score * weight
+        self.min = min(self.min, score)
+        self.max = max(self.max, score)
+
+    def merge(self, other: "ScoreSketch") -> None:
+        """
+        Adds another sketch's runs to this one.
+
+        Raises:
+            ValueError: If the sketches use different accuracies.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError(
+                "Only sketches with the same relative accuracy can be merged."
+            )
+        for index, weight in other.buckets.items():
+            self.buckets[index] += weight
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    @property
+    def mean(self) -> float:
+        """The exact mean score."""
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a score quantile.
+
+        Args:
+            q: The quantile, from 0 (the minimum) to 1 (the maximum).
+
+        Returns:
+            float: A score within the relative accuracy of the true quantile.
+
+        Raises:
+            ValueError: If `q` is out of range or the sketch is empty.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f"The quantile must be between 0 and 1, got {q}.")
+        if not self:
+            raise ValueError("Cannot take a quantile of an empty sketch.")
+        rank = q * self.count
+        cumulative = self.zero_count
+        if rank <= cumulative and self.zero_count:
+            return max(self.min, min(0.0, self.max))
+        for index in sorted(self.buckets):
+            cumulative += self.buckets[index]
+            if cumulative >= rank:
+                return max(self.min, min(self._value(index), self.max))
+        return self.max
+
+    def probability_at_least(self, threshold: float) -> float:
+        """
+        Estimates the chance of a run scoring at least `threshold`.
+
+        Thresholds below the minimum or above the maximum are answered
+        exactly; otherwise only scores within the relative accuracy of the
+        threshold may be counted on the wrong side of it.
+
+        Args:
+            threshold: The score to reach, e.g. a star threshold.
+
+        Returns:
+            float: The probability, from 0 to 1.
+        """
+        if not self or threshold > self.max:
+            return 0.0
+        if threshold <= self.min:
+            return 1.0
+        reached = 0.0
+        if threshold <= 0:
+            reached += self.zero_count
+        for index, weight in self.buckets.items():
+            if self._value(index) >= threshold:
+                reached += weight
+        return min(1.0, reached / self.count)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Exports the sketch as JSON-friendly data."""
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'zero_count': self.zero_count,
+            'buckets': {
+                str(index): weight
+                for index, weight in sorted(self.buckets.items())
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScoreSketch":
+        """Restores a sketch exported with `to_dict`."""
+        sketch = cls(data['relative_accuracy'])
+        for index, weight in data['buckets'].items():
+            sketch.buckets[int(index)] = weight
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        sketch.sum = data['sum']
+        sketch.min = data['min']
+        sketch.max = data['max']
+        return sketch
+
+
+def main() -> None:
+    """
+    Queries the score sketches written by
+    `main.py --distribution-output`.
+    """
+    parser = argparse.ArgumentParser(
+        description=(
+            "Query saved deck score distributions without re-simulating."
+        )
+    )
+    parser.add_argument(
+        "path", help="A JSON file written with main.py --distribution-output."
+    )
+    parser.add_argument(
+        "--item", type=str, default=None, help="Only show this item."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        nargs="*",
+        default=[],
+        help="Scores to report the chance of reaching."
+    )
+    parser.add_argument(
+        "--quantile",
+        type=float,
+        nargs="*",
+        default=[],
+        help="Quantiles (0 to 1) to report."
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=5,
+        help=(
+            "How many decks to show per item, best first by the first "
+            "threshold (or mean)."
+        )
+    )
+    args = parser.parse_args()
+
+    try:
+        with open(args.path, 'r') as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        print(f"Error: File not found - {args.path}")
+        sys.exit(2)
+    except json.JSONDecodeError as e:
+        print(f"Error: '{args.path}' is not valid JSON - {e}")
+        sys.exit(2)
+
+    for item_name, decks in saved.items():
+        if args.item and item_name != args.item:
+            continue
+        entries: List[Any] = [
+            (entry['deck'], ScoreSketch.from_dict(entry['sketch']))
+            for entry in decks
+        ]
+        if args.threshold:
+            entries.sort(
+                key=lambda entry: entry[1].probability_at_least(
+                    args.threshold[0]
+                ),
+                reverse=True
+            )
+        else:
+            entries.sort(key=lambda entry: entry[1].mean, reverse=True)
+        print(f"\n--- {item_name} ({len(entries)} decks) ---")
+        for deck, sketch in entries[:args.top]:
+            deck_str = ", ".join(
+                f"{count}x {name}" for name, count in deck.items()
+            )
+            parts = [f"mean {sketch.mean:,.0f}"]
+            for threshold in args.threshold:
+                chance = sketch.probability_at_least(threshold) * 100
+                parts.append(f"P(>= {threshold:,.0f}) {chance:.2f}%")
+            parts += [
+                f"q{q:g} {sketch.quantile(q):,.0f}" for q in args.quantile
+            ]
+            print(f"  {deck_str}\n    " + " | ".join(parts))
+
+
+if __name__ == "__main__":
+    main()
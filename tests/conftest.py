@@ -0,0 +1,31 @@
+# Standard library imports
+import json
+import os
+import sys
+from typing import Any, Dict
+
+# Related third-party imports
+import pytest
+
+# The modules import each other as top-level modules, like `main.py` does
+# when run from src/.
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'data'
+)
+
+
+@pytest.fixture(scope="session")
+def cards_data() -> Dict[str, Any]:
+    """The contents of data/cards.json."""
+    with open(os.path.join(DATA_DIR, 'cards.json'), 'r') as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="session")
+def items_data() -> Dict[str, Any]:
+    """The contents of data/items.json."""
+    with open(os.path.join(DATA_DIR, 'items.json'), 'r') as f:
+        return json.load(f)
@@ -0,0 +1,60 @@
+# Standard library imports
+import random
+from collections import Counter
+from typing import List
+
+# Related third-party imports
+import pytest
+
+# Local application imports
+from aggregation import DeckInfo, TopKAggregator, metric_value
+
+METRICS = [('star', 0), ('star', 1), ('wish_points', None), ('score', None)]
+
+
+def _deck_results(count: int, seed: int) -> List[DeckInfo]:
+    """Random results drawn from few values, so every metric has ties."""
+    rng = random.Random(seed)
+    return [
+        {
+            'deck': Counter({f"Card {i}": 1}),
+            'score': rng.choice([100.0, 250.5, 400.0]),
+            'star_chances': {
+                '1_star': rng.choice([0.0, 50.0, 100.0]),
+                '2_star': rng.choice([0.0, 12.5]),
+            },
+            'expected_wish_points': rng.choice([500.0, 612.25]),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("k", [1, 5, 40])
+def test_top_matches_a_stable_full_sort(k: int) -> None:
+    results = _deck_results(200, seed=k)
+    aggregator = TopKAggregator(METRICS, k)
+    for deck_info in results:
+        aggregator.add(deck_info)
+
+    assert aggregator.seen == len(results)
+    for metric in METRICS:
+        # sorted() is stable, so tied decks keep their arrival order.
+        expected = sorted(
+            results,
+            key=lambda deck_info: metric_value(deck_info, metric),
+            reverse=True
+        )[:k]
+        top = aggregator.top(metric)
+        assert len(top) == k
+        assert [id(d) for d in top] == [id(d) for d in expected]
+
+
+def test_fewer_results_than_k_are_all_kept() -> None:
+    results = _deck_results(3, seed=0)
+    aggregator = TopKAggregator(METRICS, 10)
+    for deck_info in results:
+        aggregator.add(deck_info)
+    for metric in METRICS:
+        assert sorted(map(id, aggregator.top(metric))) == sorted(
+            map(id, results)
+        )
@@ -0,0 +1,62 @@
+# Standard library imports
+import math
+
+# Related third-party imports
+import pytest
+
+# Local application imports
+from main import CRAFTING_TYPE_CLASSES
+
+DRAWS = 100000
+# How many standard errors a sample mean may be off by.
+TOLERANCE = 4
+
+
+def _assert_mean(values: list, mean: float, variance: float) -> None:
+    sample_mean = sum(values) / len(values)
+    standard_error = math.sqrt(variance / len(values))
+    assert abs(sample_mean - mean) <= TOLERANCE * standard_error
+
+
+@pytest.mark.parametrize(
+    "chance, max_length", [(0.45, 10), (0.9, 5), (0.3, 1)]
+)
+def test_random_streak_is_truncated_geometric(
+    cards_data: dict, chance: float, max_length: int
+) -> None:
+    crafting = CRAFTING_TYPE_CLASSES["kitchen"](cards_data["kitchen"])
+    crafting.seed(0)
+    streaks = [
+        crafting._random_streak(chance, max_length) for _ in range(DRAWS)
+    ]
+    assert min(streaks) >= 0
+    assert max(streaks) <= max_length
+
+    # The streak reaches k with probability chance ** k.
+    reach = [chance ** k for k in range(1, max_length + 1)]
+    mean = sum(reach)
+    second_moment = sum((2 * k - 1) * p for k, p in enumerate(reach, 1))
+    _assert_mean(streaks, mean, second_moment - mean * mean)
+
+
+@pytest.mark.parametrize("n, chance", [(1, 0.5), (11, 0.5), (20, 0.1)])
+def test_random_count_is_binomial(
+    cards_data: dict, n: int, chance: float
+) -> None:
+    crafting = CRAFTING_TYPE_CLASSES["kitchen"](cards_data["kitchen"])
+    crafting.seed(0)
+    counts = [crafting._random_count(n, chance) for _ in range(DRAWS)]
+    assert min(counts) >= 0
+    assert max(counts) <= n
+    _assert_mean(counts, n * chance, n * chance * (1 - chance))
+
+
+def test_certain_and_impossible_draws(cards_data: dict) -> None:
+    crafting = CRAFTING_TYPE_CLASSES["kitchen"](cards_data["kitchen"])
+    crafting.seed(0)
+    assert crafting._random_streak(0.0, 10) == 0
+    assert crafting._random_streak(1.0, 10) == 10
+    assert crafting._random_streak(0.5, 0) == 0
+    assert crafting._random_count(0, 0.5) == 0
+    assert crafting._random_count(5, 0.0) == 0
+    assert crafting._random_count(5, 1.0) == 5
@@ -0,0 +1,126 @@
+# Standard library imports
+import itertools
+import random
+from typing import Callable, Dict, List, Set, Tuple
+
+# Related third-party imports
+import pytest
+
+# Local application imports
+from crafting.base_crafting import BaseCrafting, State
+from main import CRAFTING_TYPE_CLASSES
+
+
+class ToyCrafting(BaseCrafting):
+    """A crafting type with no card logic, for enumeration edge cases."""
+    def get_card_functions(self) -> Dict[str, Callable[[State], State]]:
+        return {}
+
+
+def toy_crafting(quantities: List[int]) -> ToyCrafting:
+    """
+    Builds a toy crafting type with cards "A", "B"... in these
+    quantities.
+    """
+    return ToyCrafting([
+        {'card_name': chr(ord('A') + i), 'card_quantity': quantity}
+        for i, quantity in enumerate(quantities)
+    ])
+
+
+def brute_force_decks(
+    crafting: BaseCrafting, size: int
+) -> Set[Tuple[str, ...]]:
+    """Every distinct deck of a size, from all per-card copy counts."""
+    names = crafting.get_card_names()
+    quantities = crafting.get_card_pool_info()
+    decks = set()
+    for counts in itertools.product(
+        *(range(quantities[name] + 1) for name in names)
+    ):
+        if sum(counts) == size:
+            deck = [
+                card
+                for name, count in zip(names, counts)
+                for card in [name] * count
+            ]
+            decks.add(tuple(sorted(deck)))
+    return decks
+
+
+@pytest.mark.parametrize("crafting_type", sorted(CRAFTING_TYPE_CLASSES))
+def test_unique_decks_match_brute_force(
+    cards_data: dict, crafting_type: str
+) -> None:
+    crafting = CRAFTING_TYPE_CLASSES[crafting_type](cards_data[crafting_type])
+    for size in range(len(crafting.get_all_cards()) + 2):
+        decks = list(crafting.iter_unique_decks(size))
+        assert len(decks) == len(set(decks)), (
+            f"size {size} yields a deck twice"
+        )
+        expected = brute_force_decks(crafting, size)
+        assert {tuple(sorted(deck)) for deck in decks} == expected
+        assert len(decks) == crafting.count_unique_decks(size)
+
+
+@pytest.mark.parametrize(
+    "quantities", [[1], [3], [2, 2], [3, 1, 2], [1, 1, 1, 1], [4, 0, 2]]
+)
+def test_toy_decks_match_brute_force(quantities: List[int]) -> None:
+    crafting = toy_crafting(quantities)
+    for size in range(sum(quantities) + 2):
+        decks = list(crafting.iter_unique_decks(size))
+        assert len(decks) == len(set(decks))
+        assert set(decks) == brute_force_decks(crafting, size)
+        assert len(decks) == crafting.count_unique_decks(size)
+
+
+def test_edge_sizes() -> None:
+    crafting = toy_crafting([3, 1, 2])
+    assert list(crafting.iter_unique_decks(0)) == [()]
+    assert crafting.count_unique_decks(0) == 1
+    assert list(crafting.iter_unique_decks(-1)) == []
+    assert crafting.count_unique_decks(-1) == 0
+    assert list(crafting.iter_unique_decks(7)) == []
+    assert crafting.count_unique_decks(7) == 0
+    assert list(crafting.iter_unique_decks(6)) == [
+        ('A', 'A', 'A', 'B', 'C', 'C')
+    ]
+
+
+def test_decks_keep_definition_order() -> None:
+    crafting = toy_crafting([2, 2, 2])
+    order = {name: i for i, name in enumerate(crafting.get_card_names())}
+    for deck in crafting.iter_unique_decks(4):
+        assert list(deck) == sorted(deck, key=order.__getitem__)
+
+
+def test_enumeration_is_lazy() -> None:
+    crafting = toy_crafting([10] * 12)
+    decks = crafting.iter_unique_decks(10)
+    assert next(decks) == ('A',) * 10
+
+
+@pytest.mark.parametrize("crafting_type", sorted(CRAFTING_TYPE_CLASSES))
+def test_encode_decode_round_trip(
+    cards_data: dict, crafting_type: str
+) -> None:
+    crafting = CRAFTING_TYPE_CLASSES[crafting_type](cards_data[crafting_type])
+    names = crafting.get_card_names()
+    rng = random.Random(0)
+    for size in range(len(crafting.get_all_cards()) + 1):
+        for deck in crafting.iter_unique_decks(size):
+            counts = crafting.encode_deck(deck)
+            assert len(counts) == len(names)
+            assert sum(counts) == size
+            assert crafting.decode_deck(counts) == deck
+            shuffled = list(deck)
+            rng.shuffle(shuffled)
+            assert crafting.encode_deck(tuple(shuffled)) == counts
+
+
+def test_encode_counts_by_definition() -> None:
+    crafting = toy_crafting([3, 1, 2])
+    assert crafting.encode_deck(('C', 'A', 'C')) == (1, 0, 2)
+    assert crafting.decode_deck((1, 0, 2)) == ('A', 'C', 'C')
+    assert crafting.decode_deck((0, 0, 0)) == ()
@@ -0,0 +1,187 @@
+# Standard library imports
+import time
+from typing import Any, Dict
+
+# Related third-party imports
+import pytest
+
+# Local application imports
+from crafting.kitchen import KitchenCrafting
+from distributed import Coordinator, NoLiveWorkers, WorkQueue, _QueueManager
+from simulator import CardSimulator, SimulationSettings
+
+AUTHKEY = b"test-secret"
+
+
+def _noop() -> None:
+    """A task function; the queue never calls it."""
+
+
+def test_lease_hands_out_tasks_in_order() -> None:
+    work_queue = WorkQueue()
+    work_queue.add_job("job", None)
+    first = work_queue.submit("job", _noop, (1,))
+    second = work_queue.submit("job", _noop, (2,))
+
+    assert work_queue.lease("a", wait=0)[1] == first
+    assert work_queue.lease("b", wait=0)[1] == second
+    assert work_queue.lease("a", wait=0) is None
+
+
+def test_complete_delivers_the_result() -> None:
+    work_queue = WorkQueue()
+    task_id = work_queue.submit("job", _noop, ())
+    work_queue.lease("a", wait=0)
+    work_queue.complete("a", task_id, True, 42)
+
+    assert work_queue.wait_result(task_id) == (True, 42)
+
+
+def test_expired_lease_is_requeued() -> None:
+    work_queue = WorkQueue(lease_timeout=0.05)
+    task_id = work_queue.submit("job", _noop, ())
+    work_queue.lease("slow", wait=0)
+    time.sleep(0.1)
+
+    task = work_queue.lease("fast", wait=0)
+    assert task is not None and task[1] == task_id
+    assert work_queue.requeued == 1
+
+
+def test_heartbeat_renews_leases() -> None:
+    work_queue = WorkQueue(lease_timeout=0.2)
+    work_queue.register_worker("a", 1)
+    work_queue.submit("job", _noop, ())
+    work_queue.lease("a", wait=0)
+    for _ in range(3):
+        time.sleep(0.1)
+        work_queue.heartbeat("a")
+
+    assert work_queue.lease("b", wait=0) is None
+    assert work_queue.requeued == 0
+
+
+def test_duplicate_result_is_ignored() -> None:
+    work_queue = WorkQueue()
+    task_id = work_queue.submit("job", _noop, ())
+    work_queue.lease("a", wait=0)
+    work_queue.complete("a", task_id, True, "first")
+    work_queue.complete("a", task_id, True, "second")
+
+    assert work_queue.wait_result(task_id) == (True, "first")
+    assert task_id not in work_queue._results
+
+
+def test_late_result_of_requeued_task_wins() -> None:
+    work_queue = WorkQueue(lease_timeout=0.05)
+    task_id = work_queue.submit("job", _noop, ())
+    work_queue.lease("slow", wait=0)
+    time.sleep(0.1)
+    work_queue.lease("fast", wait=0)
+    work_queue.complete("slow", task_id, True, "slow")
+    work_queue.complete("fast", task_id, True, "fast")
+
+    assert work_queue.wait_result(task_id) == (True, "slow")
+    assert work_queue.lease("other", wait=0) is None
+
+
+def test_late_result_of_requeued_task_leaves_the_queue() -> None:
+    work_queue = WorkQueue(lease_timeout=0.05)
+    task_id = work_queue.submit("job", _noop, ())
+    work_queue.lease("slow", wait=0)
+    time.sleep(0.1)
+    # Re-queued, but not yet leased again when the slow result arrives.
+    with work_queue._lock:
+        work_queue._requeue_expired()
+    work_queue.complete("slow", task_id, True, "slow")
+
+    assert work_queue.wait_result(task_id) == (True, "slow")
+    assert work_queue.lease("fast", wait=0) is None
+
+
+def test_result_of_removed_job_is_dropped() -> None:
+    work_queue = WorkQueue()
+    work_queue.add_job("job", None)
+    task_id = work_queue.submit("job", _noop, ())
+    work_queue.lease("a", wait=0)
+    work_queue.remove_job("job")
+    work_queue.complete("a", task_id, True, 42)
+
+    assert task_id not in work_queue._results
+    assert work_queue.get_job("job") is None
+
+
+def test_closed_queue_stops_workers() -> None:
+    work_queue = WorkQueue()
+    work_queue.submit("job", _noop, ())
+    work_queue.close()
+
+    with pytest.raises(EOFError):
+        work_queue.lease("a", wait=0)
+
+
+def test_waiting_without_workers_raises() -> None:
+    work_queue = WorkQueue(worker_timeout=0.1)
+    task_id = work_queue.submit("job", _noop, ())
+
+    with pytest.raises(NoLiveWorkers):
+        work_queue.wait_result(task_id)
+
+
+def test_waiting_after_every_worker_died_raises() -> None:
+    work_queue = WorkQueue(lease_timeout=0.1, worker_timeout=0.2)
+    work_queue.register_worker("a", 1)
+    task_id = work_queue.submit("job", _noop, ())
+    work_queue.lease("a", wait=0)
+
+    # Worker "a" never sends a heartbeat again.
+    with pytest.raises(NoLiveWorkers):
+        work_queue.wait_result(task_id)
+    assert work_queue.requeued == 1
+
+
+def test_coordinators_serve_their_own_queues() -> None:
+    coordinators = [
+        Coordinator("127.0.0.1", 0, AUTHKEY),
+        Coordinator("127.0.0.1", 0, AUTHKEY)
+    ]
+    try:
+        for job_id, coordinator in enumerate(coordinators):
+            coordinator.work_queue.submit(str(job_id), _noop, ())
+        _QueueManager.register('get_work_queue')
+        for job_id, coordinator in enumerate(coordinators):
+            manager = _QueueManager(
+                address=coordinator.address, authkey=AUTHKEY
+            )
+            manager.connect()
+            task = manager.get_work_queue().lease("worker", 0)
+            assert task[0] == str(job_id)
+    finally:
+        for coordinator in coordinators:
+            coordinator.close()
+
+
+def _best_decks(cards_data: Dict[str, Any], coordinator: Any = None) -> dict:
+    simulator = CardSimulator(
+        KitchenCrafting(cards_data['kitchen']),
+        star_thresholds=[300, 600],
+        crafting_type='kitchen',
+        settings=SimulationSettings(seed=11, simulations=200),
+        coordinator=coordinator
+    )
+    return simulator.find_best_decks([3])
+
+
+def test_local_workers_match_local_pool(cards_data: Dict[str, Any]) -> None:
+    expected = _best_decks(cards_data)
+    coordinator = Coordinator("127.0.0.1", 0, AUTHKEY)
+    try:
+        coordinator.start_local_workers(3, AUTHKEY)
+        assert coordinator.wait_for_workers() >= 1
+        assert _best_decks(cards_data, coordinator) == expected
+    finally:
+        coordinator.close()
+
+    assert all(
+        not process.is_alive() for process in coordinator._local_workers
+    )
@@ -0,0 +1,114 @@
+# Standard library imports
+import copy
+import itertools
+from collections import Counter
+from typing import Optional, Tuple
+
+# Related third-party imports
+import pytest
+
+# Local application imports
+from crafting.base_crafting import BaseCrafting
+from exact import ExactEvaluator, StateSpaceExceeded, _ScriptedRandom
+from main import CRAFTING_TYPE_CLASSES
+
+
+def brute_force_distribution(
+    crafting: BaseCrafting, deck: Tuple[str, ...]
+) -> Counter:
+    """
+    Plays every ordering of the deck down every random branch of the
+    whole run, weighting each path by its probability.
+    """
+    scripted = _ScriptedRandom()
+    crafting = copy.copy(crafting)
+    crafting._get_random_color = scripted.random_color
+    crafting._random_chance = scripted.random_chance
+    crafting._random_int = scripted.random_int
+    crafting._random_streak = scripted.random_streak
+    crafting._random_count = scripted.random_count
+
+    # Every permutation is equally likely; with duplicate cards, an order
+    # repeats exactly as often as a uniform shuffle would produce it.
+    orders = list(itertools.permutations(deck))
+    distribution: Counter = Counter()
+    for order in orders:
+        while True:
+            scripted.start_path()
+            state = crafting.new_state()
+            state = crafting.apply_start_of_cycle_effects(state, deck)
+            for card_name in order:
+                state = crafting.apply_pre_card_effects(state)
+                state = crafting.play_card(card_name, state)
+            state = crafting.apply_end_of_cycle_effects(state, deck)
+            distribution[state.yellow * state.blue] += (
+                scripted.probability / len(orders)
+            )
+            if not scripted.next_path():
+                break
+    return distribution
+
+
+@pytest.mark.parametrize(
+    "crafting_type, buff_id, deck",
+    [
+        ("kitchen", None, ('Cut', 'Cut', 'Slow Cook', 'Bake')),
+        (
+            "kitchen",
+            "dried_mushroom_buff",
+            ('Heat Control', 'Cut', 'Season', 'Slow Cook')
+        ),
+        ("forging", None, ('Reforge', 'Forge Expert', 'Forge', 'Ignite')),
+        (
+            "forging",
+            "firefang_sword_buff",
+            ('Forge Expert', 'Forge Expert', 'Multi Forge', 'Charge')
+        ),
+        ("alchemy", None, ('Ingredient', 'Grind', 'Enchant', 'Distill')),
+        (
+            "alchemy",
+            "illusion_buff",
+            ('Ingredient', 'Grind', 'Grind', 'Overload')
+        ),
+    ]
+)
+def test_exact_distribution_matches_brute_force(
+    cards_data: dict,
+    crafting_type: str,
+    buff_id: Optional[str],
+    deck: Tuple[str, ...]
+) -> None:
+    crafting = CRAFTING_TYPE_CLASSES[crafting_type](cards_data[crafting_type])
+    crafting.set_active_buff(buff_id)
+    expected = brute_force_distribution(crafting, deck)
+
+    exact = ExactEvaluator(crafting).score_distribution(
+        deck, crafting.new_state()
+    )
+
+    assert sum(exact.values()) == pytest.approx(1.0)
+    assert set(exact) == set(expected)
+    for score, probability in expected.items():
+        assert exact[score] == pytest.approx(probability, abs=1e-12)
+
+
+def test_too_many_card_plays_raise(cards_data: dict) -> None:
+    crafting = CRAFTING_TYPE_CLASSES["kitchen"](cards_data["kitchen"])
+    crafting.set_active_buff(None)
+    # A single Heat Control play has more random branches than the
+    # EXPANSION_FACTOR card plays one state allows.
+    evaluator = ExactEvaluator(crafting, max_states=1)
+
+    with pytest.raises(StateSpaceExceeded, match="card plays"):
+        evaluator.score_distribution(('Heat Control',), crafting.new_state())
+
+
+def test_too_many_distinct_states_raise(cards_data: dict) -> None:
+    crafting = CRAFTING_TYPE_CLASSES["forging"](cards_data["forging"])
+    crafting.set_active_buff(None)
+    evaluator = ExactEvaluator(crafting, max_states=1)
+
+    with pytest.raises(StateSpaceExceeded, match="distinct states"):
+        evaluator.score_distribution(
+            ('Forge', 'Ignite'), crafting.new_state()
+        )
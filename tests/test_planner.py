@@ -0,0 +1,133 @@
+# Standard library imports
+import math
+from collections import Counter
+from typing import Dict, Optional
+
+# Related third-party imports
+import pytest
+
+# Local application imports
+from planner import (
+    CraftOption,
+    Plan,
+    expected_successes,
+    parse_focus,
+    plan_crafts
+)
+
+ITEM_NAMES = [
+    "Chillguard Armor", "Stone Armor", "Warm Stone Armor", "Warmdust",
+    "Calming Warmdust", "Odd Sweet"
+]
+
+
+def _option(
+    name: str, cost: int, value: float, needed: Optional[int] = None
+) -> CraftOption:
+    return CraftOption(name, cost, Counter({"Forge": 1}), value, 1.0, needed)
+
+
+def _crafts(plan: Plan) -> Dict[str, int]:
+    return {option.item_name: crafts for option, crafts in plan.crafts}
+
+
+def test_plan_finds_the_known_optimum() -> None:
+    # With 10 stamina: 2x C is worth 18; the next best, 2x A + 1x B, 17.
+    options = [
+        _option("A", 3, 5.0), _option("B", 4, 7.0), _option("C", 5, 9.0)
+    ]
+    plan = plan_crafts(options, 10)
+    assert _crafts(plan) == {"C": 2}
+    assert plan.value == pytest.approx(18.0)
+    assert plan.stamina_used == 10
+
+
+def test_plan_stops_at_the_needed_crafts() -> None:
+    # A is certain but only one success is wanted; B fills the rest.
+    options = [_option("A", 2, 1.0, needed=1), _option("B", 3, 0.5)]
+    plan = plan_crafts(options, 8)
+    assert _crafts(plan) == {"A": 1, "B": 2}
+    assert plan.value == pytest.approx(2.0)
+    assert plan.stamina_used == 8
+
+
+def test_nothing_needed_is_never_planned() -> None:
+    assert expected_successes(0.9, 5, 0) == 0
+    plan = plan_crafts([_option("A", 1, 0.9, needed=0)], 10)
+    assert plan.crafts == []
+    assert plan.value == 0
+    assert plan.stamina_used == 0
+
+
+@pytest.mark.parametrize("needed", [None, 4, 5, 9])
+def test_needed_at_least_crafts_counts_every_success(
+    needed: Optional[int]
+) -> None:
+    assert expected_successes(0.3, 4, needed) == pytest.approx(0.3 * 4)
+
+
+@pytest.mark.parametrize("needed", [1, 2, 3])
+def test_needed_below_crafts_caps_the_successes(needed: int) -> None:
+    crafts, chance = 5, 0.4
+    expected = sum(
+        min(k, needed)
+        * math.comb(crafts, k) * chance ** k * (1 - chance) ** (crafts - k)
+        for k in range(crafts + 1)
+    )
+    assert expected_successes(chance, crafts, needed) == pytest.approx(
+        expected
+    )
+
+
+def test_free_items_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        plan_crafts([_option("A", 0, 1.0)], 10)
+
+
+def test_parse_focus_reads_targets_and_priorities() -> None:
+    focus = parse_focus(
+        "Top Priority\n"
+        "Cut => Chillguard Armor >=2 stars 3/8\n"
+        "Low Priority\n"
+        "Calming Warmdust\n"
+        "Ignore Odd Sweet\n",
+        ITEM_NAMES
+    )
+    assert set(focus) == {"Chillguard Armor", "Calming Warmdust", "Odd Sweet"}
+    assert focus["Chillguard Armor"].priority == 2.0
+    assert focus["Chillguard Armor"].min_stars == 2
+    assert focus["Chillguard Armor"].needed == 5
+    # The longer name is not also read as "Warmdust".
+    assert focus["Calming Warmdust"].priority == 0.5
+    assert focus["Odd Sweet"].priority == 0.0
+
+
+@pytest.mark.parametrize(
+    "line, min_stars, needed",
+    [
+        # No star count: not a star target.
+        ("Stone Armor >= stars 3/8", None, None),
+        ("Stone Armor >=two stars", None, None),
+        # An incomplete progress count wants one craft.
+        ("Stone Armor >=3 stars 3/", 3, 1),
+        ("Stone Armor >=3 stars /8", 3, 1),
+        # More done than wanted wants nothing more.
+        ("Stone Armor >=3 stars 9/8", 3, 0),
+        ("Stone Armor >=3 stars 8/8", 3, 0),
+    ]
+)
+def test_parse_focus_tolerates_malformed_lines(
+    line: str, min_stars: Optional[int], needed: Optional[int]
+) -> None:
+    focus = parse_focus(line, ITEM_NAMES)
+    # "Warm Stone Armor" is not mentioned by "Stone Armor".
+    assert set(focus) == {"Stone Armor"}
+    assert focus["Stone Armor"].min_stars == min_stars
+    assert focus["Stone Armor"].needed == needed
+
+
+@pytest.mark.parametrize(
+    "text", ["", "\n\n", "Medium Priority\n", "Nothing known >=2 stars 1/2"]
+)
+def test_parse_focus_ignores_lines_without_items(text: str) -> None:
+    assert parse_focus(text, ITEM_NAMES) == {}
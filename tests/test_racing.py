@@ -0,0 +1,66 @@
+# Standard library imports
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
+
+# Local application imports
+from racing import Deck, DeckRace
+
+# Every run of a deck ends with the same score.
+SCORES: Dict[Deck, int] = {
+    ('A',): 200,
+    ('B',): 150,
+    ('C',): 50,
+    ('D',): 40,
+    ('E',): 30,
+}
+
+
+def run_round(
+    tasks: List[Tuple[Deck, int]]
+) -> Iterator[Tuple[Deck, Counter]]:
+    for deck, simulations in tasks:
+        yield deck, Counter({SCORES[deck]: simulations})
+
+
+def test_unreachable_threshold_does_not_block_elimination() -> None:
+    # No deck ever reaches the second star.
+    race = DeckRace(
+        [('star', 0), ('star', 1)],
+        star_thresholds=[100, 1000],
+        initial_simulations=100
+    )
+
+    race.run(list(SCORES), run_round)
+
+    # A and B both always reach the first star, so they tie for it; the
+    # rest are dropped after the first round.
+    assert race.survivors == [('A',), ('B',)]
+    for deck in [('C',), ('D',), ('E',)]:
+        assert race.simulations_for(deck) == 100
+
+
+def test_race_stops_once_every_reached_metric_has_one_leader() -> None:
+    race = DeckRace(
+        [('star', 0), ('star', 1)],
+        star_thresholds=[175, 1000],
+        initial_simulations=100
+    )
+
+    race.run(list(SCORES), run_round)
+
+    assert race.survivors == [('A',)]
+    assert race.rounds == 1
+
+
+def test_no_reached_metric_keeps_every_deck() -> None:
+    race = DeckRace(
+        [('star', 0)],
+        star_thresholds=[1000],
+        initial_simulations=100,
+        budget_per_deck=300
+    )
+
+    race.run(list(SCORES), run_round)
+
+    assert race.survivors == list(SCORES)
+    assert all(race.simulations_for(deck) == 300 for deck in SCORES)
@@ -0,0 +1,138 @@
+# Standard library imports
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+# Related third-party imports
+import pytest
+
+# Local application imports
+from main import run_fingerprints, run_simulation_for_item
+from recommendation_index import (
+    RecommendationIndex,
+    index_fingerprint,
+    write_index
+)
+from simulator import SimulationSettings
+
+ITEM_NAME = "Stone Armor"
+
+
+def _build_index(
+    path: Path, cards_data: dict, items_data: dict
+) -> Tuple[dict, Dict[str, Any], SimulationSettings]:
+    # Three cards and low thresholds keep it fast without pruning any deck.
+    item_data = dict(
+        items_data[ITEM_NAME], deck_size=3, star_thresholds=[50, 100, 150, 200]
+    )
+    settings = SimulationSettings(seed=0, simulations=200)
+    entries: Dict[str, Any] = {}
+    run_simulation_for_item(
+        ITEM_NAME, item_data, cards_data, settings, index_entries=entries
+    )
+    fingerprints = {
+        ITEM_NAME: index_fingerprint(
+            item_data,
+            run_fingerprints(cards_data, settings)[item_data['crafting_type']]
+        )
+    }
+    write_index(
+        str(path), entries, fingerprints, settings.distribution_fields()
+    )
+    return item_data, entries[ITEM_NAME], settings
+
+
+def test_index_round_trip(
+    tmp_path: Path, cards_data: dict, items_data: dict
+) -> None:
+    path = tmp_path / "index.bin"
+    item_data, entry, settings = _build_index(path, cards_data, items_data)
+
+    with RecommendationIndex(str(path)) as index:
+        item_key = index_fingerprint(
+            item_data,
+            run_fingerprints(cards_data, settings)[item_data['crafting_type']]
+        )
+        assert index.is_fresh(ITEM_NAME, item_key)
+        assert index.stale_reason(
+            ITEM_NAME, item_key, settings.distribution_fields()
+        ) is None
+        for report_type, report in entry['reports'].items():
+            assert index.report(ITEM_NAME, report_type) == report
+
+        rows = list(index.deck_table(ITEM_NAME))
+        assert len(rows) == len(entry['table'])
+        for (deck, metrics), (_, deck_info) in zip(rows, entry['table']):
+            assert deck == +deck_info['deck']
+            # The table stores float32 values.
+            assert metrics['score'] == pytest.approx(deck_info['score'])
+            for star_key, chance in deck_info['star_chances'].items():
+                assert metrics['star_chances'][star_key] == pytest.approx(
+                    chance
+                )
+            assert metrics['expected_wish_points'] == pytest.approx(
+                deck_info['expected_wish_points']
+            )
+            assert metrics['exact'] == bool(deck_info.get('exact'))
+            assert metrics['pruned'] == bool(deck_info.get('pruned'))
+
+
+def test_stale_reason_names_the_changed_settings(
+    tmp_path: Path, cards_data: dict, items_data: dict
+) -> None:
+    path = tmp_path / "index.bin"
+    item_data, _, built_with = _build_index(path, cards_data, items_data)
+    settings = SimulationSettings(seed=1, engine="numpy", simulations=200)
+    item_key = index_fingerprint(
+        item_data,
+        run_fingerprints(cards_data, settings)[item_data['crafting_type']]
+    )
+
+    with RecommendationIndex(str(path)) as index:
+        assert not index.is_fresh(ITEM_NAME, item_key)
+        reason = index.stale_reason(
+            ITEM_NAME, item_key, settings.distribution_fields()
+        )
+        assert reason == "engine python -> numpy, seed 0 -> 1"
+        assert index.stale_reason(
+            "Unknown Item", item_key, settings.distribution_fields()
+        ) == "not indexed"
+
+        changed_item = dict(item_data, stamina_cost=1)
+        changed_key = index_fingerprint(
+            changed_item,
+            run_fingerprints(cards_data, built_with)[
+                item_data['crafting_type']
+            ]
+        )
+        assert index.stale_reason(
+            ITEM_NAME, changed_key, built_with.distribution_fields()
+        ) == "item or card data changed"
+
+
+def test_pruned_decks_have_no_score(
+    tmp_path: Path, cards_data: dict, items_data: dict
+) -> None:
+    # No 3-card deck can reach Stone Armor's first star, so all are pruned.
+    item_data = dict(items_data[ITEM_NAME], deck_size=3)
+    settings = SimulationSettings(seed=0, simulations=200)
+    entries: Dict[str, Any] = {}
+    run_simulation_for_item(
+        ITEM_NAME, item_data, cards_data, settings, index_entries=entries
+    )
+    table = entries[ITEM_NAME]['table']
+    assert table
+    for _, deck_info in table:
+        assert deck_info['pruned']
+        assert deck_info['score'] is None
+        assert deck_info['upper_bound'] < item_data['star_thresholds'][0]
+
+    path = tmp_path / "index.bin"
+    write_index(str(path), entries, {ITEM_NAME: "fingerprint"})
+    with RecommendationIndex(str(path)) as index:
+        rows = list(index.deck_table(ITEM_NAME))
+        assert len(rows) == len(table)
+        for _, metrics in rows:
+            assert metrics['pruned']
+            assert metrics['score'] is None
+        report = index.report(ITEM_NAME, "stars")
+        assert report == entries[ITEM_NAME]['reports']['stars']
@@ -0,0 +1,75 @@
+# Standard library imports
+import os
+import sqlite3
+from collections import Counter
+
+# Local application imports
+from result_store import ResultStore
+
+FINGERPRINTS = {'kitchen': 'kitchen-fingerprint'}
+
+
+def test_distributions_survive_reopening(tmp_path) -> None:
+    path = os.path.join(tmp_path, 'store.sqlite3')
+    sampled = ResultStore.make_key('kitchen', None, ('Cut', 'Season'))
+    exact = ResultStore.make_key('kitchen', None, ('Cut', 'Cut'))
+    with ResultStore(path, FINGERPRINTS) as store:
+        store.put(sampled, Counter({10: 3, 20: 2}))
+        store.put(exact, Counter({10: 0.25, 20: 0.75}), exact=True)
+
+    with ResultStore(path, FINGERPRINTS) as store:
+        assert store.get(sampled) == Counter({10: 3, 20: 2})
+        assert store.get(exact) == Counter({10: 0.25, 20: 0.75})
+        assert not store.is_exact(sampled)
+        assert store.is_exact(exact)
+        assert store.loaded == 2
+
+
+def test_other_fingerprints_miss(tmp_path) -> None:
+    path = os.path.join(tmp_path, 'store.sqlite3')
+    key = ResultStore.make_key('kitchen', None, ('Cut',))
+    with ResultStore(path, FINGERPRINTS) as store:
+        store.put(key, Counter({5: 1}))
+    with ResultStore(path, {'kitchen': 'changed-cards'}) as store:
+        assert store.get(key) is None
+        assert key not in store
+
+
+def test_stores_without_exact_column_are_migrated(tmp_path) -> None:
+    path = os.path.join(tmp_path, 'store.sqlite3')
+    key = ResultStore.make_key('kitchen', None, ('Cut',))
+    with ResultStore(path, FINGERPRINTS) as store:
+        row_key = store._row_key(key)
+    connection = sqlite3.connect(path)
+    connection.execute("DROP TABLE distributions")
+    connection.execute(
+        "CREATE TABLE distributions "
+        "(row_key TEXT PRIMARY KEY, score_counts TEXT NOT NULL)"
+    )
+    connection.execute(
+        "INSERT INTO distributions VALUES (?, ?)", (row_key, '[[5, 1]]')
+    )
+    connection.commit()
+    connection.close()
+
+    with ResultStore(path, FINGERPRINTS) as store:
+        assert store.get(key) == Counter({5: 1})
+        assert not store.is_exact(key)
+        store.put(key, Counter({5: 1.0}), exact=True)
+    with ResultStore(path, FINGERPRINTS) as store:
+        assert store.get(key) == Counter({5: 1.0})
+        assert store.is_exact(key)
+
+
+def test_item_results_round_trip(tmp_path) -> None:
+    path = os.path.join(tmp_path, 'store.sqlite3')
+    result = {
+        'item_name': 'Odd Sweet',
+        'results': {8: {'1_star': {'deck': {'Cut': 8}, 'score': 1.5}}}
+    }
+    with ResultStore(path, FINGERPRINTS) as store:
+        assert store.get_item_result('item') is None
+        store.put_item_result('item', result)
+    with ResultStore(path, FINGERPRINTS) as store:
+        assert store.get_item_result('item') == result
+        assert store.items_reused == 1
@@ -0,0 +1,171 @@
+# Standard library imports
+from collections import Counter
+from typing import Any, Callable, List, Optional, Tuple
+
+# Related third-party imports
+import pytest
+
+# Local application imports
+import scheduler
+from main import CRAFTING_TYPE_CLASSES
+from scheduler import BatchScheduler, Job, estimate_deck_cost
+from score_cache import ScoreDistributionCache
+from simulator import MAX_CHUNK_SIZE, CardSimulator, SimulationSettings
+
+NUM_WORKERS = 2
+SIMULATIONS = 20
+
+
+class _Result:
+    def __init__(self, value: Any) -> None:
+        self._value = value
+
+    def get(self) -> Any:
+        return self._value
+
+
+class _InlinePool:
+    """A process pool stand-in that runs each task when it is submitted."""
+    chunks: List[List[Tuple[int, Tuple[int, ...]]]] = []
+
+    def __init__(
+        self, processes: int, initializer: Callable, initargs: tuple
+    ) -> None:
+        initializer(*initargs)
+
+    def apply_async(self, func: Callable, args: tuple) -> _Result:
+        _InlinePool.chunks.append(args[0])
+        return _Result(func(*args))
+
+    def __enter__(self) -> "_InlinePool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+def _job(cost: float, number: int) -> Job:
+    deck = (f"Card {number}",)
+    return (cost, 0, deck, ('forging', None, deck))
+
+
+def _assert_chunked_by_cost(chunks: List[List[Job]], budget: float) -> None:
+    for chunk in chunks:
+        assert 0 < len(chunk) <= MAX_CHUNK_SIZE
+    for chunk in chunks[:-1]:
+        # A chunk closes at the first job reaching the budget, or when full.
+        cost = sum(job[0] for job in chunk)
+        assert cost >= budget or len(chunk) == MAX_CHUNK_SIZE
+        assert cost - chunk[-1][0] < budget
+
+
+@pytest.mark.parametrize(
+    "num_jobs, chunk_size", [(100, 25), (40, 10), (1000, MAX_CHUNK_SIZE)]
+)
+def test_equal_cost_jobs_are_chunked_evenly(
+    num_jobs: int, chunk_size: int
+) -> None:
+    jobs = [_job(1.0, number) for number in range(num_jobs)]
+    chunks = BatchScheduler(ScoreDistributionCache())._chunks(jobs, 1)
+    assert [job for chunk in chunks for job in chunk] == jobs
+    assert all(len(chunk) == chunk_size for chunk in chunks[:-1])
+    assert 0 < len(chunks[-1]) <= chunk_size
+
+
+def test_mixed_cost_jobs_are_chunked_by_cost() -> None:
+    jobs = sorted(
+        (_job(float(1 + number % 7), number) for number in range(300)),
+        key=lambda job: job[0],
+        reverse=True
+    )
+    chunks = BatchScheduler(ScoreDistributionCache())._chunks(jobs, 3)
+    assert [job for chunk in chunks for job in chunk] == jobs
+    budget = sum(job[0] for job in jobs) / (3 * scheduler.CHUNKS_PER_WORKER)
+    _assert_chunked_by_cost(chunks, budget)
+
+
+def test_run_schedules_every_deck_once_longest_first(
+    cards_data: dict, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(scheduler.multiprocessing, 'Pool', _InlinePool)
+    monkeypatch.setattr(
+        scheduler.multiprocessing, 'cpu_count', lambda: NUM_WORKERS
+    )
+    monkeypatch.setattr(_InlinePool, 'chunks', [])
+    score_cache = ScoreDistributionCache()
+    batch = BatchScheduler(score_cache)
+    settings = SimulationSettings(seed=0, simulations=SIMULATIONS)
+    craftings = {
+        crafting_type: CRAFTING_TYPE_CLASSES[crafting_type](
+            cards_data[crafting_type]
+        )
+        for crafting_type in ("forging", "kitchen")
+    }
+
+    def simulator(
+        crafting_type: str, buff_id: Optional[str] = None
+    ) -> CardSimulator:
+        return CardSimulator(
+            craftings[crafting_type],
+            buff_id,
+            crafting_type=crafting_type,
+            settings=settings,
+            score_cache=score_cache
+        )
+
+    expected = Counter()
+    for crafting_type, buff_id, size in (
+        ("forging", None, 3),
+        ("forging", None, 4),
+        ("kitchen", None, 4),
+        ("forging", "carve_box_buff", 3),
+    ):
+        decks = list(craftings[crafting_type].iter_unique_decks(size))
+        added = batch.add(simulator(crafting_type, buff_id), size)
+        assert added == len(decks)
+        expected.update((crafting_type, buff_id, deck) for deck in decks)
+    # A second item of an already scheduled group adds nothing.
+    assert batch.add(simulator("forging"), 4) == 0
+    assert len(batch) == len(expected)
+
+    assert batch.run() == len(expected)
+    assert len(batch) == 0
+
+    # The groups in the order they were first added.
+    groups = [
+        ("forging", None), ("kitchen", None), ("forging", "carve_box_buff")
+    ]
+    dispatched = [
+        [
+            (
+                *groups[group],
+                craftings[groups[group][0]].decode_deck(counts)
+            )
+            for group, counts in chunk
+        ]
+        for chunk in _InlinePool.chunks
+    ]
+    # Every deck ran exactly once, and its distribution was stored.
+    assert Counter(key for chunk in dispatched for key in chunk) == expected
+    assert all(
+        ScoreDistributionCache.make_key(*key) in score_cache
+        for key in expected
+    )
+
+    # Longest first, in chunks of about equal cost.
+    jobs = [
+        [
+            (
+                estimate_deck_cost(crafting_type, len(deck), SIMULATIONS),
+                0,
+                deck,
+                (crafting_type, buff_id, deck)
+            )
+            for crafting_type, buff_id, deck in chunk
+        ]
+        for chunk in dispatched
+    ]
+    costs = [job[0] for chunk in jobs for job in chunk]
+    assert costs == sorted(costs, reverse=True)
+    budget = sum(costs) / (NUM_WORKERS * scheduler.CHUNKS_PER_WORKER)
+    _assert_chunked_by_cost(jobs, budget)
@@ -0,0 +1,105 @@
+# Standard library imports
+import asyncio
+from typing import Any, Dict, Iterator
+
+# Related third-party imports
+import pytest
+
+# Local application imports
+from crafting.kitchen import KitchenCrafting
+from server import RecommendationService, WarmPool
+from simulator import CardSimulator, SimulationSettings
+
+ITEM = "Stone Armor"
+
+
+@pytest.fixture
+def service() -> Iterator[RecommendationService]:
+    pool = WarmPool(1)
+    service = RecommendationService(pool)
+    yield service
+    service.close()
+    pool.close()
+
+
+def test_cache_hit_returns_no_future(service: RecommendationService) -> None:
+    report: Dict[str, Any] = {'item': ITEM, 'report': "cached"}
+    service.results[(ITEM, "stars")] = report
+
+    async def query() -> Any:
+        return service.recommend(ITEM, "stars")
+
+    assert asyncio.run(query()) == (report, None)
+    assert service.hits == 1
+
+
+def test_unknown_item_raises_key_error(service: RecommendationService) -> None:
+    async def query() -> Any:
+        return service.recommend("No Such Item", "stars")
+
+    with pytest.raises(KeyError):
+        asyncio.run(query())
+
+
+def test_unawaited_failure_is_logged_and_reported(
+    service: RecommendationService,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture
+) -> None:
+    def fail(item_name: str, report_type: str) -> Dict[str, Any]:
+        raise ValueError("simulation broke")
+
+    monkeypatch.setattr(service, '_compute', fail)
+
+    async def query_without_waiting() -> None:
+        # Like a wait=0 request: nobody awaits the computation.
+        _, future = service.recommend(ITEM, "stars")
+        while not future.done():
+            await asyncio.sleep(0.01)
+        # Let the done callback run.
+        await asyncio.sleep(0)
+
+    asyncio.run(query_without_waiting())
+    assert "simulation broke" in capsys.readouterr().out
+
+    async def query() -> Any:
+        return service.recommend(ITEM, "stars")
+
+    with pytest.raises(RuntimeError, match="simulation broke"):
+        asyncio.run(query())
+    assert service.misses == 1
+
+
+def _best_decks(cards_data: Dict[str, Any], pool: Any = None) -> dict:
+    simulator = CardSimulator(
+        KitchenCrafting(cards_data['kitchen']),
+        star_thresholds=[300, 600],
+        crafting_type='kitchen',
+        settings=SimulationSettings(seed=11, simulations=200),
+        coordinator=pool
+    )
+    return simulator.find_best_decks([3])
+
+
+def test_warm_pool_sends_the_simulator_once_per_job(
+    cards_data: Dict[str, Any]
+) -> None:
+    expected = _best_decks(cards_data)
+    pool = WarmPool(2)
+    sent = []
+    apply_async = pool._pool.apply_async
+
+    def recording_apply_async(func: Any, args: Any) -> Any:
+        sent.append(args)
+        return apply_async(func, args)
+
+    pool._pool.apply_async = recording_apply_async
+    try:
+        assert _best_decks(cards_data, pool) == expected
+        assert _best_decks(cards_data, pool) == expected
+        # Tasks carry the job id, function and chunk, never the simulator.
+        assert sent and all(len(args) == 3 for args in sent)
+        assert len({job_id for job_id, _, _ in sent}) == 2
+        assert len(pool._jobs) == 0
+    finally:
+        pool.close()
@@ -0,0 +1,181 @@
+# Standard library imports
+import math
+from collections import Counter
+from typing import Tuple
+
+# Related third-party imports
+import pytest
+
+# Local application imports
+from crafting.alchemy import AlchemyCrafting
+from main import CRAFTING_TYPE_CLASSES
+from simulator import CardSimulator, SimulationSettings
+
+ENGINE_SIMULATIONS = 4000
+# How many standard errors the engines' estimates may differ by.
+TOLERANCE = 4
+
+
+def _mean_and_variance(score_counts: Counter) -> Tuple[float, float]:
+    runs = sum(score_counts.values())
+    mean = sum(score * count for score, count in score_counts.items()) / runs
+    variance = sum(
+        count * (score - mean) ** 2 for score, count in score_counts.items()
+    ) / (runs - 1)
+    return mean, variance
+
+
+@pytest.mark.parametrize("mode", [{'adaptive': True}, {'search': True}])
+def test_exact_engine_rejects_sampling_modes(
+    cards_data: dict, mode: dict
+) -> None:
+    settings = SimulationSettings(engine="exact", **mode)
+    simulator = CardSimulator(
+        AlchemyCrafting(cards_data['alchemy']),
+        star_thresholds=[100],
+        settings=settings
+    )
+    with pytest.raises(ValueError):
+        simulator.find_best_decks([2])
+
+
+@pytest.mark.parametrize("crafting_type", ["kitchen", "forging", "alchemy"])
+def test_numpy_engine_matches_python_engine(
+    cards_data: dict, items_data: dict, crafting_type: str
+) -> None:
+    crafting = CRAFTING_TYPE_CLASSES[crafting_type](cards_data[crafting_type])
+    items = {
+        name: item for name, item in items_data.items()
+        if item['crafting_type'] == crafting_type
+    }
+    assert items
+    for item_name, item in items.items():
+        # The deck playing the most different cards exercises most rules.
+        deck = max(
+            crafting.iter_unique_decks(item['deck_size']),
+            key=lambda deck: len(set(deck))
+        )
+        results = {}
+        for engine in ("python", "numpy"):
+            simulator = CardSimulator(
+                crafting,
+                item.get('buff_id'),
+                item['star_thresholds'],
+                crafting_type=crafting_type,
+                settings=SimulationSettings(
+                    engine=engine, seed=0, simulations=ENGINE_SIMULATIONS
+                )
+            )
+            assert simulator.engine == engine
+            results[engine] = simulator.evaluate_deck(deck)
+
+        python_results, numpy_results = results["python"], results["numpy"]
+        python_mean, python_variance = _mean_and_variance(
+            python_results['score_counts']
+        )
+        numpy_mean, numpy_variance = _mean_and_variance(
+            numpy_results['score_counts']
+        )
+        standard_error = math.sqrt(
+            (python_variance + numpy_variance) / ENGINE_SIMULATIONS
+        )
+        assert abs(python_mean - numpy_mean) <= TOLERANCE * standard_error, (
+            f"{item_name}: mean {python_mean:.1f} vs {numpy_mean:.1f}"
+        )
+        for star_key, python_chance in python_results['star_chances'].items():
+            numpy_chance = numpy_results['star_chances'][star_key]
+            pooled = (python_chance + numpy_chance) / 200
+            standard_error = 100 * math.sqrt(
+                pooled * (1 - pooled) * 2 / ENGINE_SIMULATIONS
+            )
+            assert (
+                abs(python_chance - numpy_chance)
+                <= TOLERANCE * standard_error
+            ), f"{item_name} {star_key}: {python_chance} vs {numpy_chance}"
+
+
+def test_profiling_breaks_out_card_triggers(cards_data: dict) -> None:
+    crafting = CRAFTING_TYPE_CLASSES["forging"](cards_data["forging"])
+    deck = ('Multi Forge', 'Forge Expert', 'Forge Expert', 'Forge')
+    results = {}
+    profiler = None
+    for profile in (False, True):
+        simulator = CardSimulator(
+            crafting,
+            "firefang_sword_buff",
+            crafting_type="forging",
+            settings=SimulationSettings(
+                seed=0, simulations=500, profile=profile
+            )
+        )
+        results[profile] = simulator.evaluate_deck(deck)
+        profiler = simulator.profiler
+
+    # Timing the cards must not change what they do.
+    assert results[True]['score_counts'] == results[False]['score_counts']
+    # The shared instance is left unprofiled.
+    assert crafting.profiler is None
+
+    calls = {
+        name: profiler.calls[('card', name)]
+        for name in (
+            'Multi Forge', 'Forge Expert', 'Forge',
+            'Forge Expert (re-trigger)', 'Forge (re-trigger)',
+            'Forge Expert (item trigger)'
+        )
+    }
+    assert calls['Multi Forge'] == 500
+    assert calls['Forge Expert'] == 1000
+    assert calls['Forge'] == 500
+    # Multi Forge re-triggers the next Artisan card twice, unless it was
+    # shuffled last.
+    retriggers = (
+        calls['Forge Expert (re-trigger)'] + calls['Forge (re-trigger)']
+    )
+    assert retriggers % 2 == 0
+    assert 0 < retriggers < 2 * 500
+    # The sword's extra trigger fires on some Forge Expert triggers only.
+    total_expert_triggers = (
+        calls['Forge Expert'] + calls['Forge Expert (re-trigger)']
+    )
+    assert 0 < calls['Forge Expert (item trigger)'] < total_expert_triggers
+    assert profiler.calls[('phase', 'play cards')] == 4 * 500
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_seeded_results_do_not_depend_on_worker_count(
+    cards_data: dict,
+    items_data: dict,
+    monkeypatch: pytest.MonkeyPatch,
+    engine: str
+) -> None:
+    item = items_data["Stone Armor"]
+    crafting_type = item['crafting_type']
+    crafting = CRAFTING_TYPE_CLASSES[crafting_type](cards_data[crafting_type])
+    tables = {}
+    best = {}
+    for num_workers in (1, 2):
+        monkeypatch.setattr(
+            CardSimulator, '_num_workers', lambda self: num_workers
+        )
+        simulator = CardSimulator(
+            crafting,
+            item.get('buff_id'),
+            item['star_thresholds'],
+            item.get('wish_points'),
+            crafting_type=crafting_type,
+            settings=SimulationSettings(
+                engine=engine, seed=0, simulations=200, prune=False
+            ),
+            keep_deck_table=True
+        )
+        best[num_workers] = simulator.find_best_decks([3])
+        tables[num_workers] = {
+            tuple(sorted(deck_info['deck'].elements())): deck_info
+            for deck_info in simulator.deck_tables[3]
+        }
+
+    assert len(tables[1]) == len(simulator.deck_tables[3])
+    assert not any('pruned' in deck_info for deck_info in tables[1].values())
+    assert tables[1] == tables[2]
+    assert best[1] == best[2]
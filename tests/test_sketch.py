@@ -0,0 +1,52 @@
+# Standard library imports
+import math
+import random
+from collections import Counter
+from typing import List
+
+# Related third-party imports
+import pytest
+
+# Local application imports
+from sketch import ScoreSketch
+
+QUANTILES = [0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0]
+
+
+def _scores(count: int, seed: int) -> List[int]:
+    """Integer scores spread over several orders of magnitude, some 0."""
+    rng = random.Random(seed)
+    return [
+        0 if rng.random() < 0.05 else round(math.exp(rng.uniform(0, 12)))
+        for _ in range(count)
+    ]
+
+
+def test_merge_equals_sketching_the_concatenated_scores() -> None:
+    first, second = _scores(3000, seed=1), _scores(2000, seed=2)
+    merged = ScoreSketch.from_counts(Counter(first))
+    merged.merge(ScoreSketch.from_counts(Counter(second)))
+    combined = ScoreSketch.from_counts(Counter(first + second))
+    assert merged.to_dict() == combined.to_dict()
+    for q in QUANTILES:
+        assert merged.quantile(q) == combined.quantile(q)
+
+
+def test_merging_different_accuracies_raises() -> None:
+    with pytest.raises(ValueError):
+        ScoreSketch(0.01).merge(ScoreSketch(0.02))
+
+
+@pytest.mark.parametrize("accuracy", [0.01, 0.05])
+def test_quantiles_are_within_the_relative_accuracy(accuracy: float) -> None:
+    scores = _scores(5000, seed=3)
+    sketch = ScoreSketch.from_counts(Counter(scores), accuracy)
+    ranked = sorted(scores)
+    for q in QUANTILES:
+        # The smallest score at least a fraction q of the runs reach up to.
+        true_quantile = ranked[max(0, math.ceil(q * len(ranked)) - 1)]
+        estimate = sketch.quantile(q)
+        assert abs(estimate - true_quantile) <= accuracy * true_quantile
+    assert sketch.mean == sum(scores) / len(scores)
+    assert sketch.min == ranked[0]
+    assert sketch.max == ranked[-1]